@@ -0,0 +1,212 @@
+import asyncio
+import functools
+import importlib
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from utils.ai import build_chat_messages, stream_completion
+from utils.profiling import profiled
+from utils.warmup import warmup_enabled
+
+
+# Seconds a request may take before it's answered with 504
+REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "60"))
+# Threads running the blocking model, index and LLM calls, shared by all requests
+API_WORKERS = int(os.getenv("API_WORKERS", "32"))
+CHAT_MODELS = ["llama-3.1-70b-versatile", "llama-3.1-8b-instant"]
+PROFILE_FIELDS = ["gender", "age", "income", "expenditure", "savings", "objective", "duration"]
+FILTER_FIELDS = ["Market Cap", "Volume", "Recommendation Keys"]
+KPI_NAMES = ["latest_price", "monthly_avg", "yearly_high", "yearly_low", "roe", "debt_ratio", "pe_ratio"]
+
+
+class BadRequest(Exception):
+    pass
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def as_number(value):
+    # JSON has no inf or NaN; yfinance sends "Infinity" for some ratios
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+async def read_json(request, required=()):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("body must be JSON")
+    if not isinstance(body, dict):
+        raise BadRequest("body must be a JSON object")
+    missing = [field for field in required if not body.get(field)]
+    if missing:
+        raise BadRequest(f"missing {', '.join(missing)}")
+    return body
+
+
+def create_api(advisor=None, timeout=REQUEST_TIMEOUT, workers=API_WORKERS):
+    """
+    JSON API over the app's advisor, stock search, company research and news paths.
+    advisor is the imported app module (imported here when not given), so the API
+    shares its warm clients, indexes and caches. The SDKs underneath are blocking,
+    so their calls run on a shared thread pool while the event loop keeps serving;
+    every request gets timeout seconds, and the two LLM endpoints can stream their
+    answer as server-sent events with {"stream": true}. With FINOVAI_PROFILE=1
+    each stock search is profiled to PROFILE_DIR. The app's warm-up starts with the
+    API (unless WARMUP=off) and /ready answers 503 until it has finished.
+    """
+    advisor = advisor or importlib.import_module("app")
+    perform_rag = profiled("api.stocks_search")(advisor.perform_rag)
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(api):
+        state["executor"] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        if warmup_enabled():
+            state["warmup"] = advisor.start_warmup()
+        try:
+            yield
+        finally:
+            state.pop("executor").shutdown(wait=False, cancel_futures=True)
+
+    async def run(fn, *args, deadline=None):
+        loop = asyncio.get_running_loop()
+        remaining = timeout if deadline is None else deadline - loop.time()
+        return await asyncio.wait_for(loop.run_in_executor(state["executor"], functools.partial(fn, *args)), max(remaining, 0))
+
+    def endpoint(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            try:
+                return await handler(request)
+            except BadRequest as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+            except asyncio.TimeoutError:
+                return JSONResponse({"error": f"timed out after {timeout:g}s"}, status_code=504)
+            except Exception as e:
+                print(f"Error handling {request.url.path}: {str(e)}")
+                return JSONResponse({"error": str(e)}, status_code=502)
+        return wrapper
+
+    def stream(events):
+        """
+        Sends (event, data) pairs from a blocking generator as server-sent events
+        """
+        async def body():
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            iterator = iter(events)
+            done = object()
+            try:
+                while True:
+                    item = await run(next, iterator, done, deadline=deadline)
+                    if item is done:
+                        break
+                    yield sse(*item)
+                yield sse("done", {})
+            except asyncio.TimeoutError:
+                yield sse("error", {"error": f"timed out after {timeout:g}s"})
+            except Exception as e:
+                print(f"Error streaming response: {str(e)}")
+                yield sse("error", {"error": str(e)})
+        return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    def token_events(messages):
+        for text in stream_completion(advisor.client, CHAT_MODELS, messages):
+            yield "token", {"text": text}
+
+    async def health(request):
+        warmup = state.get("warmup")
+        return JSONResponse({"status": "ok", "warmup": warmup.progress() if warmup else None})
+
+    async def ready(request):
+        # For readiness probes: 503 until the warm-up has finished
+        warmup = state.get("warmup")
+        if warmup is None or warmup.ready.is_set():
+            return JSONResponse({"ready": True})
+        return JSONResponse({"ready": False, "warmup": warmup.progress()}, status_code=503)
+
+    @endpoint
+    async def chat(request):
+        body = await read_json(request, ["query", "profile"])
+        missing = [field for field in PROFILE_FIELDS if field not in body["profile"]]
+        if missing:
+            raise BadRequest(f"profile is missing {', '.join(missing)}")
+        if not body.get("stream"):
+            answer = await run(advisor.perform_chat_rag, body["query"], body["profile"], advisor.pinecone_index)
+            return JSONResponse({"answer": answer})
+        messages = await run(build_chat_messages, body["query"], body["profile"], advisor.pinecone_index)
+        return stream(token_events(messages))
+
+    @endpoint
+    async def search_stocks(request):
+        body = await read_json(request, ["query"])
+        filters = body.get("filters")
+        if filters and any(field not in filters for field in FILTER_FIELDS):
+            raise BadRequest(f"filters need {', '.join(FILTER_FIELDS)}")
+        if not body.get("stream"):
+            matches, analysis = await run(perform_rag, body["query"], filters)
+            return JSONResponse({"matches": matches, "analysis": analysis})
+
+        def events():
+            matches = advisor.find_stocks(advisor.get_huggingface_embeddings(body["query"]), filters)
+            yield "matches", matches
+            yield from token_events(advisor.build_analysis_messages(body["query"], matches))
+        return stream(events())
+
+    @endpoint
+    async def company(request):
+        ticker = request.path_params["ticker"].upper()
+        period = request.query_params.get("period", "1y")
+        if period not in advisor.HISTORY_PERIODS:
+            raise BadRequest(f"period must be one of {', '.join(advisor.HISTORY_PERIODS)}")
+        stock_info, history = await run(advisor.fetch_stock_data, ticker, period)
+        if history.empty:
+            return JSONResponse({"error": f"no price history for {ticker}"}, status_code=404)
+        # KPIs always cover the last year, as on the Company Research tab
+        data = history[history.index > history.index[-1] - advisor.pd.DateOffset(years=1)]
+        summary = await run(advisor.summarize_text, stock_info.get("longBusinessSummary", "No summary available."))
+        kpis = dict(zip(KPI_NAMES, (as_number(value) for value in advisor.calculate_kpis(data, stock_info))))
+        return JSONResponse(
+            {
+                "ticker": ticker,
+                "name": stock_info.get("shortName"),
+                "sector": stock_info.get("sector"),
+                "summary": summary,
+                "kpis": kpis,
+            }
+        )
+
+    @endpoint
+    async def news(request):
+        articles = await run(advisor.fetch_news, request.path_params["ticker"].upper())
+        return JSONResponse({"articles": articles})
+
+    return Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/ready", ready),
+            Route("/advisor", chat, methods=["POST"]),
+            Route("/stocks/search", search_stocks, methods=["POST"]),
+            Route("/companies/{ticker}", company),
+            Route("/companies/{ticker}/news", news),
+        ],
+        lifespan=lifespan,
+    )
+
+
+if __name__ == "__main__":
+    # Usage: python api.py  (or: uvicorn api:create_api --factory)
+    import uvicorn
+
+    uvicorn.run(create_api(), host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8000")))
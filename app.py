@@ -3,47 +3,113 @@ from dotenv import load_dotenv
 import os
 import yfinance as yf
 from utils.db import initialize_pinecone
-from utils.ai import perform_chat_rag
+from utils.ai import create_completion, perform_chat_rag, summarize_conversation
 from sentence_transformers import SentenceTransformer
 import streamlit.components.v1 as components
 from transformers import pipeline
-import requests
 import matplotlib.pyplot as plt
-import plotly.express as px
 import plotly.graph_objects as go
+import pandas as pd
 from pinecone import Pinecone
 import utils.utils as ut
+from utils.allocation import compute_allocation
+from utils.simulation import project_profile, summarize_projection
+from utils.correlation import ReturnCorrelations, download_prices, describe_correlations
 from openai import OpenAI
-from fpdf import FPDF
-import base64
+from utils.report import ReportBuilder
+from utils.charts import build_chart_specs
+from utils.news import NewsClient
+from utils.sentiment import SentimentScorer, describe_sentiment, sentiment_label
+from utils.metrics import REGISTRY, Trace, current_trace, serve_metrics, span, timed
+from utils.replay import REPLAY, HTTP_SESSION, OPENAI, PINECONE_INDEX, YFINANCE
+from utils.singleflight import make_key, singleflight
+from utils.cache import cached, get_cache
+from utils.ratelimit import get_limiter
+from utils.docstore import DocStore
+from utils.conversation import ConversationStore, RollingMemory
+from utils.mmr import maximal_marginal_relevance
+from utils.profiling import profiled, profiling_requested
+from utils.warmup import Warmup, load_model, warmup_enabled, warmup_tickers
+from utils.investors import get_investor_index
+from utils.local_llm import get_local_generator
+from collections import deque
+import functools
+import time
+import uuid
 
 
 # Load environment variables
 load_dotenv()
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+# Prebuilt with: python -m utils.correlation successful_tickers.txt data/returns.npz
+RETURNS_PATH = os.getenv("RETURNS_PATH", "data/returns.npz")
+# Comma separated tickers whose news is prefetched in the background at startup
+NEWS_WATCHLIST = [t for t in os.getenv("NEWS_WATCHLIST", "AAPL").split(",") if t]
+# News sentiment is added to the stock analysis context for this many of the top matches
+SENTIMENT_TICKERS = 4
+SENTIMENT_ICONS = {"positive": "🟢", "neutral": "⚪", "negative": "🔴"}
+# Set FINOVAI_DEBUG=1 (or open the page with ?debug=1) for the request waterfall panel
+DEBUG_PANEL = os.getenv("FINOVAI_DEBUG") == "1"
+# Serves /metrics and /metrics.json on this port when set
+METRICS_PORT = os.getenv("METRICS_PORT")
+SUMMARY_UNAVAILABLE = "Summary not available."
+# Stock documents are read from this local store rather than the query response,
+# sync it with: python -m utils.docstore
+DOCSTORE_PATH = os.getenv("DOCSTORE_PATH", "data/stocks.sqlite")
+# Vector matches requested per analysis; they are grouped to one per company and
+# STOCK_MATCHES of them picked by maximal marginal relevance, trading relevance
+# (MMR_LAMBDA = 1) against similarity to the companies already picked, with at most
+# MAX_PER_SECTOR from one sector while others are left (0 for no limit)
+STOCK_CANDIDATES = 40
+STOCK_MATCHES = int(os.getenv("STOCK_MATCHES", "8"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MAX_PER_SECTOR = int(os.getenv("MAX_PER_SECTOR", "3"))
+# Advisor conversations are kept here and survive reloads (the id is in the URL)
+CONVERSATIONS_PATH = os.getenv("CONVERSATIONS_PATH", "data/conversations.sqlite")
+# Advisor turns shown per page, and how much of a conversation goes back to the LLM:
+# the last few turns verbatim plus a summary of the rest
+HISTORY_PAGE_SIZE = 10
+RECENT_TURNS = 4
+SUMMARY_TOKENS = 300
+HISTORY_PERIODS = {"1y": "1 Year", "2y": "2 Years", "5y": "5 Years", "10y": "10 Years", "max": "All Time"}
+
+# External calls can be recorded once and replayed offline, see utils/replay.py (REPLAY_MODE)
+yf = REPLAY.wrap(yf, "yfinance", **YFINANCE)
 
 # Initialize Pinecone for CHAT
 index_name = "finov1"
-pinecone_index = initialize_pinecone(PINECONE_API_KEY, "us-east-1", index_name)
+pinecone_index = REPLAY.wrap_lazy(
+    functools.partial(initialize_pinecone, PINECONE_API_KEY, "us-east-1", index_name),
+    f"pinecone/{index_name}",
+    **PINECONE_INDEX,
+)
 
 # initialize Pinecone for Stock Analysis
 pc = Pinecone(PINECONE_API_KEY)
 index_name = "stocks"
 namespace = "stock-description_detailed"
 # Connect to the Pinecone index
-pinecone_index = pc.Index(index_name)
+pinecone_index = REPLAY.wrap_lazy(functools.partial(pc.Index, index_name), f"pinecone/{index_name}", **PINECONE_INDEX)
 
-# initialize OpenAI Client
+# initialize OpenAI Client; set LOCAL_LLM_MODEL (e.g. Qwen/Qwen2.5-0.5B-Instruct) for a
+# local model to answer when Groq is down, see utils/local_llm.py
 client = OpenAI(
     base_url="https://api.groq.com/openai/v1", api_key=os.getenv("GROQ_API_KEY")
 )
+client = REPLAY.wrap(client, "groq", **OPENAI)
 
+# st.cache_data doesn't coalesce concurrent misses, so sessions asking for the same
+# ticker at once would each hit yfinance without the single-flight underneath
 @st.cache_data
-def fetch_stock_data(ticker):
+@timed("yfinance")
+@cached("market_data", key=lambda ticker, period: make_key(ticker.strip().upper(), period))
+@singleflight(key=lambda ticker, period: (ticker.strip().upper(), period))
+def fetch_stock_data(ticker, period="1y"):
+    yahoo = get_limiter("yahoo")
     stock = yf.Ticker(ticker)
-    data = stock.history(period="1y")
-    stock_info = stock.info
+    data = yahoo.call(stock.history, period=period)
+    stock_info = yahoo.call(lambda: stock.info)
     return stock_info, data
 
 
@@ -55,7 +121,7 @@ def get_ticker_from_company_name(company_name):
 
 def calculate_kpis(data, stock_info):
     if not data.empty:
-        latest_price = data["Close"][-1]
+        latest_price = data["Close"].iloc[-1]
         monthly_avg = data["Close"].resample("ME").mean().iloc[-1]
         yearly_high = data["High"].max()
         yearly_low = data["Low"].min()
@@ -155,6 +221,9 @@ def create_footer():
     st.markdown(footer_html, unsafe_allow_html=True)
 
 
+@timed("summarize")
+@cached("summaries", unless=lambda summary: summary == SUMMARY_UNAVAILABLE)
+@singleflight()
 def summarize_text(text, max_length=130):
     try:
         prompt = f"""Please summarize the following text in a concise way (around {max_length} characters):
@@ -163,7 +232,8 @@ Text: {text}
 
 Summary:"""
         
-        response = client.chat.completions.create(
+        response = create_completion(
+            client,
             model="llama-3.1-8b-instant",  # or "llama-3.1-70b-versatile"
             messages=[
                 {"role": "system", "content": "You are a text summarization expert. Provide clear, concise summaries while maintaining key information."},
@@ -173,18 +243,39 @@ Summary:"""
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error summarizing text: {str(e)}")
-        return "Summary not available."
+        return SUMMARY_UNAVAILABLE
+
 
+@st.cache_resource
+def get_news_client():
+    news_client = NewsClient(NEWS_API_KEY, cache=get_cache("news"))
+    news_client.session = REPLAY.wrap(news_client.session, "newsapi", **HTTP_SESSION)
+    if NEWS_WATCHLIST:
+        news_client.prefetch(NEWS_WATCHLIST)
+    return news_client
 
+
+@timed("news")
 def fetch_news(ticker):
-    url = f"https://newsapi.org/v2/everything?q={ticker}&apiKey={NEWS_API_KEY}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        articles = response.json().get("articles", [])
-        return articles
-    else:
-        print(f"Failed to fetch news: {response.status_code}")
-        return []
+    return get_news_client().get(ticker)
+
+
+@st.cache_resource
+def get_sentiment_scorer():
+    return SentimentScorer()
+
+
+def get_news_sentiment(tickers, timeout=5):
+    """
+    Fetches news for the tickers concurrently and scores all articles in one batch
+    """
+    try:
+        futures = get_news_client().prefetch(tickers)
+        articles = {ticker: future.result(timeout=timeout) for ticker, future in zip(tickers, futures)}
+        return get_sentiment_scorer().ticker_signals(articles)
+    except Exception as e:
+        print(f"Error scoring news sentiment: {str(e)}")
+        return {}
 
 
 def create_gauge_chart(value, title, min_value=0, max_value=100):
@@ -199,59 +290,126 @@ def create_gauge_chart(value, title, min_value=0, max_value=100):
     return fig
 
 
-def format_matches(top_matches):
-    seen_tickers = set()
-    ticker_details = []
-
-    for match in top_matches["matches"]:
-        ticker = match["metadata"]["Ticker"]
-
-        # Skip if we've already seen this ticker
-        if ticker in seen_tickers:
-            continue
-
-        seen_tickers.add(ticker)
-        ticker_details.append(
-            {
-                "ticker": ticker,
-                "name": match["metadata"]["Name"],
-                "business_summary": match["metadata"]["Business Summary"],
-                "website": match["metadata"]["Website"],
-                "revenue_growth": match["metadata"]["Revenue Growth"],
-                "gross_margins": match["metadata"]["Gross Margins"],
-                "target_m_price": match["metadata"]["Target Mean Price"],
-                "current_price": match["metadata"]["Current Price"],
-                "52weekchange": match["metadata"]["52 Week Change"],
-                "sector": match["metadata"]["Sector"],
-                "market_cap": match["metadata"]["Market Cap"],
-                "volume": match["metadata"]["Volume"],
-                "recommendation_key": match["metadata"]["Recommendation Key"],
-                "text": match["metadata"]["text"],
-            }
+@st.cache_data
+def fetch_projection(user_profile):
+    allocation = compute_allocation(user_profile)
+    return project_profile(user_profile, allocation, chunk_months=120, seed=0)
+
+
+def create_projection_chart(projection):
+    years = projection["months"] / 12
+    bands = projection["percentiles"]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=years, y=bands[95], line=dict(width=0), showlegend=False))
+    fig.add_trace(
+        go.Scatter(
+            x=years, y=bands[5], fill="tonexty", line=dict(width=0),
+            fillcolor="rgba(0, 255, 157, 0.15)", name="5th-95th Percentile",
+        )
+    )
+    fig.add_trace(go.Scatter(x=years, y=bands[75], line=dict(width=0), showlegend=False))
+    fig.add_trace(
+        go.Scatter(
+            x=years, y=bands[25], fill="tonexty", line=dict(width=0),
+            fillcolor="rgba(0, 255, 157, 0.35)", name="25th-75th Percentile",
+        )
+    )
+    fig.add_trace(go.Scatter(x=years, y=bands[50], line=dict(color="#00FF9D"), name="Median"))
+    fig.add_trace(
+        go.Scatter(x=years, y=projection["contributed"], line=dict(dash="dash"), name="Contributed")
+    )
+    fig.update_layout(
+        title="Projected Portfolio Value",
+        xaxis_title="Years",
+        yaxis_title="Portfolio Value ($)",
+    )
+    return fig
+
+
+@st.cache_resource
+def get_doc_store():
+    return DocStore(DOCSTORE_PATH)
+
+
+def format_matches(top_matches, query_embedding=None):
+    # One entry per company in score order, details from the local store
+    if query_embedding is None:
+        return get_doc_store().hydrate(top_matches["matches"], STOCK_MATCHES, pinecone_index, namespace)
+    candidates, embeddings = get_doc_store().hydrate(
+        top_matches["matches"], STOCK_CANDIDATES, pinecone_index, namespace, vectors=True
+    )
+    # Diversify: similar companies and one-sector result sets make redundant context
+    with span("analysis.mmr"):
+        picked = maximal_marginal_relevance(
+            query_embedding,
+            embeddings,
+            STOCK_MATCHES,
+            MMR_LAMBDA,
+            groups=[candidate["sector"] for candidate in candidates],
+            max_per_group=MAX_PER_SECTOR,
         )
-    return ticker_details
+    return [candidates[i] for i in picked]
 
 
+@timed("analysis.embedding")
+@cached("embeddings", key=lambda text, model_name: make_key(text, model_name))
+@singleflight()
 def get_huggingface_embeddings(
     text, model_name="sentence-transformers/all-mpnet-base-v2"
 ):
-    model = SentenceTransformer(model_name)
+    model = load_model(SentenceTransformer, model_name)
     return model.encode(text)
 
 
-def augment_query_context(query, top_matches_formatted):
+def warm_embedding_model(model_name="sentence-transformers/all-mpnet-base-v2"):
+    # The first encode also sets up the inference kernels
+    load_model(SentenceTransformer, model_name).encode("warm up")
+
+
+@st.cache_resource
+def load_correlation_universe():
+    if os.path.exists(RETURNS_PATH):
+        return ReturnCorrelations.load(RETURNS_PATH)
+    return None
+
+
+@st.cache_resource(ttl=24 * 60 * 60)
+def fetch_correlations(tickers):
+    return ReturnCorrelations.from_prices(download_prices(list(tickers)))
+
+
+def get_correlation_context(tickers):
+    try:
+        service = load_correlation_universe()
+        if service is None or any(ticker not in service.index for ticker in tickers):
+            service = fetch_correlations(tuple(sorted(set(tickers))))
+        return describe_correlations(service, tickers)
+    except Exception as e:
+        print(f"Error computing correlations: {str(e)}")
+        return []
+
+
+def augment_query_context(query, top_matches_formatted, correlations=None, sentiment=None):
     context = "<CONTEXT>\n"
     for ticker in top_matches_formatted:
         context += f"\n\n--------\n\n {ticker['text']}\n Sector is {ticker['sector']}. \n Market Cap is {ticker['market_cap']}. \n Volume is {ticker['volume']}."
+    if correlations:
+        context += "\n\n--------\n\n Measured correlations of daily returns over the last year:\n " + "\n ".join(correlations)
+    if sentiment:
+        context += "\n\n--------\n\n Sentiment of recent news headlines:\n " + "\n ".join(sentiment)
     augmented_query = f"{context} \nMY QUESTION:\n {query}"
     return augmented_query
 
 
-# Perform rag
-def perform_rag(query, user_filters):
-    # embed the query
-    raw_query_embedding = get_huggingface_embeddings(query)
+def embed_queries(queries, model_name="sentence-transformers/all-mpnet-base-v2"):
+    """
+    Encodes many queries in one batched call, for the batch screener
+    """
+    model = load_model(SentenceTransformer, model_name)
+    return model.encode(list(queries))
 
+
+def build_stock_filter(user_filters):
     # apply filter to the metadata
     if user_filters:
 
@@ -259,7 +417,7 @@ def perform_rag(query, user_filters):
         volume = user_filters["Volume"]
         recommendation_keys = user_filters["Recommendation Keys"]
 
-        filter = {
+        return {
             "$and": [
                 {"Market Cap": {"$gte": market_cap}},
                 {"Volume": {"$gte": volume}},
@@ -267,55 +425,75 @@ def perform_rag(query, user_filters):
                 {"Recommendation Key": {"$in": recommendation_keys}},
             ]
         }
-    else:
-        filter = {
-            "$and": [
-                {"52 Week Change": {"$gt": 0}},
-                {"Recommendation Key": {"$in": ["buy", "strong buy", "hold"]}},
-            ]
-        }
+    return {
+        "$and": [
+            {"52 Week Change": {"$gt": 0}},
+            {"Recommendation Key": {"$in": ["buy", "strong buy", "hold"]}},
+        ]
+    }
 
-    # print("filter: ", filter)
+
+def find_stocks(query_embedding, user_filters):
+    filter = build_stock_filter(user_filters)
 
     # find the top matches
-    top_matches = pinecone_index.query(
-        vector=raw_query_embedding.tolist(),
-        filter=filter,
-        top_k=12,
-        include_metadata=True,
-        namespace=namespace,
-    )
-    top_matches_formatted = format_matches(top_matches)
+    with span("analysis.pinecone_query"):
+        top_matches = pinecone_index.query(
+            vector=query_embedding.tolist(),
+            filter=filter,
+            top_k=STOCK_CANDIDATES,
+            include_metadata=False,
+            include_values=False,
+            namespace=namespace,
+        )
+    return format_matches(top_matches, query_embedding)
 
-    # with open("top_matches.txt", "w") as file:
-    # # Convert top_matches to a JSON string for better readability
-    #     file.write(json.dumps(top_matches, indent=4))  # Use indent for pretty printing
 
-    augmented_query = augment_query_context(query, top_matches_formatted)
+def build_analysis_messages(query, top_matches_formatted):
+    tickers = [ticker["ticker"] for ticker in top_matches_formatted]
+    correlations = get_correlation_context(tickers)
+    sentiment = describe_sentiment(get_news_sentiment(tickers[:SENTIMENT_TICKERS]))
+    augmented_query = augment_query_context(query, top_matches_formatted, correlations, sentiment)
 
     system_prompt = """You are a financial expert at providing answers about stocks. Please answer my question provided.
             Analyze the stocks' in detail and explain current performance and potential future trends.
             Identify any notable connections or relationships with other stocks (e.g., industry, market correlation, or shared factors).
             Provide a concise, actionable insight to guide investment decisions.
     """
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": augmented_query},
+    ]
+
+
+def analyze_stocks(query, top_matches_formatted):
+    messages = build_analysis_messages(query, top_matches_formatted)
     try:
-        llm_response = client.chat.completions.create(
-            model="llama-3.1-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": augmented_query},
-            ],
-        )
+        with span("analysis.completion"):
+            llm_response = create_completion(client, model="llama-3.1-70b-versatile", messages=messages)
     except:
-        llm_response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": augmented_query},
-            ],
-        )
+        try:
+            with span("analysis.completion_fallback"):
+                llm_response = create_completion(client, model="llama-3.1-8b-instant", messages=messages)
+        except Exception as e:
+            # Then to the local model, when Groq is down altogether
+            generator = get_local_generator()
+            if generator is None:
+                raise
+            print(f"Error in fallback stock analysis: {str(e)}")
+            with span("analysis.completion_local"):
+                return generator.generate(messages)
 
-    response = llm_response.choices[0].message.content
+    return llm_response.choices[0].message.content
+
+
+# Perform rag
+@timed("analysis")
+def perform_rag(query, user_filters):
+    # embed the query
+    raw_query_embedding = get_huggingface_embeddings(query)
+    top_matches_formatted = find_stocks(raw_query_embedding, user_filters)
+    response = analyze_stocks(query, top_matches_formatted)
     return top_matches_formatted, response
 
 
@@ -367,58 +545,500 @@ def render_stock_block(stock):
         st.markdown(metrics_html, unsafe_allow_html=True)
 
 
-def create_download_link(val, filename):
-    b64 = base64.b64encode(val)  # val looks like b'...'
-    return f'''
-    <a href="data:application/octet-stream;base64,{b64.decode()}" download="{filename}">
-        <button style="
-            background-color: #00FF9D;
-            color: #0F1116;
-            padding: 10px 20px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-weight: bold;
-            margin: 10px 0;">
-            Download Investment Report
-        </button>
-    </a>
-    '''
-
-
-def export_to_pdf(user_profile, chat_history):
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Add title
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, 'FinovAI Investment Advisory Report', ln=True, align='C')
-    pdf.ln(10)
-    
-    # Add user profile
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'User Profile', ln=True)
-    pdf.set_font('Arial', '', 12)
-    for key, value in user_profile.items():
-        pdf.cell(0, 10, f'{key.capitalize()}: {value}', ln=True)
-    pdf.ln(10)
-    
-    # Add chat history
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'Investment Advice History', ln=True)
-    pdf.set_font('Arial', '', 12)
-    for q, a in chat_history:
-        pdf.multi_cell(0, 10, f'Question: {q}')
-        pdf.multi_cell(0, 10, f'Answer: {a}')
-        pdf.ln(5)
-    
-    return pdf.output(dest='S').encode('latin-1')
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def fetch_summary(text):
+    ut.count_run("summary")
+    return summarize_text(text)
+
+
+@st.cache_data(show_spinner=False)
+def fetch_chart_specs(ticker, period, last_bar, _data):
+    # Keyed on the ticker, range and last bar so the bars themselves are never hashed
+    ut.count_run("charts")
+    return build_chart_specs(_data)
+
+
+def resolve_ticker(company_input):
+    if company_input.upper() in yf.Tickers(company_input.upper()).tickers:
+        return company_input.upper()
+    return get_ticker_from_company_name(company_input)
+
+
+def debug_enabled():
+    return DEBUG_PANEL or st.query_params.get("debug") == "1"
+
+
+def keep_trace(trace):
+    # Only the debug panel reads traces, so don't hold on to them otherwise
+    if debug_enabled():
+        st.session_state.setdefault("traces", deque(maxlen=10)).append(trace)
+
+
+# Set FINOVAI_PROFILE=1 (or open the page with ?profile=1, or use the toggle in the
+# debug panel) to profile the stock analysis and company research panels; profiles
+# and their reports are saved to PROFILE_DIR (default profiles/), which keeps the
+# newest PROFILE_KEEP (default 100)
+def profiling_enabled():
+    return (
+        profiling_requested()
+        or st.query_params.get("profile") == "1"
+        or st.session_state.get("profile_requests", False)
+    )
+
+
+def keep_profile(profile):
+    st.session_state.setdefault("profiles", deque(maxlen=10)).append(profile)
+
+
+def traced(name):
+    """
+    Runs a panel as a span of the page trace during a full page run, or in a trace of
+    its own when it reruns on its own as a fragment
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_trace() is not None:
+                with span(name):
+                    return fn(*args, **kwargs)
+            trace = Trace(name)
+            try:
+                with trace:
+                    return fn(*args, **kwargs)
+            finally:
+                keep_trace(trace)
+        return wrapper
+    return decorator
+
+
+# Each panel below is a fragment: interacting with a widget inside it reruns only
+# that panel, and anything it needs from another panel is passed in explicitly.
+@st.fragment
+@traced("panel.company_research")
+@profiled("company_research", profiling_enabled, keep_profile)
+def render_company_research():
+    ut.count_run("company_research")
+    st.title("Financial Market Dashboard")
+    company_input = st.text_input("Enter Stock Ticker (e.g., AAPL):", "AAPL")
+    period = st.selectbox("Price History", list(HISTORY_PERIODS), format_func=HISTORY_PERIODS.get)
+    ticker = None
+    if company_input:
+        with st.spinner("Fetching stock data..."):
+            try:
+                ticker = resolve_ticker(company_input)
+                stock_info, history = fetch_stock_data(ticker, period)
+                # KPIs and metrics always cover the last year, whatever range is charted
+                data = history
+                if not history.empty:
+                    data = history[history.index > history.index[-1] - pd.DateOffset(years=1)]
+                if not data.empty:
+                    st.subheader(
+                        f"{stock_info.get('shortName', 'Unknown')} ({ticker.upper()})"
+                    )
+                    long_summary = stock_info.get(
+                        "longBusinessSummary", "No summary available."
+                    )
+                    summarized_summary = fetch_summary(long_summary)
+                    st.write(summarized_summary)
+
+                    st.subheader("📈 Key Performance Indicators (KPIs):")
+                    (
+                        latest_price,
+                        monthly_avg,
+                        yearly_high,
+                        yearly_low,
+                        roe,
+                        debt_ratio,
+                        pe_ratio,
+                    ) = calculate_kpis(data, stock_info)
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Latest Price", f"${latest_price:.2f}")
+                    col2.metric("Monthly Average", f"${monthly_avg:.2f}")
+                    col3.metric("52-Week High", f"${yearly_high:.2f}")
+                    col4.metric("52-Week Low", f"${yearly_low:.2f}")
+
+                    st.subheader("Financial Ratios")
+                    col5, col6, col7 = st.columns(3)
+                    roe = stock_info.get("returnOnEquity", 0) * 100
+                    debt_ratio = stock_info.get("debtToEquity", 0) * 100
+                    pe_ratio = stock_info.get("trailingPE", 0)
+                    col5.plotly_chart(
+                        create_gauge_chart(roe, "ROE (%)"),
+                        use_container_width=True,
+                    )
+                    col6.plotly_chart(
+                        create_gauge_chart(debt_ratio, "Debt Ratio (%)"),
+                        use_container_width=True,
+                    )
+                    col7.plotly_chart(
+                        create_gauge_chart(pe_ratio, "P/E Ratio"),
+                        use_container_width=True,
+                    )
+
+                    charts = fetch_chart_specs(ticker, period, history.index[-1], history)
+
+                    st.subheader(f"📉 Stock Price History ({HISTORY_PERIODS[period]}):")
+                    st.plotly_chart(charts["candlestick"], use_container_width=True)
+
+                    st.subheader("📊 Additional Insights:")
+
+                    st.write("### Volume Distribution")
+                    st.plotly_chart(charts["volume_pie"])
+
+                    st.write("### Average Close Price")
+                    st.plotly_chart(charts["monthly_bar"], use_container_width=True)
+
+                    st.write("### Daily Price Change Histogram")
+                    st.plotly_chart(charts["histogram"], use_container_width=True)
+
+                    st.subheader("Detailed Metrics:")
+                    st.dataframe(data.tail(10))
+                else:
+                    st.error("No data available for the given ticker.")
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+
+    # The news sidebar depends on the selected ticker, so a change reruns the whole page
+    if ticker != st.session_state["ticker"]:
+        st.session_state["ticker"] = ticker
+        st.rerun()
+
+
+@st.fragment
+@traced("panel.advisor")
+def render_advisor():
+    ut.count_run("advisor")
+    st.title("AI Investment Advisor")
+    st.subheader("Provide Your Details")
+    col1, col2 = st.columns(2)
+    with col1:
+        gender = st.radio("Gender", ("Male", "Female", "Other"))
+        age = st.slider("Age", 18, 80)
+        duration = st.number_input("Investment Duration (years)", min_value=1)
+    with col2:
+        income = st.number_input("Monthly Income", min_value=0)
+        expenditure = st.number_input("Monthly Expenditure", min_value=0)
+        savings = st.number_input("Current Savings", min_value=0)
+        objective = st.text_input("Investment Objective")
+
+    user_profile = {
+        "gender": gender,
+        "age": age,
+        "income": income,
+        "expenditure": expenditure,
+        "savings": savings,
+        "objective": objective,
+        "duration": duration
+    }
+
+    projection = None
+    try:
+        ut.validate_user_profile(user_profile)
+        projection = fetch_projection(user_profile)
+    except ValueError:
+        pass
+
+    if projection is not None:
+        with st.expander("📈 Projected Outcomes"):
+            st.plotly_chart(create_projection_chart(projection), use_container_width=True)
+            cols = st.columns(len(projection["percentiles"]) + 1)
+            for col, (label, value) in zip(cols, summarize_projection(projection)):
+                col.metric(label, f"${ut.format_large_number(round(value))}")
+
+    store = get_conversation_store()
+    conversation = get_conversation_id()
+
+    st.write("---")
+    render_history(store, conversation)
+
+    user_input = st.text_input("Type your question here:", key="user_input")
+
+    # Only ask once per question, not again on every rerun of this panel
+    if user_input and user_input != st.session_state.get("answered_input"):
+        with st.spinner("Generating response..."):
+            try:
+                # Use RAG-enhanced chat completion, with the conversation so far
+                memory = get_conversation_memory()
+                response = perform_chat_rag(user_input, user_profile, pinecone_index, history=memory.context(conversation))
+
+                if response:
+                    memory.add(conversation, user_input, response)
+                    st.session_state["answered_input"] = user_input
+                    st.session_state["history_page"] = 0
+                    st.write(f"**You:** {user_input}")
+                    st.write(f"**Advisor:** {response}")
+                else:
+                    st.error("Failed to get response from the model")
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+
+    if st.button("Reset Input"):
+        store.clear(conversation)
+        st.session_state["history_page"] = 0
+
+    last_turn = store.last_turn(conversation)
+    if last_turn[0]:
+        render_report_download(user_profile, conversation, last_turn, projection)
+
+
+@st.cache_resource
+def get_conversation_store():
+    return ConversationStore(CONVERSATIONS_PATH)
+
+
+def get_conversation_memory():
+    return RollingMemory(
+        get_conversation_store(), summarize_conversation, recent_turns=RECENT_TURNS, summary_tokens=SUMMARY_TOKENS
+    )
+
+
+def get_conversation_id():
+    # Kept in the URL so a reload picks the same conversation back up
+    if "conversation" not in st.query_params:
+        st.query_params["conversation"] = uuid.uuid4().hex
+    return st.query_params["conversation"]
+
+
+def render_history(store, conversation):
+    # One page of turns, newest first; only that page is read and drawn
+    total = store.count(conversation)
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    page = min(st.session_state.get("history_page", 0), pages - 1)
+    for _, user_msg, ai_response in store.page(conversation, page, HISTORY_PAGE_SIZE):
+        st.write(f"**Question:** {user_msg}")
+        st.write(f"**Response:** {ai_response}")
+    if pages > 1:
+        newer, position, older = st.columns([1, 2, 1])
+        newer.button("◀ Newer", key="history_newer", disabled=page == 0, on_click=set_history_page, args=(page - 1,))
+        position.caption(f"Page {page + 1} of {pages} ({total} questions)")
+        older.button("Older ▶", key="history_older", disabled=page == pages - 1, on_click=set_history_page, args=(page + 1,))
+
+
+def set_history_page(page):
+    st.session_state["history_page"] = page
+
+
+@st.fragment
+@traced("panel.report_download")
+def render_report_download(user_profile, conversation, last_turn, projection):
+    ut.count_run("report")
+    if "report" not in st.session_state:
+        st.session_state["report"] = ReportBuilder()
+    report = st.session_state["report"]
+
+    # Only build the PDF on request; new answers are appended to the existing document.
+    # The last turn tells whether the history changed, so it is only read to build
+    report_bytes = report.current_bytes(user_profile, last_turn)
+    if report_bytes is None and st.button("Prepare Investment Report", key="prepare_report"):
+        with span("pdf"):
+            chat_history = get_conversation_store().turns(conversation)
+            report_bytes = report.to_bytes(user_profile, chat_history, projection, version=last_turn)
+    if report_bytes is not None:
+        st.download_button(
+            "Download Investment Report",
+            data=report_bytes,
+            file_name="investment_advice.pdf",
+            mime="application/pdf",
+        )
+
+
+@st.fragment
+@traced("panel.stock_analysis")
+@profiled("stock_analysis", profiling_enabled, keep_profile)
+def render_stock_analysis():
+    ut.count_run("stock_analysis")
+    st.title("📉 AI Stock Analysis")
+    st.caption("Get Automated Stock Analysis done right here!")
+    user_query = st.text_area(
+        "Enter a description for the kind of stocks you are looking for:",
+        placeholder="Type here",
+    )
+
+    with st.expander("Apply filters"):
+        market_cap = st.number_input(
+            "Market Cap",
+            min_value=0,
+            max_value=10000000000000,
+            value=1000000,
+            step=1000,
+        )
+        volume = st.number_input(
+            "Volume", min_value=0, max_value=1000000000, value=10000, step=100
+        )
+        recommendation_keys = [
+            "strong buy",
+            "buy",
+            "hold",
+            "sell",
+            "strong sell",
+        ]
+        selected_recommendation_keys = st.multiselect(
+            "Recommendation Keys:",
+            recommendation_keys,
+            ["strong buy", "buy", "hold"],
+        )
+
+        user_filters = {
+            "Market Cap": market_cap,
+            "Volume": volume,
+            "Recommendation Keys": selected_recommendation_keys,
+        }
+
+    if st.button("Find Stocks", key="find_stocks_button"):
+        top_matches, results = perform_rag(user_query, user_filters)
+        with st.container():
+            if top_matches:
+                cols_main = st.columns(2)
+                with cols_main[0]:
+                    for match in top_matches[:2]:
+                        render_stock_block(match)
+
+                with cols_main[1]:
+                    for match in top_matches[2:4]:
+                        render_stock_block(match)
+            else:
+                st.write("No stocks found. Please refine your query.")
+
+            st.divider()
+            st.write("## Analysis")
+            st.write(results)
+
+
+@st.fragment
+@traced("panel.news")
+def render_news(ticker):
+    ut.count_run("news")
+    st.subheader("📰 Latest News")
+    if ticker:
+        news_articles = fetch_news(ticker)
+        if news_articles:
+            scores = get_sentiment_scorer().score_articles({ticker: news_articles})[ticker]
+            overall = sum(scores) / len(scores)
+            st.caption(f"News sentiment: {sentiment_label(overall)} ({overall:+.2f})")
+            for article, score in zip(news_articles[:5], scores):
+                st.markdown(f"**[{article['title']}]({article['url']})** {SENTIMENT_ICONS[sentiment_label(score)]}")
+                st.write(article["description"])
+                st.write(f"Published at: {article['publishedAt']}")
+                st.write("---")
+        else:
+            st.write("No news articles found.")
+
+
+@st.cache_resource
+def start_metrics_server():
+    return serve_metrics(int(METRICS_PORT))
+
+
+def warm_company(ticker, period=list(HISTORY_PERIODS)[0]):
+    # The same calls, with the same cache keys, as the Company Research panel
+    stock_info, history = fetch_stock_data(ticker, period)
+    fetch_summary(stock_info.get("longBusinessSummary", "No summary available."))
+    if not history.empty:
+        fetch_chart_specs(ticker, period, history.index[-1], history)
+
+
+def warmup_tasks(tickers):
+    tasks = [
+        ("embedding_model", warm_embedding_model),
+        ("stock_index", pinecone_index.describe_index_stats),
+        ("doc_store", lambda: len(get_doc_store())),
+        ("correlations", load_correlation_universe),
+        ("investors", get_investor_index),
+        ("news", lambda: [future.result() for future in get_news_client().prefetch(tickers)]),
+    ]
+    if os.getenv("LOCAL_LLM_MODEL"):
+        tasks.append(("local_llm", get_local_generator))
+    return tasks + [(f"company.{ticker}", functools.partial(warm_company, ticker)) for ticker in tickers]
+
+
+@st.cache_resource
+def start_warmup():
+    """
+    Loads models, connects the index, opens the local stores and prefetches the
+    WARMUP_TICKERS in background threads, once per process, so the first request
+    takes the warm path; WARMUP=off skips it
+    """
+    return Warmup(warmup_tasks(warmup_tickers())).start()
+
+
+def create_waterfall_chart(trace):
+    spans = trace.waterfall()
+    fig = go.Figure(
+        go.Bar(
+            y=list(range(len(spans))),
+            x=[s["duration_ms"] for s in spans],
+            base=[s["start_ms"] for s in spans],
+            orientation="h",
+            marker_color=["#FF4B4B" if s["error"] else "#00FF9D" for s in spans],
+            hovertemplate="%{x:.1f} ms starting at %{base:.1f} ms<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title=f"{trace.name}: {trace.duration * 1e3:.0f} ms",
+        xaxis_title="Milliseconds since request start",
+        yaxis=dict(
+            tickvals=list(range(len(spans))),
+            ticktext=[f"{'· ' * s['depth']}{s['stage']}" for s in spans],
+            autorange="reversed",
+        ),
+        height=120 + 25 * len(spans),
+    )
+    return fig
+
+
+@st.fragment
+def render_debug_panel():
+    with st.expander("🔧 Debug: request waterfall and metrics"):
+        st.button("Refresh", key="refresh_debug")
+        traces = list(st.session_state.get("traces", []))
+        if traces:
+            choice = st.selectbox(
+                "Request",
+                list(range(len(traces)))[::-1],
+                format_func=lambda i: f"{traces[i].name} at {time.strftime('%H:%M:%S', time.localtime(traces[i].started_at))}"
+                f" ({traces[i].duration * 1e3:.0f} ms)",
+            )
+            st.plotly_chart(create_waterfall_chart(traces[choice]), use_container_width=True)
+        st.toggle("Profile requests", key="profile_requests")
+        profiles = list(st.session_state.get("profiles", []))
+        if profiles:
+            choice = st.selectbox(
+                "Profile",
+                list(range(len(profiles)))[::-1],
+                format_func=lambda i: f"{profiles[i].name} at {time.strftime('%H:%M:%S', time.localtime(profiles[i].started_at))}"
+                f" ({profiles[i].duration * 1e3:.0f} ms)",
+            )
+            if profiles[choice].path:
+                st.caption(f"Saved to {profiles[choice].path}")
+            st.dataframe(pd.DataFrame(profiles[choice].functions), hide_index=True)
+            st.dataframe(pd.DataFrame(profiles[choice].allocations), hide_index=True)
+        if warmup_enabled():
+            st.json(start_warmup().progress())
+        st.json(REGISTRY.to_json())
+        st.code(REGISTRY.to_prometheus(), language="text")
 
 
 def main():
     st.set_page_config(layout="wide")
+    if METRICS_PORT:
+        start_metrics_server()
+    if warmup_enabled():
+        start_warmup()
+
+    page_trace = Trace("page")
+    with page_trace:
+        render_page()
+    keep_trace(page_trace)
+    if debug_enabled():
+        render_debug_panel()
+
+
+def render_page():
     create_header()
 
+    if "ticker" not in st.session_state:
+        st.session_state["ticker"] = "AAPL"
+
     main_col, timeline_col = st.columns([0.75, 0.25])
 
     with main_col:
@@ -427,262 +1047,19 @@ def main():
         )
 
         with tab1:
-            st.title("Financial Market Dashboard")
-            company_input = st.text_input("Enter Stock Ticker (e.g., AAPL):", "AAPL")
-            if company_input:
-                with st.spinner("Fetching stock data..."):
-                    try:
-                        if (
-                            company_input.upper()
-                            in yf.Tickers(company_input.upper()).tickers
-                        ):
-                            ticker = company_input.upper()
-                        else:
-                            ticker = get_ticker_from_company_name(company_input)
-                        stock_info, data = fetch_stock_data(ticker)
-                        if not data.empty:
-                            st.subheader(
-                                f"{stock_info.get('shortName', 'Unknown')} ({ticker.upper()})"
-                            )
-                            long_summary = stock_info.get(
-                                "longBusinessSummary", "No summary available."
-                            )
-                            summarized_summary = summarize_text(long_summary)
-                            st.write(summarized_summary)
-
-                            st.subheader("📈 Key Performance Indicators (KPIs):")
-                            (
-                                latest_price,
-                                monthly_avg,
-                                yearly_high,
-                                yearly_low,
-                                roe,
-                                debt_ratio,
-                                pe_ratio,
-                            ) = calculate_kpis(data, stock_info)
-                            col1, col2, col3, col4 = st.columns(4)
-                            col1.metric("Latest Price", f"${latest_price:.2f}")
-                            col2.metric("Monthly Average", f"${monthly_avg:.2f}")
-                            col3.metric("52-Week High", f"${yearly_high:.2f}")
-                            col4.metric("52-Week Low", f"${yearly_low:.2f}")
-
-                            st.subheader("Financial Ratios")
-                            col5, col6, col7 = st.columns(3)
-                            roe = stock_info.get("returnOnEquity", 0) * 100
-                            debt_ratio = stock_info.get("debtToEquity", 0) * 100
-                            pe_ratio = stock_info.get("trailingPE", 0)
-                            col5.plotly_chart(
-                                create_gauge_chart(roe, "ROE (%)"),
-                                use_container_width=True,
-                            )
-                            col6.plotly_chart(
-                                create_gauge_chart(debt_ratio, "Debt Ratio (%)"),
-                                use_container_width=True,
-                            )
-                            col7.plotly_chart(
-                                create_gauge_chart(pe_ratio, "P/E Ratio"),
-                                use_container_width=True,
-                            )
-
-                            st.subheader("📉 Stock Price History (1 Year):")
-                            fig = go.Figure(
-                                data=[
-                                    go.Candlestick(
-                                        x=data.index,
-                                        open=data["Open"],
-                                        high=data["High"],
-                                        low=data["Low"],
-                                        close=data["Close"],
-                                    )
-                                ]
-                            )
-                            fig.update_layout(
-                                title="Candlestick Chart",
-                                xaxis_title="Date",
-                                yaxis_title="Price",
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
-
-                            st.subheader("📊 Additional Insights:")
-
-                            st.write("### Volume Distribution")
-                            volume_data = data["Volume"].resample("ME").sum()
-                            fig1 = px.pie(
-                                values=volume_data.values,
-                                names=volume_data.index.strftime("%b"),
-                                title="Monthly Volume Distribution",
-                                hole=0.3,
-                            )
-                            fig1.update_layout(
-                                autosize=False,
-                                width=400,
-                                height=400,
-                                legend=dict(
-                                    orientation="h",
-                                    yanchor="bottom",
-                                    y=-0.2,
-                                    xanchor="center",
-                                    x=0.5,
-                                ),
-                            )
-                            st.plotly_chart(fig1)
-
-                            st.write("### Monthly Average Close Price")
-                            monthly_close_avg = data["Close"].resample("ME").mean()
-                            fig2 = px.bar(
-                                x=monthly_close_avg.index.strftime("%b"),
-                                y=monthly_close_avg,
-                                labels={"x": "Month", "y": "Average Close Price"},
-                                title="Monthly Average Close Price",
-                            )
-                            st.plotly_chart(fig2, use_container_width=True)
-
-                            st.write("### Daily Price Change Histogram")
-                            daily_change = data["Close"].diff().dropna()
-                            fig3 = px.histogram(
-                                daily_change,
-                                nbins=30,
-                                title="Daily Price Change Distribution",
-                                labels={"value": "Price Change", "count": "Frequency"},
-                            )
-                            st.plotly_chart(fig3, use_container_width=True)
-
-                            st.subheader("Detailed Metrics:")
-                            st.dataframe(data.tail(10))
-                        else:
-                            st.error("No data available for the given ticker.")
-                    except Exception as e:
-                        st.error(f"An error occurred: {str(e)}")
+            render_company_research()
 
         with tab2:
-            st.title("AI Investment Advisor")
-            st.subheader("Provide Your Details")
-            col1, col2 = st.columns(2)
-            with col1:
-                gender = st.radio("Gender", ("Male", "Female", "Other"))
-                age = st.slider("Age", 18, 80)
-                duration = st.number_input("Investment Duration (years)", min_value=1)
-            with col2:
-                income = st.number_input("Monthly Income", min_value=0)
-                expenditure = st.number_input("Monthly Expenditure", min_value=0)
-                savings = st.number_input("Current Savings", min_value=0)
-                objective = st.text_input("Investment Objective")
-
-            user_profile = {
-                "gender": gender,
-                "age": age,
-                "income": income,
-                "expenditure": expenditure,
-                "savings": savings,
-                "objective": objective,
-                "duration": duration
-            }
-
-            if "history" not in st.session_state:
-                st.session_state["history"] = []
-
-            st.write("---")
-            for i in range(len(st.session_state["history"]) - 1, -1, -1):
-                user_msg, ai_response = st.session_state["history"][i]
-                st.write(f"**Question:** {user_msg}")
-                st.write(f"**Response:** {ai_response}")
-
-            user_input = st.text_input("Type your question here:", key="user_input")
-
-            if user_input:
-                with st.spinner("Generating response..."):
-                    try:
-                        # Use RAG-enhanced chat completion
-                        response = perform_chat_rag(user_input, user_profile, pinecone_index)
-                        
-                        if response:
-                            st.session_state["history"].append((user_input, response))
-                            st.write(f"**You:** {user_input}")
-                            st.write(f"**Advisor:** {response}")
-                        else:
-                            st.error("Failed to get response from the model")
-                    except Exception as e:
-                        st.error(f"An error occurred: {str(e)}")
-
-            if st.button("Reset Input"):
-                st.session_state["history"] = []
-
-            if st.session_state["history"]:
-                pdf = export_to_pdf(user_profile, st.session_state["history"])
-                st.markdown(create_download_link(pdf, "investment_advice.pdf"), unsafe_allow_html=True)
+            render_advisor()
 
         with tab3:
-            st.title("📉 AI Stock Analysis")
-            st.caption("Get Automated Stock Analysis done right here!")
-            user_query = st.text_area(
-                "Enter a description for the kind of stocks you are looking for:",
-                placeholder="Type here",
-            )
-
-            with st.expander("Apply filters"):
-                market_cap = st.number_input(
-                    "Market Cap",
-                    min_value=0,
-                    max_value=10000000000000,
-                    value=1000000,
-                    step=1000,
-                )
-                volume = st.number_input(
-                    "Volume", min_value=0, max_value=1000000000, value=10000, step=100
-                )
-                recommendation_keys = [
-                    "strong buy",
-                    "buy",
-                    "hold",
-                    "sell",
-                    "strong sell",
-                ]
-                selected_recommendation_keys = st.multiselect(
-                    "Recommendation Keys:",
-                    recommendation_keys,
-                    ["strong buy", "buy", "hold"],
-                )
-
-                user_filters = {
-                    "Market Cap": market_cap,
-                    "Volume": volume,
-                    "Recommendation Keys": selected_recommendation_keys,
-                }
-
-            if st.button("Find Stocks", key="find_stocks_button"):
-                top_matches, results = perform_rag(user_query, user_filters)
-                with st.container():
-                    if top_matches:
-                        cols_main = st.columns(2)
-                        with cols_main[0]:
-                            for match in top_matches[:2]:
-                                render_stock_block(match)
-
-                        with cols_main[1]:
-                            for match in top_matches[2:4]:
-                                render_stock_block(match)
-                    else:
-                        st.write("No stocks found. Please refine your query.")
-
-                    st.divider()
-                    st.write("## Analysis")
-                    st.write(results)
+            render_stock_analysis()
 
     create_footer()
 
     with timeline_col:
         trading_view_timeline()
-        st.subheader("📰 Latest News")
-        if company_input:
-            news_articles = fetch_news(ticker)
-            if news_articles:
-                for article in news_articles[:5]:
-                    st.markdown(f"**[{article['title']}]({article['url']})**")
-                    st.write(article["description"])
-                    st.write(f"Published at: {article['publishedAt']}")
-                    st.write("---")
-            else:
-                st.write("No news articles found.")
+        render_news(st.session_state["ticker"])
 
 
 if __name__ == "__main__":
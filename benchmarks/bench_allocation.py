@@ -0,0 +1,43 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.allocation import compute_allocations, compute_allocation
+
+
+def synthetic_profiles(n, seed=0):
+    """
+    Generates n random profiles within the validation rules
+    """
+    rng = np.random.default_rng(seed)
+    incomes = rng.uniform(1_000, 50_000, n)
+    return (
+        rng.integers(18, 101, n),
+        rng.integers(1, 41, n),
+        incomes,
+        incomes * rng.uniform(0, 0.99, n),
+    )
+
+
+def run(n=1_000_000):
+    ages, durations, incomes, expenditures = synthetic_profiles(n)
+    batch_seconds, _ = time_call(compute_allocations, ages, durations, incomes, expenditures, repeat=3)
+
+    profile = {"age": 30, "duration": 10, "income": 8000, "expenditure": 5000}
+    single_seconds, _ = time_call(compute_allocation, profile, repeat=200)
+
+    rows = [
+        ("batch size", f"{n:,}"),
+        ("batch time", f"{batch_seconds:.3f} s"),
+        ("batch allocations/sec", f"{n / batch_seconds:,.0f}"),
+        ("single profile latency", f"{single_seconds * 1e6:.1f} us"),
+    ]
+    print_results("Allocation engine", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
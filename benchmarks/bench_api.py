@@ -0,0 +1,98 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+import numpy as np
+import httpx
+import uvicorn
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import print_results
+from benchmarks.stubs import FakeLLM, FakeYFinance, build_stock_index, stubbed_app
+
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+THEMES = ["EV makers", "cloud security", "oil and gas dividends", "biotech pipeline", "regional banks", "chip designers"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request_for(endpoint, i):
+    """
+    A distinct request per i so nothing is answered from a cache or shared flight
+    """
+    if endpoint == "advisor":
+        return "POST", "/advisor", {"json": {"query": f"How should I invest for {THEMES[i % 6]} {i}?", "profile": PROFILE}}
+    if endpoint == "stocks":
+        return "POST", "/stocks/search", {"json": {"query": f"{THEMES[i % 6]} {i}"}}
+    return "GET", f"/companies/T{i:04d}", {}
+
+
+async def drive(base_url, endpoint, requests, concurrency, offset=0):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def one(client, i):
+        method, path, kwargs = request_for(endpoint, offset + i)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=httpx.Limits(max_connections=concurrency)) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, statuses
+
+
+def run(requests=64, concurrencies=(1, 8, 32), llm_latency=0.1, upstream_latency=0.02):
+    rows = []
+    index = build_stock_index(2_000, latency=upstream_latency)
+    with stubbed_app(stock_index=index, llm=FakeLLM(latency=llm_latency), yfinance=FakeYFinance(latency=upstream_latency)) as app:
+        import api
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(api.create_api(app), host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        try:
+            offset = 0
+            for endpoint in ["advisor", "stocks", "company"]:
+                for concurrency in concurrencies:
+                    count = requests if concurrency > 1 else requests // 4
+                    elapsed, latencies, statuses = asyncio.run(drive(f"http://127.0.0.1:{port}", endpoint, count, concurrency, offset))
+                    offset += count
+                    rows.append(
+                        (
+                            f"{endpoint} x{concurrency}",
+                            f"{count / elapsed:.1f} req/s, p50 {np.percentile(latencies, 50) * 1000:.0f} ms "
+                            f"p95 {np.percentile(latencies, 95) * 1000:.0f} ms, {statuses.count(200)}/{count} ok",
+                        )
+                    )
+        finally:
+            server.should_exit = True
+            thread.join()
+    print_results(f"API throughput, LLM {llm_latency * 1000:.0f} ms, upstream {upstream_latency * 1000:.0f} ms", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,77 @@
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import sample_call, print_results
+from benchmarks.stubs import FakeLLM, FakeNewsSession, FakeYFinance, RESPServer
+from utils.cache import Cache, MemoryBackend, RedisBackend, SQLiteBackend, backend_from_url, dumps
+from utils.news import trim_article
+
+REPEAT = 200
+
+
+def values():
+    """
+    One value of each kind the app caches
+    """
+    ticker = FakeYFinance().Ticker("AAPL")
+    news = FakeNewsSession().get("https://newsapi.org/v2/everything", params={"q": "AAPL"}).json()["articles"]
+    return {
+        "embedding (768 float32)": np.random.default_rng(0).normal(size=768).astype(np.float32),
+        "summary": "Apple designs, manufactures and markets smartphones, computers and wearables. " * 2,
+        "news (5 articles)": [trim_article(article) for article in news[:5]],
+        "market data (info + 1y bars)": (ticker.info, ticker.history(period="1y")),
+        "llm answer": FakeLLM().create("m", [{"role": "user", "content": "How should I invest?"}]),
+    }
+
+
+def percentile_us(samples, q):
+    return float(np.percentile(samples, q)) * 1e6
+
+
+def run(redis_url=None):
+    rows = []
+    for name, value in values().items():
+        rows.append((f"size: {name}", f"{len(dumps(value))} B stored vs {len(pickle.dumps(value))} B pickled"))
+
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        if redis_url:
+            backends = {"redis": backend_from_url(redis_url)}
+        else:
+            server = RESPServer()
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            backends = {"resp stand-in": RedisBackend(*server.server_address)}
+        backends = {
+            "memory": MemoryBackend(),
+            "sqlite": SQLiteBackend(os.path.join(directory, "cache.sqlite")),
+            **backends,
+        }
+        for backend_name, backend in backends.items():
+            cache = Cache(backend, "bench", ttl=60)
+            for name, value in values().items():
+                put, _ = sample_call(cache.set, name, value, repeat=REPEAT)
+                get, _ = sample_call(cache.get, name, repeat=REPEAT)
+                rows.append(
+                    (
+                        f"{backend_name}: {name}",
+                        f"put p50 {percentile_us(put, 50):.0f} us p99 {percentile_us(put, 99):.0f} us, "
+                        f"get p50 {percentile_us(get, 50):.0f} us p99 {percentile_us(get, 99):.0f} us",
+                    )
+                )
+            backend.close()
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    print_results("Cache get/put latency per backend", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    # Usage: python -m benchmarks.bench_cache [redis://host:port/db]
+    run(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.charts import build_chart_specs
+
+
+def synthetic_history(years, seed=0):
+    """
+    Generates a random walk of daily OHLCV bars
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2024-12-31", periods=252 * years)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(index))))
+    spread = close * rng.uniform(0, 0.02, len(index))
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 1, len(index)),
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, len(index)),
+        },
+        index=index,
+    )
+
+
+def previous_charts(data):
+    """
+    The Company Research charts as they were built on every render before the chart layer
+    """
+    fig = go.Figure(
+        data=[go.Candlestick(x=data.index, open=data["Open"], high=data["High"], low=data["Low"], close=data["Close"])]
+    )
+    volume_data = data["Volume"].resample("ME").sum()
+    fig1 = px.pie(values=volume_data.values, names=volume_data.index.strftime("%b"), hole=0.3)
+    monthly_close_avg = data["Close"].resample("ME").mean()
+    fig2 = px.bar(x=monthly_close_avg.index.strftime("%b"), y=monthly_close_avg)
+    fig3 = px.histogram(data["Close"].diff().dropna(), nbins=30)
+    return [f.to_dict() for f in (fig, fig1, fig2, fig3)]
+
+
+def payload_kb(figures, traces_only=False):
+    if traces_only:
+        figures = [figure["data"] for figure in figures]
+    return len(json.dumps(figures, cls=PlotlyJSONEncoder)) / 1024
+
+
+def run():
+    rows = []
+    for years in (1, 5, 20):
+        data = synthetic_history(years)
+        old_seconds, old = time_call(previous_charts, data, repeat=3)
+        new_seconds, new = time_call(build_chart_specs, data, repeat=3)
+        new = list(new.values())
+        rows.append(
+            (
+                f"{years}y ({len(data):,} bars)",
+                f"previous {old_seconds * 1e3:.0f} ms / {payload_kb(old):,.0f} KB"
+                f" ({payload_kb(old, True):,.0f} KB traces)"
+                f" -> chart layer {new_seconds * 1e3:.0f} ms / {payload_kb(new):,.0f} KB"
+                f" ({payload_kb(new, True):,.0f} KB traces)",
+            )
+        )
+    print_results("Company Research charts (build time / JSON payload incl. layout template)", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
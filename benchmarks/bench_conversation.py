@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import print_results
+from benchmarks.stubs import FakeLLM
+from utils.conversation import ConversationStore, RollingMemory, count_tokens, extractive_summary
+
+CHECKPOINTS = [10, 50, 100, 250, 500]
+PAGE_SIZE = 10
+
+
+def messages_tokens(messages):
+    return sum(count_tokens(m["content"]) for m in messages)
+
+
+def full_history_messages(history):
+    """
+    Every earlier turn verbatim, the unbounded way to give the advisor context
+    """
+    return [m for q, a in history for m in ({"role": "user", "content": q}, {"role": "assistant", "content": a})]
+
+
+def render_all(history):
+    # What the advisor tab drew on every rerun: every turn, newest first
+    return [f"**Question:** {q}\n**Response:** {a}" for q, a in reversed(history)]
+
+
+def render_page(store, conversation):
+    return [f"**Question:** {q}\n**Response:** {a}" for _, q, a in store.page(conversation, 0, PAGE_SIZE)]
+
+
+def run(turns=500, path=":memory:"):
+    llm = FakeLLM(completion_tokens=150)
+    store = ConversationStore(path)
+    summaries = []
+
+    def summarize(summary, folded, max_tokens):
+        summaries.append(len(folded))
+        return extractive_summary(summary, folded, max_tokens)
+    memory = RollingMemory(store, summarize)
+    history = []
+    rows = []
+    add_seconds = []
+    for turn in range(1, turns + 1):
+        question = f"Question {turn}: should I move part of my savings into index funds or bonds this year?"
+        answer = llm.create("m", [{"role": "user", "content": question}]).choices[0].message.content
+        history.append((question, answer))
+        start = time.perf_counter()
+        memory.add("bench", question, answer)
+        add_seconds.append(time.perf_counter() - start)
+        if turn in CHECKPOINTS:
+            start = time.perf_counter()
+            context = memory.context("bench")
+            page = render_page(store, "bench")
+            bounded = time.perf_counter() - start
+            start = time.perf_counter()
+            full = full_history_messages(history)
+            drawn = render_all(history)
+            unbounded = time.perf_counter() - start
+            rows.append(
+                (
+                    f"turn {turn}",
+                    f"context {messages_tokens(context)} vs {messages_tokens(full)} tokens, "
+                    f"{len(page)} vs {len(drawn)} turns drawn, "
+                    f"context + page {bounded * 1000:.2f} ms vs {unbounded * 1000:.2f} ms",
+                )
+            )
+    rows.append(("add turn", f"p50 {np.percentile(add_seconds, 50) * 1000:.2f} ms, p99 {np.percentile(add_seconds, 99) * 1000:.2f} ms"))
+    rows.append(("summaries", f"{len(summaries)} calls for {turns} turns, {max(summaries)} turns folded per call"))
+    print_results("Advisor conversation: bounded memory vs full history", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
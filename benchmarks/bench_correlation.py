@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.correlation import ReturnCorrelations
+
+
+def synthetic_returns(n_days, n_tickers, n_factors=10, seed=0):
+    """
+    Generates factor-driven daily returns so tickers have realistic correlation structure
+    """
+    rng = np.random.default_rng(seed)
+    factors = rng.standard_normal((n_days, n_factors)) * 0.01
+    loadings = rng.standard_normal((n_factors, n_tickers))
+    return (factors @ loadings + rng.standard_normal((n_days, n_tickers)) * 0.015).astype(np.float32)
+
+
+def run(n_tickers=9000, n_days=252):
+    returns = synthetic_returns(n_days + 5, n_tickers)
+    tickers = [f"T{i}" for i in range(n_tickers)]
+
+    start = time.perf_counter()
+    service = ReturnCorrelations(tickers, returns[:n_days], window=n_days)
+    accumulate_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    service.top_peers(tickers[0])
+    rank_seconds = time.perf_counter() - start
+
+    update_seconds, _ = time_call(service.update, returns[n_days], repeat=5)
+    service.top_peers(tickers[0])
+    lookup_seconds, _ = time_call(service.top_peers, tickers[123], 5, repeat=1000)
+    pair_seconds, _ = time_call(service.pair, tickers[1], tickers[2], repeat=1000)
+
+    rows = [
+        ("universe", f"{n_tickers:,} tickers x {n_days} days"),
+        ("build (accumulate X^T X)", f"{accumulate_seconds:.2f} s"),
+        ("build (rank top peers)", f"{rank_seconds:.2f} s"),
+        ("incremental update per bar", f"{update_seconds * 1e3:.1f} ms"),
+        ("top-5 peers lookup", f"{lookup_seconds * 1e6:.1f} us"),
+        ("pair correlation lookup", f"{pair_seconds * 1e6:.1f} us"),
+    ]
+    print_results("Return correlations", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 9000)
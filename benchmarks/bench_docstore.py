@@ -0,0 +1,69 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import sample_call, print_results
+from benchmarks.stubs import StubEncoder, build_stock_index
+from utils.docstore import DocStore
+
+NAMESPACE = "stock-description_detailed"
+TOP_K = 12
+# Roughly what a client sees from a hosted index in another region
+BANDWIDTH = 2_000_000
+QUERIES = [
+    "profitable software and cloud companies with strong growth",
+    "oil and gas producers paying dividends",
+    "biotech with a drug pipeline",
+    "banks and insurers with stable margins",
+]
+
+
+def metadata_query(index, vector):
+    """
+    The query perform_rag made before the document store: full metadata per match,
+    deduplicated by ticker afterwards
+    """
+    response = index.query(vector=vector, top_k=TOP_K, include_metadata=True, namespace=NAMESPACE)
+    seen, details = set(), []
+    for match in response["matches"]:
+        if match["metadata"]["Ticker"] not in seen:
+            seen.add(match["metadata"]["Ticker"])
+            details.append(match["metadata"])
+    return details
+
+
+def id_query(index, store, vector):
+    response = index.query(vector=vector, top_k=TOP_K, include_metadata=False, include_values=False, namespace=NAMESPACE)
+    return store.hydrate(response["matches"], TOP_K, index, NAMESPACE)
+
+
+def run(size=5_000, repeat=20, bandwidth=BANDWIDTH):
+    encoder = StubEncoder("sentence-transformers/all-mpnet-base-v2")
+    index = build_stock_index(size, encoder, bandwidth=bandwidth)
+    store = DocStore(":memory:")
+    store.sync_from_index(index, NAMESPACE)
+    vectors = [encoder.encode(query).tolist() for query in QUERIES]
+
+    rows = []
+    for name, fn in [("metadata in response", lambda v: metadata_query(index, v)), ("ids + local store", lambda v: id_query(index, store, v))]:
+        index.response_bytes = 0
+        samples = []
+        for vector in vectors:
+            seconds, details = sample_call(fn, vector, repeat=repeat)
+            samples.extend(seconds)
+        per_query = index.response_bytes / (len(vectors) * repeat)
+        rows.append(
+            (
+                name,
+                f"{per_query / 1024:.1f} KiB per query, p50 {np.percentile(samples, 50) * 1000:.1f} ms "
+                f"p95 {np.percentile(samples, 95) * 1000:.1f} ms, {len(details)} companies",
+            )
+        )
+    print_results(f"Stock query payload, {size} stocks at {bandwidth / 1e6:.0f} MB/s", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
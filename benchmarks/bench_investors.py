@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import sample_call, print_results
+from benchmarks.stubs import StubEncoder, build_advice_index
+from utils.investors import DEFAULT_PATH, InvestorIndex, describe_investors
+
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+QUESTION = "How should I invest my savings?"
+
+
+def median_us(samples):
+    return float(np.median(samples)) * 1e6
+
+
+def run(sizes=(40, 10_000, 100_000), repeat=200):
+    survey = pd.read_csv(DEFAULT_PATH)
+    rows = []
+    for size in sizes:
+        data = pd.concat([survey] * (size // len(survey) + 1), ignore_index=True).iloc[:size]
+        index = InvestorIndex(data)
+        query, matches = sample_call(index.query, PROFILE, 5, repeat=repeat)
+        describe, _ = sample_call(describe_investors, matches, repeat=repeat)
+        rows.append((f"structured index, {size} rows", f"query p50 {median_us(query):.0f} us, describe p50 {median_us(describe):.0f} us"))
+
+    # The text path it sits alongside: embed the question, then query the advice index
+    encoder = StubEncoder("sentence-transformers/all-mpnet-base-v2")
+    advice = build_advice_index(1_000, encoder)
+    text, _ = sample_call(
+        lambda: advice.query(vector=encoder.encode(QUESTION).tolist(), top_k=5, include_metadata=True), repeat=repeat
+    )
+    rows.append(("embedded text query, 1000 rows (local stub)", f"p50 {median_us(text):.0f} us, plus the network round trip"))
+    print_results("Similar investors lookup", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
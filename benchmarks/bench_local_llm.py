@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import print_results
+from benchmarks.stubs import WORDS, build_tiny_generator
+
+
+def prompts(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        [
+            {"role": "system", "content": " ".join(rng.choice(WORDS, int(rng.integers(40, 120))))},
+            {"role": "user", "content": " ".join(rng.choice(WORDS, 8)) + " ?"},
+        ]
+        for _ in range(count)
+    ]
+
+
+def timed_stream(generator, messages, max_new_tokens):
+    """
+    Returns (seconds to the first chunk, seconds to the end, chunks)
+    """
+    start = time.perf_counter()
+    first = None
+    chunks = 0
+    for _ in generator.stream(messages, max_new_tokens):
+        chunks += 1
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start, chunks
+
+
+def run(clients=16, max_new_tokens=32, batch_sizes=(1, 4, 8, 16), layers=4, width=256):
+    rows = []
+    requests = prompts(clients)
+    for batch_size in batch_sizes:
+        generator = build_tiny_generator(layers, width, max_batch_size=batch_size, max_new_tokens=max_new_tokens)
+        generator.generate(requests[0])
+        generator.stats.clear()
+        generator.queue_seconds.clear()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(lambda messages: timed_stream(generator, messages, max_new_tokens), requests))
+        elapsed = time.perf_counter() - start
+        first = [r[0] for r in results if r[0] is not None]
+        latency = [r[1] for r in results]
+        waits = list(generator.queue_seconds)
+        rows.append(
+            (
+                f"{clients} concurrent requests, batches of up to {batch_size}",
+                f"{generator.stats['tokens'] / elapsed:.0f} tokens/s, queue wait p50 {np.median(waits) * 1e3:.0f} ms "
+                f"p95 {np.percentile(waits, 95) * 1e3:.0f} ms, first chunk p50 {np.median(first) * 1e3:.0f} ms, "
+                f"done p95 {np.percentile(latency, 95) * 1e3:.0f} ms, {generator.stats['batches']} batches",
+            )
+        )
+        generator.close()
+    print_results(f"Local generation ({layers}-layer, {width}-wide test model, {max_new_tokens} new tokens)", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
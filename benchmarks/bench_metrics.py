@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.metrics import MetricsRegistry, Trace, span, timed
+
+CALLS = 100_000
+
+
+def stage():
+    return None
+
+
+def bare_loop():
+    for _ in range(CALLS):
+        stage()
+
+
+def span_loop(registry):
+    for _ in range(CALLS):
+        with span("stage", registry):
+            stage()
+
+
+def decorated_loop(registry):
+    traced_stage = timed("stage", registry)(stage)
+    for _ in range(CALLS):
+        traced_stage()
+
+
+def traced_span_loop(registry):
+    # A fresh trace per 100 spans, roughly the number of stages in a page run
+    for _ in range(CALLS // 100):
+        with Trace("page"):
+            for _ in range(100):
+                with span("stage", registry):
+                    stage()
+
+
+def run():
+    bare_seconds, _ = time_call(bare_loop)
+    rows = []
+    for name, loop in (
+        ("span() context manager", span_loop),
+        ("@timed decorator", decorated_loop),
+        ("span() inside a request trace", traced_span_loop),
+    ):
+        seconds, _ = time_call(loop, MetricsRegistry())
+        rows.append((name, f"{(seconds - bare_seconds) / CALLS * 1e6:.2f} µs overhead per span"))
+
+    registry = MetricsRegistry()
+    for stage_index in range(20):
+        for _ in range(1000):
+            registry.observe(f"stage_{stage_index}", 0.01 * (stage_index + 1))
+    export_seconds, text = time_call(registry.to_prometheus)
+    rows.append(("Prometheus export (20 stages)", f"{export_seconds * 1e3:.2f} ms, {len(text) / 1024:.1f} KB"))
+    json_seconds, _ = time_call(registry.to_json)
+    rows.append(("JSON export (20 stages)", f"{json_seconds * 1e3:.2f} ms"))
+    print_results(f"Instrumentation overhead ({CALLS:,} spans)", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
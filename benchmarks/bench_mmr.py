@@ -0,0 +1,62 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import sample_call, print_results
+from utils.mmr import maximal_marginal_relevance
+
+
+def clustered_candidates(size=100, dimension=768, sectors=10, seed=0):
+    """
+    Candidates as tight clusters (one per sector) at varying distance from the query,
+    the way retrieval returns near-identical companies of one sector
+    """
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=dimension)
+    query /= np.linalg.norm(query)
+    centres = rng.normal(size=(sectors, dimension))
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    # The first sectors lean towards the query, so plain top-k stays in them
+    centres += np.linspace(1.5, 0.2, sectors)[:, None] * query
+    groups = rng.integers(0, sectors, size)
+    embeddings = centres[groups] + 0.05 * rng.normal(size=(size, dimension))
+    return query, embeddings.astype(np.float32), [f"Sector {g}" for g in groups]
+
+
+def redundancy(embeddings, picked):
+    unit = embeddings[picked] / np.linalg.norm(embeddings[picked], axis=1, keepdims=True)
+    similarity = unit @ unit.T
+    return float(similarity[np.triu_indices(len(picked), 1)].mean())
+
+
+def run(sizes=(40, 100, 400), k=8, repeat=500):
+    rows = []
+    for size in sizes:
+        query, embeddings, groups = clustered_candidates(size)
+        samples, _ = sample_call(maximal_marginal_relevance, query, embeddings, k, 0.7, groups, 3, repeat=repeat)
+        rows.append((f"mmr, {size} candidates, k={k}", f"p50 {float(np.median(samples)) * 1e6:.0f} us"))
+
+    query, embeddings, groups = clustered_candidates(100)
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    top_k = list(np.argsort(-(unit @ query))[:k])
+    for name, picked in [
+        ("plain top-k", top_k),
+        ("mmr, lambda 0.7", maximal_marginal_relevance(query, embeddings, k, 0.7)),
+        ("mmr, lambda 0.7, 3 per sector", maximal_marginal_relevance(query, embeddings, k, 0.7, groups, 3)),
+    ]:
+        relevance = float((unit[picked] @ query).mean())
+        rows.append(
+            (
+                name,
+                f"mean pairwise similarity {redundancy(embeddings, picked):.2f}, "
+                f"{len({groups[i] for i in picked})} sectors, mean relevance {relevance:.2f}",
+            )
+        )
+    print_results("MMR diversification", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
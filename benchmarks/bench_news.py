@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.news import NewsClient
+
+UPSTREAM_LATENCY = 0.1
+WATCHLIST = ["AAPL", "MSFT", "NVDA", "GOOGL", "AMZN"]
+
+
+class SlowNewsAPI(BaseHTTPRequestHandler):
+    """Serves a fixed 20 article page after a fixed delay"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.calls += 1
+        time.sleep(UPSTREAM_LATENCY)
+        article = {"source": {"name": "Wire"}, "title": "Headline", "description": "Text",
+                   "url": "https://example.com", "publishedAt": "2024-01-01", "content": "x" * 2000}
+        body = json.dumps({"articles": [article] * 20}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def previous_fetch(url, ticker):
+    """
+    The news lookup as it ran on every render before the client: a fresh connection per call
+    """
+    response = requests.get(url, params={"q": ticker, "pageSize": 5, "apiKey": "key"})
+    return response.json().get("articles", [])[:5]
+
+
+def sessions(fetch, users=8, renders=5):
+    """
+    users concurrent sessions, each rendering the page renders times across the watchlist
+    """
+    def session(user):
+        for render in range(renders):
+            fetch(WATCHLIST[(user + render) % len(WATCHLIST)])
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(session, range(users)))
+
+
+def run():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowNewsAPI)
+    server.daemon_threads = True
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v2/everything"
+
+    rows = []
+    old_seconds, _ = time_call(sessions, lambda ticker: previous_fetch(url, ticker), repeat=1)
+    rows.append(("previous (requests.get per render)", f"{old_seconds * 1e3:.0f} ms, {server.calls} upstream calls"))
+
+    server.calls = 0
+    client = NewsClient("key", base_url=url)
+    new_seconds, _ = time_call(sessions, client.get, repeat=1)
+    rows.append(
+        (
+            "NewsClient (cold cache)",
+            f"{new_seconds * 1e3:.0f} ms, {server.calls} upstream calls, hit ratio {client.hit_ratio:.0%}",
+        )
+    )
+
+    server.calls = 0
+    client = NewsClient("key", base_url=url)
+    for future in client.prefetch(WATCHLIST):
+        future.result()
+    warm_seconds, _ = time_call(sessions, client.get, repeat=1)
+    rows.append(
+        (
+            "NewsClient (prefetched watchlist)",
+            f"{warm_seconds * 1e3:.0f} ms, {server.calls} upstream calls, hit ratio {client.hit_ratio:.0%}",
+        )
+    )
+    server.shutdown()
+    print_results(f"News sidebar, 8 sessions x 5 renders, {UPSTREAM_LATENCY * 1e3:.0f} ms upstream", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import sample_call, print_results
+from benchmarks.stubs import StubEncoder, build_stock_index, stubbed_app
+from utils.profiling import profiled, profiling_requested
+
+QUERY = "profitable software and cloud companies with strong growth"
+
+
+def run(size=2_000, repeat=30, calls=200_000):
+    rows = []
+    # The wrapper alone, around a function that does nothing: the price of leaving
+    # the decorator on with profiling off
+    def noop():
+        return None
+
+    wrapped = profiled("noop", profiling_requested)(noop)
+    for name, fn in [("bare call", noop), ("profiled, disabled", wrapped)]:
+        samples, _ = sample_call(lambda: [fn() for _ in range(calls)], repeat=5)
+        rows.append((name, f"{min(samples) / calls * 1e9:.0f} ns per call"))
+
+    index = build_stock_index(size, StubEncoder("sentence-transformers/all-mpnet-base-v2"))
+    with tempfile.TemporaryDirectory() as directory, stubbed_app(stock_index=index) as app:
+        app.perform_rag(QUERY, None)
+        variants = [
+            ("perform_rag", app.perform_rag),
+            ("perform_rag, profiled, disabled", profiled("analysis", lambda: False)(app.perform_rag)),
+            ("perform_rag, profiled, enabled", profiled("analysis", lambda: True, directory=directory)(app.perform_rag)),
+        ]
+        for name, fn in variants:
+            samples, _ = sample_call(fn, QUERY, None, repeat=repeat)
+            rows.append((name, f"p50 {float(np.median(samples)) * 1e3:.2f} ms"))
+        rows.append(("profiles written", f"{len(os.listdir(directory)) // 2} (.prof and .txt each)"))
+    print_results("Request profiling overhead", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
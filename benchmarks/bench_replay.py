@@ -0,0 +1,41 @@
+import os
+import pickle
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from benchmarks.stubs import FakeLLM, FakeNewsSession, FakeYFinance
+from utils.replay import HTTP_SESSION, OPENAI, YFINANCE, ReplayStore, Replayer
+
+MESSAGES = [{"role": "user", "content": "How should I invest my savings?"}]
+CALLS = {
+    "yfinance history (5y)": (FakeYFinance(), "yfinance", YFINANCE, lambda y: y.Ticker("AAPL").history(period="5y")),
+    "yfinance info": (FakeYFinance(), "yfinance", YFINANCE, lambda y: y.Ticker("AAPL").info),
+    "newsapi get": (FakeNewsSession(), "newsapi", HTTP_SESSION, lambda s: s.get("https://newsapi.org/v2/everything", params={"q": "AAPL"})),
+    "groq completion": (FakeLLM(), "groq", OPENAI, lambda c: c.chat.completions.create(model="m", messages=MESSAGES)),
+}
+
+
+def run():
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReplayStore(os.path.join(directory, "replay.sqlite"))
+        raw_bytes = 0
+        for name, (target, service, spec, use) in CALLS.items():
+            live_seconds, value = time_call(use, target, repeat=20)
+            raw_bytes += len(pickle.dumps(value.json() if service == "newsapi" else value))
+            use(Replayer("record", store).wrap(target, service, **spec))
+            replayer = Replayer("replay", store, latency=None)
+            replay_seconds, _ = time_call(use, replayer.wrap(None, service, **spec), repeat=20)
+            rows.append((name, f"local stub {live_seconds * 1e3:.3f} ms -> replay {replay_seconds * 1e3:.3f} ms"))
+        stored = sum(size for _, _, size, _ in store.summary())
+        rows.append(("store size", f"{stored / 1024:.1f} KB compressed vs {raw_bytes / 1024:.1f} KB pickled"))
+        store.close()
+    print_results("Record/replay (no injected latency)", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.report import ReportBuilder, export_to_pdf
+
+
+PROFILE = {
+    "gender": "Female", "age": 35, "income": 9000, "expenditure": 5000,
+    "savings": 40000, "objective": "Retirement", "duration": 25,
+}
+ANSWER = (
+    "Based on your profile, a long horizon allows a growth oriented allocation. "
+    "Diversify across equity, mutual funds and bonds, and review the allocation yearly. "
+) * 8
+
+
+def synthetic_history(n):
+    return [(f"Question number {i}: how should I rebalance this year?", ANSWER) for i in range(n)]
+
+
+def run(n_messages=100):
+    history = synthetic_history(n_messages)
+
+    full_seconds, pdf = time_call(export_to_pdf, PROFILE, history, repeat=3)
+
+    def append_one():
+        # A builder that already holds the first n - 1 answers gets one more
+        builder = ReportBuilder()
+        builder.update(PROFILE, history[:-1])
+        return builder
+
+    builders = [append_one() for _ in range(3)]
+    incremental_seconds, _ = time_call(lambda: builders.pop().to_bytes(PROFILE, history), repeat=3)
+
+    builder = ReportBuilder()
+    builder.to_bytes(PROFILE, history, version=(n_messages, 0.0))
+    memo_seconds, _ = time_call(builder.to_bytes, PROFILE, history, repeat=20)
+    # What each rerun does now: compare the last turn, without reading the history
+    version_seconds, _ = time_call(builder.current_bytes, PROFILE, (n_messages, 0.0), repeat=20)
+
+    rows = [
+        ("history", f"{n_messages} messages, {len(pdf) / 1024:,.0f} KB PDF"),
+        ("full rebuild (previous per-rerun path)", f"{full_seconds * 1e3:.1f} ms"),
+        ("append one message + output", f"{incremental_seconds * 1e3:.1f} ms"),
+        ("memoized (unchanged history)", f"{memo_seconds * 1e3:.2f} ms"),
+        ("memoized, checked by last turn", f"{version_seconds * 1e3:.3f} ms"),
+        ("inline data URI overhead avoided", f"{(len(pdf) * 4 / 3 - len(pdf)) / 1024:,.0f} KB per rerun"),
+    ]
+    print_results("PDF report", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from benchmarks.stubs import FakeLLM, build_stock_index, stubbed_app
+from utils.screening import screen
+
+THEMES = ["EV makers", "cloud security", "oil and gas dividends", "biotech pipeline", "regional banks", "chip designers"]
+
+
+def run(queries=48, llm_latency=0.1, index_latency=0.02):
+    jobs = [(f"{THEMES[i % len(THEMES)]} {i}", None) for i in range(queries)]
+    index = build_stock_index(2_000, latency=index_latency)
+    with stubbed_app(stock_index=index, llm=FakeLLM(latency=llm_latency)) as app:
+        one_by_one, _ = time_call(lambda: [app.perform_rag(query, filters) for query, filters in jobs], repeat=1)
+        batched, (_, stats) = time_call(screen, app, jobs, repeat=1)
+    rows = [
+        ("perform_rag one by one", f"{one_by_one:.2f}s, {queries / one_by_one:.1f} queries/s"),
+        ("screen (8 queries, 4 analyses)", f"{batched:.2f}s, {queries / batched:.1f} queries/s, {stats['failed']} failed"),
+    ]
+    print_results(f"Batch screening, {queries} queries, LLM {llm_latency * 1000:.0f} ms", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,64 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.sentiment import FINANCE_LEXICON, SentimentScorer
+
+FILLER = "the company shares market quarter analysts investors said on after for its new".split()
+
+
+def synthetic_articles(tickers, per_ticker, seed=0):
+    """
+    Headline / description pairs mixing filler words, lexicon words and negators
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = FILLER * 4 + list(FINANCE_LEXICON) + ["not", "no", "isn't"]
+
+    def sentence(n):
+        return " ".join(rng.choice(vocabulary, n)).capitalize()
+
+    return {
+        f"T{t}": [
+            {"title": sentence(10), "description": sentence(25) + ".", "url": f"https://news/{t}/{i}"}
+            for i in range(per_ticker)
+        ]
+        for t in range(tickers)
+    }
+
+
+def score_one_by_one(scorer, articles_by_ticker):
+    """
+    Scores each article with its own call, as a per-article scorer would
+    """
+    return {
+        ticker: [scorer.score_texts([f"{a['title']}. {a['description']}"])[0] for a in articles]
+        for ticker, articles in articles_by_ticker.items()
+    }
+
+
+def run():
+    rows = []
+    for tickers, per_ticker in ((1, 5), (4, 5), (100, 20)):
+        articles = synthetic_articles(tickers, per_ticker)
+        count = tickers * per_ticker
+        single_seconds, _ = time_call(score_one_by_one, SentimentScorer(), articles)
+        batch_seconds, _ = time_call(lambda: SentimentScorer().ticker_signals(articles))
+        scorer = SentimentScorer()
+        scorer.ticker_signals(articles)
+        cached_seconds, _ = time_call(scorer.ticker_signals, articles)
+        rows.append(
+            (
+                f"{tickers} tickers x {per_ticker} articles",
+                f"per-article {single_seconds * 1e3:.2f} ms -> batched {batch_seconds * 1e3:.2f} ms"
+                f" ({count / batch_seconds:,.0f} articles/s), cached {cached_seconds * 1e3:.2f} ms",
+            )
+        )
+    print_results("Headline sentiment scoring", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,40 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import time_call, print_results
+from utils.allocation import compute_allocation
+from utils.simulation import project_profile
+
+
+PROFILE = {"age": 25, "income": 8000, "expenditure": 5000, "savings": 50000, "duration": 40}
+
+
+def measure(n_paths, chunk_months):
+    """
+    Returns (seconds, peak traced MB) for one projection
+    """
+    allocation = compute_allocation(PROFILE)
+    tracemalloc.start()
+    seconds, _ = time_call(
+        project_profile, PROFILE, allocation, n_paths=n_paths, chunk_months=chunk_months, seed=0, repeat=1
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def run(n_paths=100_000):
+    rows = []
+    for chunk_months in (None, 120, 24):
+        seconds, peak_mb = measure(n_paths, chunk_months)
+        label = f"{n_paths:,} paths x 480 months, chunk={chunk_months or 'none'}"
+        rows.append((label, f"{seconds:.2f} s, peak {peak_mb:,.0f} MB"))
+    print_results("Monte Carlo projection", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
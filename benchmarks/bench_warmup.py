@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import print_results
+from benchmarks.stubs import (
+    FakeLLM,
+    FakeNewsSession,
+    FakeYFinance,
+    StubEncoder,
+    build_stock_index,
+    stubbed_app,
+)
+import utils.warmup as warmup_module
+from utils.warmup import Warmup
+
+QUERY = "profitable software and cloud companies with strong growth"
+
+
+def first_requests(app, ticker):
+    """
+    Seconds for what the first visitor does: the Company Research page for ticker,
+    its news, then a stock search
+    """
+    timings = {}
+    for name, fn in [
+        ("company research", lambda: app.warm_company(ticker)),
+        ("news", lambda: app.fetch_news(ticker)),
+        ("stock search", lambda: app.perform_rag(QUERY, None)),
+    ]:
+        start = time.perf_counter()
+        fn()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def run(model_load=1.0, latency=0.2, tickers=("AAPL", "MSFT", "NVDA", "AMZN", "GOOGL")):
+    # Roughly a model load and upstream calls from a fresh container
+    StubEncoder.load_seconds = model_load
+    stubs = dict(
+        stock_index=build_stock_index(1_000, latency=latency / 4),
+        llm=FakeLLM(latency=latency),
+        yfinance=FakeYFinance(latency=latency),
+        news_session=FakeNewsSession(latency=latency),
+    )
+    rows = []
+    try:
+        with stubbed_app(**stubs) as app:
+            for name in ["cold start", "after warm-up"]:
+                # Both runs start from empty caches and an unloaded model
+                app.st.cache_data.clear()
+                app.get_news_client().invalidate()
+                warmup_module._models.clear()
+                if name == "after warm-up":
+                    warmup = Warmup(app.warmup_tasks(list(tickers))).start()
+                    warmup.wait()
+                    rows.append((f"warm-up, {len(warmup.tasks)} tasks", f"{warmup.duration:.2f} s in the background"))
+                timings = first_requests(app, tickers[0])
+                rows.append(
+                    (f"{name}: first requests", ", ".join(f"{stage} {seconds * 1e3:.0f} ms" for stage, seconds in timings.items()))
+                )
+    finally:
+        StubEncoder.load_seconds = 0.0
+    print_results("Startup warm-up", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,37 @@
+import time
+
+
+def time_call(fn, *args, repeat=5, **kwargs):
+    """
+    Runs fn repeat times and returns (best seconds, last result)
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_results(title, rows):
+    """
+    Prints benchmark results as aligned "name: value" lines
+    """
+    print(f"\n== {title} ==")
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"{name.ljust(width)} : {value}")
+
+
+def sample_call(fn, *args, repeat=5, **kwargs):
+    """
+    Runs fn repeat times and returns ([seconds per run], last result)
+    """
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+    return samples, result
@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import print_results
+
+
+def compare_results(baseline, candidate, threshold=0.1, metric="median_ms"):
+    """
+    Pairs up the cases present in both result documents; returns rows of
+    (case, size, baseline ms, candidate ms, ratio, status)
+    """
+    rows = []
+    for name, by_size in candidate["results"].items():
+        for size, result in by_size.items():
+            before = baseline["results"].get(name, {}).get(size)
+            if before is None:
+                continue
+            ratio = result[metric] / before[metric] if before[metric] else float("inf")
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 - threshold:
+                status = "improvement"
+            else:
+                status = "unchanged"
+            rows.append((name, size, before[metric], result[metric], ratio, status))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares two benchmarks.rag_suite result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change treated as noise")
+    parser.add_argument("--metric", default="median_ms", choices=["median_ms", "best_ms"])
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare_results(baseline, candidate, args.threshold, args.metric)
+    if not rows:
+        print("No cases in common")
+        return 0
+    print_results(
+        f"{baseline['commit']} -> {candidate['commit']} ({args.metric}, ±{args.threshold:.0%})",
+        [
+            (f"{name} [{size}]", f"{before:.2f} ms -> {after:.2f} ms ({ratio:.2f}x) {status}")
+            for name, size, before, after, ratio, status in rows
+        ],
+    )
+    # A non-zero exit lets CI fail on regressions
+    return 1 if any(row[-1] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import streamlit.logger
+from streamlit.testing.v1 import AppTest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import print_results
+from benchmarks.stubs import (
+    FakeLLM,
+    FakeNewsSession,
+    FakeYFinance,
+    StubEncoder,
+    build_advice_index,
+    build_stock_index,
+    stubbed_app,
+)
+
+APP_SCRIPT = """
+import app
+app.main()
+"""
+TICKERS = ["AAPL", "MSFT", "NVDA", "GOOGL", "AMZN", "META", "TSLA", "JPM"]
+QUESTIONS = [
+    "How should I invest my savings?",
+    "Should I buy more bonds?",
+    "How much should I keep in gold?",
+]
+QUERIES = [
+    "profitable software and cloud companies with strong growth",
+    "dividend paying utilities with low volatility",
+    "semiconductor companies benefiting from data centers",
+]
+
+
+# Each step changes one widget and reruns the page, as a user interaction would
+def open_page(at, rng):
+    at.run()
+
+
+def research_ticker(at, rng):
+    at.text_input[0].input(rng.choice(TICKERS)).run()
+
+
+def research_period(at, rng):
+    at.selectbox[0].select("5y").run()
+
+
+def advisor_profile(at, rng):
+    at.number_input[1].set_value(8000)
+    at.number_input[2].set_value(5000).run()
+
+
+def advisor_question(at, rng):
+    at.text_input(key="user_input").input(rng.choice(QUESTIONS)).run()
+
+
+def analysis_query(at, rng):
+    at.text_area[0].input(rng.choice(QUERIES))
+    at.button(key="find_stocks_button").click().run()
+
+
+SCENARIOS = {
+    "company_research": [open_page, research_ticker, research_period],
+    "advisor": [open_page, advisor_profile, advisor_question],
+    "stock_analysis": [open_page, analysis_query],
+}
+
+
+class RSSSampler:
+    """
+    Samples the resident set size in the background and keeps the peak
+    """
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            # Without /proc only the lifetime peak is available (kilobytes on Linux)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+        return False
+
+
+def run_session(steps, seed, timeout):
+    """
+    Runs one simulated user through the steps; returns (step latencies, errors)
+    """
+    rng = random.Random(seed)
+    at = AppTest.from_string(APP_SCRIPT, default_timeout=timeout)
+    latencies, errors = [], 0
+    for step in steps:
+        start = time.perf_counter()
+        try:
+            step(at, rng)
+            if at.exception:
+                print(f"Error in {step.__name__}: {at.exception[0].message}")
+                errors += 1
+        except Exception as e:
+            print(f"Error in {step.__name__}: {str(e)}")
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_scenario(name, users, sessions, timeout=120):
+    """
+    Runs sessions simulated users through a scenario, users at a time
+    """
+    steps = SCENARIOS[name]
+    with RSSSampler() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            results = list(executor.map(lambda seed: run_session(steps, seed, timeout), range(sessions)))
+        elapsed = time.perf_counter() - start
+    latencies = np.array([latency for session, _ in results for latency in session]) * 1e3
+    return {
+        "users": users,
+        "sessions": sessions,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drives concurrent simulated sessions through the app against local stubs")
+    parser.add_argument("--users", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--sessions", type=int, default=24, help="sessions per scenario")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="default: all")
+    parser.add_argument("--index-size", type=int, default=5_000, help="vectors in each stub index")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=400, help="completion tokens per second")
+    parser.add_argument("--yfinance-latency", type=float, default=0.05)
+    parser.add_argument("--news-latency", type=float, default=0.1)
+    parser.add_argument("--index-latency", type=float, default=0.03)
+    parser.add_argument("--encoder-load", type=float, default=0.0, help="seconds to simulate each SentenceTransformer load")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+    streamlit.logger.set_log_level("error")
+
+    StubEncoder.load_seconds = args.encoder_load
+    stubs = dict(
+        stock_index=build_stock_index(args.index_size, latency=args.index_latency),
+        advice_index=build_advice_index(args.index_size, latency=args.index_latency),
+        llm=FakeLLM(latency=args.llm_latency, token_rate=args.token_rate),
+        yfinance=FakeYFinance(latency=args.yfinance_latency),
+        news_session=FakeNewsSession(latency=args.news_latency),
+    )
+    def upstream_calls():
+        return {
+            "llm_calls": stubs["llm"].calls,
+            "index_queries": stubs["stock_index"].calls["query"] + stubs["advice_index"].calls["query"],
+            "news_calls": stubs["news_session"].calls,
+            "encoder_loads": StubEncoder.loads,
+        }
+
+    results = {}
+    with stubbed_app(**stubs) as app:
+        # One untimed session per scenario first, so lazy imports happen before threads race on them
+        for name in args.scenario or list(SCENARIOS):
+            run_session(SCENARIOS[name], -1, 120)
+        for name in args.scenario or list(SCENARIOS):
+            # Every scenario starts from cold Streamlit caches
+            app.st.cache_data.clear()
+            app.st.cache_resource.clear()
+            before = upstream_calls()
+            results[name] = run_scenario(name, args.users, args.sessions)
+            results[name]["upstream"] = {key: value - before[key] for key, value in upstream_calls().items()}
+
+    rows = []
+    for name, r in results.items():
+        rows.append(
+            (
+                name,
+                f"{r['throughput_rps']:.1f} req/s, p50 {r['p50_ms']:.0f} ms, p95 {r['p95_ms']:.0f} ms, "
+                f"p99 {r['p99_ms']:.0f} ms, peak RSS {r['peak_rss_mb']:.0f} MB, {r['errors']} errors",
+            )
+        )
+        rows.append((f"  {name} upstream", ", ".join(f"{k} {v}" for k, v in r["upstream"].items())))
+    print_results(
+        f"Load test: {args.users} concurrent users, {args.sessions} sessions per scenario",
+        rows,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+import pandas as pd
+import streamlit.logger
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import sample_call, print_results
+from benchmarks.stubs import (
+    FakeLLM,
+    FakeNewsSession,
+    FakeYFinance,
+    LocalVectorIndex,
+    build_advice_index,
+    build_stock_index,
+    stubbed_app,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+FINANCE_DATA = os.path.join(ROOT, "data", "Finance_data.csv")
+
+# Sizes per case: vectors in the index, CSV rows, daily bars period or Q&A pairs
+SIZES = {
+    "perform_rag": [1_000, 10_000],
+    "perform_chat_rag": [1_000, 10_000],
+    "load_dataset_to_pinecone": [40, 400, 2_000],
+    "calculate_kpis": ["1y", "5y", "max"],
+    "export_to_pdf": [1, 10, 50],
+}
+QUICK_SIZES = {
+    "perform_rag": [200],
+    "perform_chat_rag": [200],
+    "load_dataset_to_pinecone": [40],
+    "calculate_kpis": ["1y"],
+    "export_to_pdf": [2],
+}
+
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+FILTERS = {"Market Cap": 10**8, "Volume": 10**4, "Recommendation Keys": ["strong buy", "buy", "hold"]}
+QUERY = "profitable software and cloud companies with strong growth and dividend"
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        )
+        return commit, dirty
+    except Exception:
+        return "unknown", False
+
+
+def finance_csv(rows, directory):
+    """
+    Writes a copy of Finance_data.csv repeated to the given number of rows
+    """
+    data = pd.read_csv(FINANCE_DATA)
+    data = pd.concat([data] * (rows // len(data) + 1), ignore_index=True).iloc[:rows]
+    path = os.path.join(directory, f"finance_{rows}.csv")
+    data.to_csv(path, index=False)
+    return path
+
+
+def setup_case(app, name, size, workdir, llm):
+    """
+    Returns (callable, args) for one case, with all data built outside the timing
+    """
+    if name == "perform_rag":
+        app.pinecone_index = build_stock_index(size)
+        return app.perform_rag, (QUERY, FILTERS)
+    if name == "perform_chat_rag":
+        import utils.ai
+        return utils.ai.perform_chat_rag, ("How should I invest my savings?", PROFILE, build_advice_index(size))
+    if name == "load_dataset_to_pinecone":
+        import utils.db
+        path = finance_csv(size, workdir)
+
+        def ingest():
+            utils.db.load_dataset_to_pinecone(LocalVectorIndex(1024), path)
+        return ingest, ()
+    if name == "calculate_kpis":
+        ticker = app.yf.Ticker("AAPL")
+        return app.calculate_kpis, (ticker.history(period=size), ticker.info)
+    if name == "export_to_pdf":
+        from utils.report import export_to_pdf
+        history = [
+            (f"Question {i}: how should I rebalance?", llm.create("stub", [{"role": "user", "content": str(i)}]).choices[0].message.content)
+            for i in range(size)
+        ]
+        return export_to_pdf, (PROFILE, history)
+    raise ValueError(f"Unknown case {name}")
+
+
+def run_suite(sizes=SIZES, repeat=5, llm_latency=0.0, token_rate=None, cases=None):
+    """
+    Times every case at every size against the stubs and returns the results document
+    """
+    llm = FakeLLM(latency=llm_latency, token_rate=token_rate)
+    commit, dirty = git_commit()
+    document = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"repeat": repeat, "llm_latency": llm_latency, "token_rate": token_rate},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir, stubbed_app(llm=llm, yfinance=FakeYFinance(), news_session=FakeNewsSession()) as app:
+        for name, case_sizes in sizes.items():
+            if cases and name not in cases:
+                continue
+            document["results"][name] = {}
+            for size in case_sizes:
+                fn, args = setup_case(app, name, size, workdir, llm)
+                samples, _ = sample_call(fn, *args, repeat=repeat)
+                # The first run pays for cold caches (correlations, news, fonts), so keep it apart
+                document["results"][name][str(size)] = {
+                    "first_ms": round(samples[0] * 1e3, 3),
+                    "best_ms": round(min(samples) * 1e3, 3),
+                    "median_ms": round(statistics.median(samples) * 1e3, 3),
+                    "runs": repeat,
+                }
+    return document
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the RAG request path and its neighbours against local stubs")
+    parser.add_argument("--quick", action="store_true", help="one small size per case")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=None, help="completion tokens per second")
+    parser.add_argument("--case", action="append", dest="cases", help="only run this case (repeatable)")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+    # The app runs without a Streamlit server here, which Streamlit warns about on every cached call
+    streamlit.logger.set_log_level("error")
+
+    document = run_suite(
+        QUICK_SIZES if args.quick else SIZES, args.repeat, args.llm_latency, args.token_rate, args.cases
+    )
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{document['commit']}{'-dirty' if document['dirty'] else ''}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+
+    rows = [
+        (f"{name} [{size}]", f"first {r['first_ms']:.2f} ms, best {r['best_ms']:.2f} ms, median {r['median_ms']:.2f} ms")
+        for name, by_size in document["results"].items()
+        for size, r in by_size.items()
+    ]
+    print_results(f"RAG suite at {document['commit']}", rows)
+    print(f"\nSaved to {output}")
+    return document
+
+
+if __name__ == "__main__":
+    main()
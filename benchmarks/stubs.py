@@ -0,0 +1,622 @@
+import importlib
+import json
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+import numpy as np
+import pandas as pd
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.docstore import DocStore
+from utils.news import NewsClient
+
+# Embedding sizes of the models the app loads; anything else gets DEFAULT_DIMENSION
+MODEL_DIMENSIONS = {
+    "sentence-transformers/all-mpnet-base-v2": 768,
+    "BAAI/bge-large-en-v1.5": 1024,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+}
+DEFAULT_DIMENSION = 768
+PERIOD_BARS = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520, "max": 5040}
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Energy", "Consumer Cyclical", "Industrials", "Utilities"]
+RECOMMENDATIONS = ["strong buy", "buy", "hold", "sell", "strong sell"]
+WORDS = (
+    "growth revenue cloud software chips energy oil gas solar bank lending insurance drugs biotech "
+    "retail stores cars electric batteries aerospace defense utilities power water dividend value "
+    "margin platform subscription devices semiconductors pharmacy hospitals payments mining steel"
+).split()
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _seed(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class StubEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer: hashed bag-of-words embeddings,
+    so texts sharing words are close without loading a model
+    """
+
+    # Seconds each construction sleeps, to simulate loading model weights, and how often that happened
+    load_seconds = 0.0
+    loads = 0
+    _loads_lock = threading.Lock()
+
+    def __init__(self, model_name=None, dimension=None, **kwargs):
+        self.model_name = model_name
+        self.dimension = dimension or MODEL_DIMENSIONS.get(model_name, DEFAULT_DIMENSION)
+        with StubEncoder._loads_lock:
+            StubEncoder.loads += 1
+        if self.load_seconds:
+            time.sleep(self.load_seconds)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _encode_one(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in TOKEN_RE.findall(text.lower()):
+            h = _seed(token)
+            vector[h % self.dimension] += 1.0 if h & 1 << 31 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.stack([self._encode_one(text) for text in sentences]) if sentences else np.zeros((0, self.dimension), np.float32)
+
+
+def build_tiny_generator(layers=2, width=64, seed=0, **kwargs):
+    """
+    LocalGenerator over a randomly initialized GPT-2 a few layers deep with a word
+    level tokenizer of WORDS, so generation runs offline in milliseconds; its text is
+    noise, but batching, streaming and budgets behave as with a real model
+    """
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+    from utils.local_llm import LocalGenerator
+
+    words = ["[PAD]", "[EOS]", "[UNK]", "system", "user", "assistant", ":", ".", ",", "?"] + WORDS
+    tokenizer = Tokenizer(models.WordLevel({word: i for i, word in enumerate(words)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="[PAD]", eos_token="[EOS]", unk_token="[UNK]")
+    torch.manual_seed(seed)
+    config = GPT2Config(
+        vocab_size=len(words), n_positions=2048, n_embd=width, n_layer=layers, n_head=2,
+        bos_token_id=1, eos_token_id=1, pad_token_id=0, initializer_range=0.5,
+    )
+    return LocalGenerator(GPT2LMHeadModel(config), tokenizer, **kwargs)
+
+
+def matches_filter(metadata, condition):
+    """
+    Evaluates a Pinecone metadata filter against one record
+    """
+    for key, expected in condition.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in expected):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, c) for c in expected):
+                return False
+        else:
+            value = metadata.get(key)
+            operators = expected if isinstance(expected, dict) else {"$eq": expected}
+            for op, operand in operators.items():
+                if value is None and op not in ("$ne", "$nin"):
+                    return False
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+    return True
+
+
+class LocalVectorIndex:
+    """
+    In-memory stand-in for a Pinecone index: exact cosine search with metadata
+    filters and namespaces, plus an optional fixed latency per call. Query and fetch
+    responses are sized as JSON in response_bytes and, with bandwidth set (bytes per
+    second), take as long as that many bytes would to download.
+    """
+
+    def __init__(self, dimension=DEFAULT_DIMENSION, latency=0.0, bandwidth=None):
+        self.dimension = dimension
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.namespaces = {}
+        self.calls = {"upsert": 0, "query": 0, "fetch": 0, "delete": 0}
+        self.response_bytes = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, response):
+        size = len(json.dumps(response))
+        with self._lock:
+            self.response_bytes += size
+        if self.bandwidth:
+            time.sleep(size / self.bandwidth)
+        return response
+
+    def _namespace(self, namespace):
+        return self.namespaces.setdefault(namespace or "", {"ids": {}, "vectors": [], "metadata": [], "matrix": None})
+
+    def upsert(self, vectors, namespace=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls["upsert"] += 1
+            space = self._namespace(namespace)
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    vector_id, values, metadata = vector["id"], vector["values"], vector.get("metadata", {})
+                else:
+                    vector_id, values, metadata = (tuple(vector) + ({},))[:3]
+                values = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(values)
+                values = values / norm if norm else values
+                if vector_id in space["ids"]:
+                    row = space["ids"][vector_id]
+                    space["vectors"][row] = values
+                    space["metadata"][row] = metadata
+                else:
+                    space["ids"][vector_id] = len(space["vectors"])
+                    space["vectors"].append(values)
+                    space["metadata"].append(metadata)
+            space["matrix"] = None
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k=10, filter=None, include_metadata=False, include_values=False, namespace=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls["query"] += 1
+            space = self._namespace(namespace)
+            if space["matrix"] is None:
+                space["matrix"] = np.stack(space["vectors"]) if space["vectors"] else np.zeros((0, self.dimension), np.float32)
+            matrix, metadata = space["matrix"], space["metadata"]
+            ids = list(space["ids"])
+
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        if filter:
+            allowed = np.fromiter((matches_filter(m, filter) for m in metadata), dtype=bool, count=len(metadata))
+            scores = np.where(allowed, scores, -np.inf)
+        k = min(top_k, int(np.isfinite(scores).sum()))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.zeros(0, dtype=int)
+        top = top[np.argsort(-scores[top])]
+        matches = []
+        for row in top:
+            match = {"id": ids[row], "score": float(scores[row])}
+            if include_metadata:
+                match["metadata"] = metadata[row]
+            if include_values:
+                match["values"] = matrix[row].tolist()
+            matches.append(match)
+        return self._respond({"matches": matches, "namespace": namespace or ""})
+
+    def fetch(self, ids, namespace=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls["fetch"] += 1
+            space = self._namespace(namespace)
+            vectors = {
+                vector_id: {
+                    "id": vector_id,
+                    "values": space["vectors"][space["ids"][vector_id]].tolist(),
+                    "metadata": space["metadata"][space["ids"][vector_id]],
+                }
+                for vector_id in ids
+                if vector_id in space["ids"]
+            }
+        return self._respond({"vectors": vectors, "namespace": namespace or ""})
+
+    def list(self, prefix=None, limit=100, namespace=None, **kwargs):
+        """
+        Yields pages of ids, like the serverless index's list
+        """
+        with self._lock:
+            ids = [i for i in self._namespace(namespace)["ids"] if not prefix or i.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start : start + limit]
+
+    def delete(self, ids, namespace=None, **kwargs):
+        with self._lock:
+            self.calls["delete"] += 1
+            space = self._namespace(namespace)
+            keep = [(i, row) for i, row in space["ids"].items() if i not in set(ids)]
+            space["vectors"] = [space["vectors"][row] for _, row in keep]
+            space["metadata"] = [space["metadata"][row] for _, row in keep]
+            space["ids"] = {i: new_row for new_row, (i, _) in enumerate(keep)}
+            space["matrix"] = None
+        return {}
+
+    def describe_index_stats(self):
+        return {
+            "dimension": self.dimension,
+            "namespaces": {name: {"vector_count": len(space["ids"])} for name, space in self.namespaces.items()},
+            "total_vector_count": sum(len(space["ids"]) for space in self.namespaces.values()),
+        }
+
+
+class FakeLLM:
+    """
+    OpenAI-compatible chat client whose completions take latency seconds to the first
+    token and then stream at token_rate tokens per second (instant when None)
+    """
+
+    def __init__(self, latency=0.0, token_rate=None, completion_tokens=200, failing_models=()):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.completion_tokens = completion_tokens
+        self.failing_models = set(failing_models)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _tokens(self, messages):
+        seed = _seed("".join(str(m.get("content", "")) for m in messages))
+        rng = np.random.default_rng(seed)
+        return list(rng.choice(WORDS, self.completion_tokens))
+
+    def create(self, model, messages, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if model in self.failing_models:
+            raise RuntimeError(f"Model {model} is unavailable")
+        tokens = self._tokens(messages)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        if stream:
+            return self._stream(tokens)
+        time.sleep(self.latency + (len(tokens) / self.token_rate if self.token_rate else 0))
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=" ".join(tokens)), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(tokens)),
+        )
+
+    def _stream(self, tokens):
+        time.sleep(self.latency)
+        for i, token in enumerate(tokens):
+            if self.token_rate:
+                time.sleep(1 / self.token_rate)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token if i == 0 else " " + token))])
+
+
+class FakeTicker:
+    """
+    yfinance Ticker with a deterministic random walk per symbol
+    """
+
+    def __init__(self, symbol, latency=0.0):
+        self.ticker = symbol.upper()
+        self.latency = latency
+        rng = np.random.default_rng(_seed(self.ticker))
+        self.info = {
+            "shortName": f"{self.ticker} Inc.",
+            "longBusinessSummary": f"{self.ticker} " + " ".join(rng.choice(WORDS, 60)),
+            "sector": SECTORS[_seed(self.ticker) % len(SECTORS)],
+            "returnOnEquity": float(rng.uniform(-0.1, 0.4)),
+            "debtToEquity": float(rng.uniform(0, 200)),
+            "trailingPE": float(rng.uniform(5, 60)),
+            "marketCap": int(rng.integers(10**8, 10**12)),
+        }
+
+    def history(self, period="1y", **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        bars = PERIOD_BARS.get(period, 252)
+        rng = np.random.default_rng(_seed(self.ticker))
+        index = pd.bdate_range(end="2024-12-31", periods=bars)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, bars)))
+        spread = close * rng.uniform(0, 0.02, bars)
+        return pd.DataFrame(
+            {
+                "Open": close + rng.normal(0, 0.5, bars),
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Volume": rng.integers(10**6, 5 * 10**7, bars),
+            },
+            index=index,
+        )
+
+
+class FakeYFinance:
+    """
+    Stands in for the yfinance module: Ticker, Tickers and download
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def Ticker(self, symbol):
+        return FakeTicker(symbol, self.latency)
+
+    def Tickers(self, symbols):
+        return SimpleNamespace(tickers={s: FakeTicker(s, self.latency) for s in symbols.split()})
+
+    def download(self, tickers, period="1y", **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        closes = pd.concat({t: FakeTicker(t).history(period)["Close"] for t in tickers}, axis=1)
+        return pd.concat({"Close": closes}, axis=1)
+
+
+class FakeNewsSession:
+    """
+    requests.Session stand-in answering NewsAPI queries with deterministic articles
+    """
+
+    def __init__(self, latency=0.0, articles=20):
+        self.latency = latency
+        self.articles = articles
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        query = (params or {}).get("q", "")
+        rng = np.random.default_rng(_seed(query))
+        articles = [
+            {
+                "source": {"id": None, "name": "Stub Wire"},
+                "title": f"{query} " + " ".join(rng.choice(WORDS + ["surges", "falls", "beats", "misses"], 8)),
+                "description": " ".join(rng.choice(WORDS, 25)),
+                "url": f"https://news.example/{query}/{i}",
+                "publishedAt": "2024-12-31T00:00:00Z",
+                "content": " ".join(rng.choice(WORDS, 200)),
+            }
+            for i in range(self.articles)
+        ]
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps({"status": "ok", "totalResults": len(articles), "articles": articles}).encode()
+        return response
+
+    def close(self):
+        pass
+
+
+class RESPServer(socketserver.ThreadingTCPServer):
+    """
+    In-process stand-in for Redis speaking enough RESP for the cache backend: PING,
+    GET, SET (EX/PX), DEL, INCR, EXISTS, FLUSHDB, SELECT and AUTH. Serve it with
+    serve_forever() in a thread; the address is server_address.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), RESPHandler)
+        self.latency = latency
+        self.data = {}
+        self.commands = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def run(self, command, args):
+        with self.lock:
+            self.commands += 1
+            if command == "PING":
+                return "+PONG"
+            if command in ("SELECT", "AUTH"):
+                return "+OK"
+            if command == "GET":
+                entry = self.lookup(args[0])
+                return entry[0] if entry else None
+            if command == "SET":
+                expires = None
+                options = [a.decode().upper() for a in args[2:]]
+                if "PX" in options:
+                    expires = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+                elif "EX" in options:
+                    expires = time.monotonic() + int(options[options.index("EX") + 1])
+                self.data[args[0]] = (args[1], expires)
+                return "+OK"
+            if command == "DEL":
+                return sum(self.data.pop(key, None) is not None for key in args)
+            if command == "EXISTS":
+                return sum(self.lookup(key) is not None for key in args)
+            if command == "INCR":
+                entry = self.lookup(args[0])
+                value = int(entry[0]) + 1 if entry else 1
+                self.data[args[0]] = (str(value).encode(), entry[1] if entry else None)
+                return value
+            if command == "FLUSHDB":
+                self.data.clear()
+                return "+OK"
+        return f"-ERR unknown command '{command}'"
+
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            size = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            try:
+                args = self.read_command()
+            except (ConnectionError, ValueError):
+                return
+            if not args:
+                return
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            reply = self.server.run(args[0].decode().upper(), args[1:])
+            if reply is None:
+                out = b"$-1\r\n"
+            elif isinstance(reply, int):
+                out = f":{reply}\r\n".encode()
+            elif isinstance(reply, bytes):
+                out = f"${len(reply)}\r\n".encode() + reply + b"\r\n"
+            else:
+                out = f"{reply}\r\n".encode()
+            self.wfile.write(out)
+
+
+def stock_text(ticker, rng):
+    sector = SECTORS[_seed(ticker) % len(SECTORS)]
+    return sector, f"{ticker} is a {sector.lower()} company focused on " + " ".join(rng.choice(WORDS, 80))
+
+
+def build_stock_index(size, encoder=None, namespace="stock-description_detailed", latency=0.0, bandwidth=None):
+    """
+    Fills a local index with size synthetic stocks carrying the metadata perform_rag reads
+    """
+    encoder = encoder or StubEncoder("sentence-transformers/all-mpnet-base-v2")
+    index = LocalVectorIndex(encoder.dimension, latency, bandwidth)
+    rng = np.random.default_rng(0)
+    texts, records = [], []
+    for i in range(size):
+        ticker = f"S{i:05d}"
+        sector, text = stock_text(ticker, rng)
+        price = float(rng.uniform(5, 500))
+        texts.append(text)
+        records.append(
+            {
+                "Ticker": ticker,
+                "Name": f"{ticker} Corp",
+                "Business Summary": text,
+                "Website": f"https://{ticker.lower()}.example",
+                "Revenue Growth": float(rng.uniform(-0.2, 0.5)),
+                "Gross Margins": float(rng.uniform(0, 0.8)),
+                "Target Mean Price": price * float(rng.uniform(0.8, 1.4)),
+                "Current Price": price,
+                "52 Week Change": float(rng.uniform(-0.5, 1.0)),
+                "Sector": sector,
+                "Market Cap": int(rng.integers(10**7, 10**12)),
+                "Volume": int(rng.integers(10**3, 10**8)),
+                "Recommendation Key": RECOMMENDATIONS[int(rng.integers(0, 3))],
+                "text": text,
+            }
+        )
+    embeddings = encoder.encode(texts)
+    for start in range(0, size, 1000):
+        index.upsert(
+            [(r["Ticker"], e, r) for r, e in zip(records[start : start + 1000], embeddings[start : start + 1000])],
+            namespace=namespace,
+        )
+    return index
+
+
+def build_advice_index(size, encoder=None, latency=0.0):
+    """
+    Fills a local index with size synthetic investor profiles for the advisor RAG
+    """
+    encoder = encoder or StubEncoder("sentence-transformers/all-mpnet-base-v2")
+    index = LocalVectorIndex(encoder.dimension, latency)
+    rng = np.random.default_rng(1)
+    texts = [
+        f"Profile: age {int(rng.integers(20, 65))}, prefers " + " ".join(rng.choice(WORDS, 40))
+        for _ in range(size)
+    ]
+    embeddings = encoder.encode(texts)
+    for start in range(0, size, 1000):
+        index.upsert([(str(i), embeddings[i], {"text": texts[i]}) for i in range(start, min(start + 1000, size))])
+    return index
+
+
+@contextmanager
+def stubbed_app(stock_index=None, advice_index=None, llm=None, yfinance=None, news_session=None, doc_store=None):
+    """
+    Imports app.py with every external service replaced by the local stubs above, and
+    restores everything on exit. The document store starts empty in memory unless
+    given, and fills from the stock index on first use.
+    """
+    stock_index = stock_index or build_stock_index(100)
+    advice_index = advice_index or build_advice_index(100)
+    llm = llm or FakeLLM()
+    yfinance = yfinance or FakeYFinance()
+    news_session = news_session or FakeNewsSession()
+    doc_store = doc_store or DocStore(":memory:")
+
+    news_client = NewsClient("stub")
+    news_client.session = news_session
+    with ExitStack() as stack:
+        # The stubs don't throttle, so the provider rate limits are off, and the shared
+        # cache is off so every call measures the work rather than a cache hit;
+        # conversations stay in memory and there's no background warm-up
+        stack.enter_context(
+            patch.dict(
+                os.environ,
+                {
+                    "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "stub"),
+                    "RATE_LIMITS": "off",
+                    "CACHE_URL": "none://",
+                    "CONVERSATIONS_PATH": ":memory:",
+                    "WARMUP": "off",
+                },
+            )
+        )
+        stack.enter_context(patch("utils.db.initialize_pinecone", return_value=advice_index))
+        stack.enter_context(patch("pinecone.Pinecone", return_value=Mock(Index=Mock(return_value=stock_index))))
+        sys.modules.pop("app", None)
+        app = importlib.import_module("app")
+        stack.callback(sys.modules.pop, "app", None)
+
+        import utils.ai
+        import utils.correlation
+        import utils.db
+
+        for module, name, value in [
+            (app, "client", llm),
+            (app, "yf", yfinance),
+            (app, "SentenceTransformer", StubEncoder),
+            (app, "get_news_client", lambda: news_client),
+            (app, "get_doc_store", lambda: doc_store),
+            (app, "load_correlation_universe", lambda: None),
+            (utils.ai, "client", llm),
+            (utils.ai, "SentenceTransformer", StubEncoder),
+            (utils.db, "SentenceTransformer", StubEncoder),
+            (utils.correlation, "yf", yfinance),
+        ]:
+            stack.enter_context(patch.object(module, name, value))
+        stack.callback(news_client.close)
+        yield app
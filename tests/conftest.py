@@ -2,6 +2,15 @@ import pytest
 import os
 from dotenv import load_dotenv
 
+# Tests talk to local stubs, so the provider rate limits would only slow them down,
+# and a shared cache would carry results from one test into the next
+os.environ.setdefault("RATE_LIMITS", "off")
+os.environ.setdefault("CACHE_URL", "none://")
+# Advisor conversations are kept in memory rather than in data/
+os.environ.setdefault("CONVERSATIONS_PATH", ":memory:")
+# Tests warm up explicitly; a background warm-up would do work they count
+os.environ.setdefault("WARMUP", "off")
+
 @pytest.fixture(autouse=True)
 def env_setup():
     """Automatically load environment variables for all tests"""
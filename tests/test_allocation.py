@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.allocation import (
+    ASSET_CLASSES,
+    MIN_BANDS,
+    MAX_BANDS,
+    compute_allocation,
+    compute_allocations,
+    format_allocation,
+)
+
+# ---- Fixtures ----
+@pytest.fixture
+def sample_user_profile():
+    """Sample user profile for testing"""
+    return {
+        "gender": "Male",
+        "age": 30,
+        "income": 8000,
+        "expenditure": 5000,
+        "savings": 50000,
+        "objective": "Growth",
+        "duration": 10
+    }
+
+@pytest.fixture
+def random_profiles():
+    """Large random batch of profiles, including edge values outside the usual ranges"""
+    rng = np.random.default_rng(42)
+    n = 50000
+    incomes = rng.uniform(0, 100000, n)
+    return (
+        rng.uniform(0, 120, n),
+        rng.uniform(0, 60, n),
+        incomes,
+        rng.uniform(0, 120000, n),
+    )
+
+# ---- Test Cases ----
+
+# 1. Test Allocation Properties
+def test_allocations_total_100(random_profiles):
+    """Every allocation must total exactly 100%"""
+    allocations = compute_allocations(*random_profiles)
+    assert allocations.shape == (len(random_profiles[0]), len(ASSET_CLASSES))
+    assert (allocations.sum(axis=1) == 100).all()
+
+def test_allocations_within_bands(random_profiles):
+    """Every asset class must stay within its min/max band"""
+    allocations = compute_allocations(*random_profiles)
+    assert (allocations >= MIN_BANDS).all()
+    assert (allocations <= MAX_BANDS).all()
+
+def test_equity_capped_by_age(random_profiles):
+    """Equity exposure can never exceed 100 - age"""
+    ages = random_profiles[0]
+    allocations = compute_allocations(*random_profiles)
+    assert (allocations[:, 0] <= np.maximum(100 - ages, 0)).all()
+
+# 2. Test Allocation Rules
+def test_conservative_when_low_surplus(sample_user_profile):
+    """Surplus below 20% of income shifts weight out of equity and mutual funds"""
+    low_surplus = dict(sample_user_profile, expenditure=7000)
+    normal = compute_allocation(sample_user_profile)
+    conservative = compute_allocation(low_surplus)
+    assert conservative["Equity/Stocks"] < normal["Equity/Stocks"]
+    assert conservative["Government Bonds"] > normal["Government Bonds"]
+
+def test_longer_horizon_more_equity(sample_user_profile):
+    """Long horizons hold more equity than short horizons"""
+    short = compute_allocation(dict(sample_user_profile, duration=2))
+    long = compute_allocation(dict(sample_user_profile, duration=25))
+    assert long["Equity/Stocks"] > short["Equity/Stocks"]
+
+def test_single_matches_batch(sample_user_profile):
+    """Single profile allocation matches the vectorized batch result"""
+    single = compute_allocation(sample_user_profile)
+    batch = compute_allocations([30, 30], [10, 10], [8000, 8000], [5000, 5000])
+    assert list(single.values()) == batch[0].tolist() == batch[1].tolist()
+
+def test_format_allocation(sample_user_profile):
+    """Formatted allocation lists every asset class for the prompt"""
+    text = format_allocation(sample_user_profile, compute_allocation(sample_user_profile))
+    for asset in ASSET_CLASSES:
+        assert asset in text
+    assert "Medium" in text
@@ -0,0 +1,116 @@
+import pytest
+import importlib
+import json
+import time
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.testclient import TestClient
+from benchmarks.stubs import FakeLLM, stubbed_app
+
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+
+# ---- Fixtures ----
+@pytest.fixture
+def advisor():
+    with stubbed_app(llm=FakeLLM(completion_tokens=20)) as app:
+        app.st.cache_data.clear()
+        yield app
+        app.st.cache_data.clear()
+
+
+@pytest.fixture
+def client(advisor):
+    api = importlib.import_module("api")
+    with TestClient(api.create_api(advisor, timeout=5)) as client:
+        yield client
+
+
+def read_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+# ---- Test Cases ----
+
+# 1. Test JSON Endpoints
+def test_advisor(client, advisor):
+    response = client.post("/advisor", json={"query": "How should I invest?", "profile": PROFILE})
+    assert response.status_code == 200
+    assert response.json()["answer"] == advisor.perform_chat_rag("How should I invest?", PROFILE, advisor.pinecone_index)
+
+def test_stock_search(client, advisor):
+    filters = {"Market Cap": 10**8, "Volume": 10**4, "Recommendation Keys": ["buy", "hold"]}
+    response = client.post("/stocks/search", json={"query": "cloud software", "filters": filters})
+    matches, analysis = advisor.perform_rag("cloud software", filters)
+    assert response.json() == {"matches": matches, "analysis": analysis}
+
+def test_company_and_news(client):
+    response = client.get("/companies/aapl", params={"period": "5y"})
+    body = response.json()
+    assert response.status_code == 200 and body["ticker"] == "AAPL"
+    assert body["name"] == "AAPL Inc." and body["summary"]
+    assert body["kpis"]["yearly_high"] >= body["kpis"]["latest_price"] >= body["kpis"]["yearly_low"]
+    articles = client.get("/companies/AAPL/news").json()["articles"]
+    assert articles and "title" in articles[0]
+
+def test_company_with_infinite_ratio(client, advisor, monkeypatch):
+    ticker = advisor.yf.Ticker("AAPL")
+    ticker.info["trailingPE"] = "Infinity"
+    history = ticker.history("1y")
+    history.loc[history.index[-1], "Close"] = float("nan")
+    monkeypatch.setattr(ticker, "history", lambda period="1y", **kwargs: history)
+    monkeypatch.setattr(advisor.yf, "Ticker", lambda symbol: ticker)
+    response = client.get("/companies/AAPL")
+    assert response.status_code == 200
+    assert response.json()["kpis"]["pe_ratio"] is None and response.json()["kpis"]["latest_price"] is None
+
+def test_bad_requests(client):
+    assert client.post("/advisor", content=b"not json").status_code == 400
+    response = client.post("/advisor", json={"query": "q", "profile": {"age": 30}})
+    assert response.status_code == 400 and "gender" in response.json()["error"]
+    assert client.post("/stocks/search", json={"query": "q", "filters": {"Volume": 1}}).status_code == 400
+    assert client.get("/companies/AAPL", params={"period": "3d"}).status_code == 400
+
+# 2. Test Streaming
+def test_streamed_answers(client, advisor):
+    response = client.post("/advisor", json={"query": "How should I invest?", "profile": PROFILE, "stream": True})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = read_events(response)
+    assert events[-1] == ("done", {})
+    streamed = "".join(data["text"] for event, data in events if event == "token")
+    assert streamed == advisor.perform_chat_rag("How should I invest?", PROFILE, advisor.pinecone_index)
+
+    events = read_events(client.post("/stocks/search", json={"query": "oil gas", "stream": True}))
+    assert events[0][0] == "matches" and events[0][1] == advisor.perform_rag("oil gas", None)[0]
+    assert sum(event == "token" for event, _ in events) == 20
+
+def test_stream_falls_back_to_smaller_model(advisor, client):
+    advisor.client.failing_models.add("llama-3.1-70b-versatile")
+    events = read_events(client.post("/advisor", json={"query": "q", "profile": PROFILE, "stream": True}))
+    assert events[-1] == ("done", {}) and events[0][0] == "token"
+
+# 3. Test Timeouts
+def test_request_timeout(advisor):
+    api = importlib.import_module("api")
+    advisor.client.latency = 1.0
+    with TestClient(api.create_api(advisor, timeout=0.2)) as client:
+        start = time.perf_counter()
+        response = client.post("/advisor", json={"query": "slow", "profile": PROFILE})
+        assert response.status_code == 504
+        assert time.perf_counter() - start < 0.9
+        events = read_events(client.post("/advisor", json={"query": "slow", "profile": PROFILE, "stream": True}))
+        assert events[-1][0] == "error" and "timed out" in events[-1][1]["error"]
@@ -0,0 +1,236 @@
+import pytest
+from unittest.mock import Mock, patch
+import numpy as np
+import pandas as pd
+import importlib
+import dataclasses
+import os
+import sys
+from functools import partial
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.local_script_runner as local_script_runner
+import utils.utils as ut
+from utils.news import NewsClient
+
+APP_SCRIPT = """
+import app
+app.main()
+"""
+
+# ---- Fixtures ----
+class FakeTicker:
+    """Minimal yfinance Ticker with a year of daily bars"""
+    def __init__(self, ticker):
+        self.ticker = ticker.upper()
+        index = pd.date_range("2024-01-01", periods=252, freq="B")
+        close = pd.Series(np.linspace(100, 150, 252), index=index)
+        self.info = {
+            "shortName": f"{self.ticker} Inc.",
+            "longBusinessSummary": f"{self.ticker} makes things.",
+            "returnOnEquity": 0.2,
+            "debtToEquity": 0.5,
+            "trailingPE": 25,
+        }
+        self._history = pd.DataFrame(
+            {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000}
+        )
+
+    def history(self, period="1y"):
+        return self._history
+
+
+class FakeYFinance:
+    """Stands in for the yfinance module used by the app"""
+    def Ticker(self, ticker):
+        return FakeTicker(ticker)
+
+    def Tickers(self, tickers):
+        return Mock(tickers={t: FakeTicker(t) for t in tickers.split()})
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """Imports app.py with every external service replaced by local stubs"""
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    with patch("utils.db.initialize_pinecone"), patch("pinecone.Pinecone"):
+        sys.modules.pop("app", None)
+        app = importlib.import_module("app")
+
+    completion = Mock()
+    completion.choices = [Mock(message=Mock(content="Stub summary"))]
+    monkeypatch.setattr(app, "client", Mock(**{"chat.completions.create.return_value": completion}))
+    monkeypatch.setattr(app, "yf", FakeYFinance())
+    news_response = Mock(status_code=200, headers={})
+    news_response.json.return_value = {
+        "articles": [{"title": "Headline", "url": "https://example.com", "description": "Text", "publishedAt": "2024-01-01"}]
+    }
+    news_client = NewsClient("test")
+    news_client.session.get = Mock(return_value=news_response)
+    monkeypatch.setattr(app, "get_news_client", lambda: news_client)
+    monkeypatch.setattr(app, "perform_chat_rag", Mock(return_value="Stub advice"))
+    monkeypatch.setattr(app, "perform_rag", Mock(return_value=([], "Stub analysis")))
+    ut.RUN_COUNTS.clear()
+    yield app
+    app.st.cache_data.clear()
+    sys.modules.pop("app", None)
+
+
+@pytest.fixture
+def app_test(app_module):
+    """Runs the page once with an advisor profile that passes validation"""
+    at = AppTest.from_string(APP_SCRIPT, default_timeout=60)
+    at.run()
+    at.number_input[1].set_value(8000)
+    at.number_input[2].set_value(5000)
+    at.run()
+    return at
+
+def work_counts(app):
+    """Expensive work done so far: app counters plus upstream news calls"""
+    counts = ut.RUN_COUNTS.copy()
+    counts["news_fetch"] = app.get_news_client().stats["upstream_calls"]
+    return counts
+
+def in_fragment(at, panel):
+    """
+    Makes the next run rerun only the panel's fragment, as the browser does after
+    an interaction inside it. AppTest has no public way to do this (run() always
+    reruns the whole script), so this reaches into Streamlit internals of the
+    version pinned in requirements.txt, and skips the test when they have changed.
+    """
+    try:
+        fragment_ids = [
+            fragment_id
+            for fragment_id, fragment in at._fragment_storage._fragments.items()
+            if fragment.__closure__[fragment.__code__.co_freevars.index("non_optional_func")].cell_contents.__name__ == panel
+        ]
+    except (AttributeError, IndexError, TypeError, ValueError):
+        fragment_ids = []
+    if not fragment_ids or not hasattr(local_script_runner, "RerunData") or "fragment_id_queue" not in {
+        field.name for field in dataclasses.fields(RerunData)
+    }:
+        pytest.skip(f"Can't rerun only the {panel} fragment with this Streamlit's AppTest internals")
+    return patch.object(local_script_runner, "RerunData", partial(RerunData, fragment_id_queue=fragment_ids))
+
+# ---- Test Cases ----
+
+# 1. Test Initial Render
+def test_initial_render(app_test, app_module):
+    """Every panel renders and does its work once"""
+    assert not app_test.exception
+    counts = work_counts(app_module)
+    for panel in ["company_research", "advisor", "stock_analysis", "news"]:
+        assert counts[panel] >= 1
+    assert counts["summary"] == 1
+    assert counts["charts"] == 1
+    assert counts["news_fetch"] == 1
+    assert app_test.caption[-1].value == "News sentiment: neutral (+0.00)"
+
+# 2. Test Rerun Isolation
+def test_advisor_question_does_no_other_work(app_test, app_module):
+    """Asking the advisor neither re-summarizes, rebuilds charts nor re-fetches news"""
+    before = work_counts(app_module)
+    with in_fragment(app_test, "render_advisor"):
+        app_test.text_input(key="user_input").input("How should I invest?").run()
+    assert not app_test.exception
+    assert app_module.perform_chat_rag.call_count == 1
+    after = work_counts(app_module)
+    for work in ["summary", "charts", "news_fetch", "pdf", "company_research", "news", "stock_analysis"]:
+        assert after[work] == before[work]
+    assert after["advisor"] == before["advisor"] + 1
+
+def test_question_not_repeated_on_rerun(app_test, app_module):
+    """A question is answered once even when other widgets trigger reruns"""
+    app_test.text_input(key="user_input").input("How should I invest?").run()
+    app_test.number_input[3].set_value(1000).run()
+    assert app_module.perform_chat_rag.call_count == 1
+    conversation = app_test.query_params["conversation"]
+    assert app_module.get_conversation_store().count(conversation) == 1
+
+def test_stock_filters_do_no_other_work(app_test, app_module):
+    """Changing stock filters does no company research, news or report work"""
+    app_test.text_input(key="user_input").input("How should I invest?").run()
+    before = work_counts(app_module)
+    with in_fragment(app_test, "render_stock_analysis"):
+        app_test.number_input[5].set_value(50000).run()
+    assert not app_test.exception
+    after = work_counts(app_module)
+    for work in ["summary", "charts", "news_fetch", "pdf", "company_research", "news", "advisor"]:
+        assert after[work] == before[work]
+    assert after["stock_analysis"] == before["stock_analysis"] + 1
+
+def test_report_built_on_click_only(app_test, app_module, monkeypatch):
+    """The PDF is only generated on request and reused until the history changes"""
+    app_test.text_input(key="user_input").input("How should I invest?").run()
+    assert ut.RUN_COUNTS["pdf"] == 0
+    app_test.button(key="prepare_report").click().run()
+    assert ut.RUN_COUNTS["pdf"] == 1
+    assert len(app_test.get("download_button")) == 1
+    # Showing the ready report again doesn't read the history
+    store = app_module.get_conversation_store()
+    turns = Mock(wraps=store.turns)
+    monkeypatch.setattr(store, "turns", turns)
+    app_test.number_input[5].set_value(50000).run()
+    assert ut.RUN_COUNTS["pdf"] == 1
+    assert len(app_test.get("download_button")) == 1
+    assert turns.call_count == 0
+
+def test_ticker_change_updates_news(app_test, app_module):
+    """A new ticker is summarized and its news fetched exactly once"""
+    before = work_counts(app_module)
+    app_test.text_input[0].input("MSFT").run()
+    assert not app_test.exception
+    assert app_test.session_state["ticker"] == "MSFT"
+    after = work_counts(app_module)
+    assert after["summary"] == before["summary"] + 1
+    assert after["news_fetch"] == before["news_fetch"] + 1
+
+# 3. Test Stock Analysis Context
+def test_news_sentiment_context(app_module):
+    """News for the top matches is fetched once per ticker and added to the LLM context"""
+    signals = app_module.get_news_sentiment(["AAPL", "MSFT"])
+    assert set(signals) == {"AAPL", "MSFT"}
+    assert app_module.get_news_client().stats["upstream_calls"] == 2
+    matches = [{"text": "Apple", "sector": "Tech", "market_cap": 1, "volume": 1}]
+    context = app_module.augment_query_context("Q", matches, sentiment=app_module.describe_sentiment(signals))
+    assert "Recent news sentiment for MSFT is neutral" in context
+
+# 4. Test Debug Panel
+def test_debug_panel_waterfall(app_module):
+    """With ?debug=1 the page run is traced and the waterfall panel is shown"""
+    at = AppTest.from_string(APP_SCRIPT, default_timeout=60)
+    at.query_params["debug"] = "1"
+    at.run()
+    assert not at.exception
+    assert at.expander[-1].label.startswith("🔧 Debug")
+    trace = at.session_state["traces"][-1]
+    assert trace.name == "page"
+    stages = [s["stage"] for s in trace.waterfall()]
+    for stage in ["panel.company_research", "yfinance", "summarize", "panel.news", "news"]:
+        assert stage in stages
+    assert "finovai_stage_duration_seconds_count{stage=\"summarize\"}" in at.code[-1].value
+
+def test_no_traces_without_debug(app_test):
+    assert "traces" not in app_test.session_state
+
+def test_profile_query_param(app_module, monkeypatch, tmp_path):
+    """With ?profile=1 each panel run is profiled and saved"""
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    at = AppTest.from_string(APP_SCRIPT, default_timeout=60)
+    at.query_params["profile"] = "1"
+    at.run()
+    assert not at.exception
+    profiles = {p.name: p for p in at.session_state["profiles"]}
+    assert set(profiles) == {"company_research", "stock_analysis"}
+    assert any("render_company_research" in row["function"] for row in profiles["company_research"].functions)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(p.path)[: -len(".prof")] + ext for p in profiles.values() for ext in [".prof", ".txt"]
+    )
+
+def test_no_profiles_by_default(app_test):
+    assert "profiles" not in app_test.session_state
@@ -0,0 +1,104 @@
+import pytest
+import time
+import numpy as np
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FakeLLM, FakeYFinance, LocalVectorIndex, StubEncoder, build_stock_index
+from benchmarks.compare import compare_results
+from benchmarks.load import main as load_main
+from benchmarks.rag_suite import QUICK_SIZES, run_suite
+
+# ---- Fixtures ----
+@pytest.fixture
+def encoder():
+    return StubEncoder("sentence-transformers/all-mpnet-base-v2")
+
+# ---- Test Cases ----
+
+# 1. Test Stubs
+def test_stub_encoder(encoder):
+    """Embeddings are deterministic, normalized and closer for texts sharing words"""
+    a, b, c = encoder.encode(["cloud software growth", "cloud software margin", "oil gas mining"])
+    np.testing.assert_array_equal(a, encoder.encode("cloud software growth"))
+    assert a.shape == (768,)
+    assert np.linalg.norm(a) == pytest.approx(1)
+    assert a @ b > a @ c
+    assert StubEncoder("BAAI/bge-large-en-v1.5").encode("x").shape == (1024,)
+
+def test_local_index_matches_brute_force(encoder):
+    """Queries return the same top matches as a brute-force scan of the allowed records"""
+    index = build_stock_index(300, encoder)
+    query = encoder.encode("software cloud growth")
+    condition = {"$and": [{"Market Cap": {"$gte": 10**10}}, {"Recommendation Key": {"$in": ["buy"]}}]}
+    result = index.query(query, top_k=5, filter=condition, include_metadata=True, namespace="stock-description_detailed")
+    space = index.namespaces["stock-description_detailed"]
+    allowed = [
+        (float(vector @ query), metadata["Ticker"])
+        for vector, metadata in zip(space["vectors"], space["metadata"])
+        if metadata["Market Cap"] >= 10**10 and metadata["Recommendation Key"] == "buy"
+    ]
+    expected = [ticker for _, ticker in sorted(allowed, reverse=True)[:5]]
+    assert [m["metadata"]["Ticker"] for m in result["matches"]] == expected
+
+def test_local_index_upsert_overwrites():
+    index = LocalVectorIndex(2)
+    index.upsert([("a", [1, 0], {"v": 1})])
+    index.upsert([{"id": "a", "values": [0, 1], "metadata": {"v": 2}}])
+    match = index.query([0, 1], top_k=1, include_metadata=True)["matches"][0]
+    assert match["metadata"] == {"v": 2}
+    assert match["score"] == pytest.approx(1)
+    assert index.describe_index_stats()["total_vector_count"] == 1
+
+def test_fake_llm_latency():
+    """Completions take latency plus tokens / token_rate, and failing models raise"""
+    llm = FakeLLM(latency=0.05, token_rate=1000, completion_tokens=50, failing_models={"big"})
+    start = time.perf_counter()
+    response = llm.chat.completions.create(model="small", messages=[{"role": "user", "content": "hi"}])
+    assert time.perf_counter() - start >= 0.1
+    assert len(response.choices[0].message.content.split()) == 50
+    streamed = "".join(c.choices[0].delta.content for c in llm.create("small", [{"role": "user", "content": "hi"}], stream=True))
+    assert streamed == response.choices[0].message.content
+    with pytest.raises(RuntimeError):
+        llm.create("big", [])
+
+def test_fake_yfinance_download():
+    prices = FakeYFinance().download(["AAPL", "MSFT"], period="1y")["Close"]
+    assert list(prices.columns) == ["AAPL", "MSFT"]
+    assert len(prices) == 252
+
+# 2. Test Suite
+def test_quick_suite_runs():
+    """Every case produces timings at its quick size"""
+    document = run_suite(QUICK_SIZES, repeat=1)
+    assert set(document["results"]) == set(QUICK_SIZES)
+    for name, sizes in QUICK_SIZES.items():
+        result = document["results"][name][str(sizes[0])]
+        assert result["best_ms"] > 0
+        assert result["runs"] == 1
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"pdf": {"10": {"median_ms": 10.0}, "50": {"median_ms": 50.0}}, "old": {"1": {"median_ms": 1}}}}
+    candidate = {"results": {"pdf": {"10": {"median_ms": 15.0}, "50": {"median_ms": 40.0}}, "new": {"1": {"median_ms": 1}}}}
+    rows = compare_results(baseline, candidate, threshold=0.1)
+    assert [(name, size, status) for name, size, *_, status in rows] == [
+        ("pdf", "10", "regression"),
+        ("pdf", "50", "improvement"),
+    ]
+
+# 3. Test Load Harness
+def test_load_harness_reports_percentiles():
+    """Concurrent sessions complete and report latency, memory and upstream calls"""
+    results = load_main(
+        ["--users", "2", "--sessions", "2", "--scenario", "company_research", "--index-size", "100",
+         "--llm-latency", "0", "--yfinance-latency", "0", "--news-latency", "0", "--index-latency", "0"]
+    )
+    result = results["company_research"]
+    assert result["requests"] == 2 * 3
+    assert result["errors"] == 0
+    assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+    assert result["peak_rss_mb"] > 0
+    assert result["upstream"]["llm_calls"] >= 1
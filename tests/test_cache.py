@@ -0,0 +1,254 @@
+import pytest
+import threading
+import time
+import numpy as np
+import pandas as pd
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.cache as cache_module
+from benchmarks.stubs import FakeLLM, FakeNewsSession, FakeYFinance, RESPServer
+from utils.cache import (
+    Cache,
+    MemoryBackend,
+    NullBackend,
+    RedisBackend,
+    SQLiteBackend,
+    backend_from_url,
+    cached,
+    dumps,
+    get_cache,
+    loads,
+)
+from utils.news import NewsClient
+
+# ---- Fixtures ----
+@pytest.fixture
+def resp_server():
+    server = RESPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    else:
+        server = request.getfixturevalue("resp_server")
+        backend = RedisBackend(*server.server_address)
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def shared_cache(monkeypatch, resp_server):
+    """Points get_cache at the RESP stand-in, as replicas sharing a Redis would be"""
+    host, port = resp_server.server_address
+    monkeypatch.setenv("CACHE_URL", f"redis://{host}:{port}/0")
+    monkeypatch.setenv("CACHE_SECRET", "test-secret")
+    monkeypatch.setattr(cache_module, "_caches", {})
+    monkeypatch.setattr(cache_module, "_backends", {})
+    return resp_server
+
+# ---- Test Cases ----
+
+# 1. Test Serialization
+def test_roundtrip_values():
+    embedding = np.random.default_rng(0).normal(size=768).astype(np.float32)
+    stock_info, history = FakeYFinance().Ticker("AAPL").info, FakeYFinance().Ticker("AAPL").history("1y")
+    for value in [embedding, "A short summary.", {"articles": [{"title": "x", "tags": ("a", "b")}]}, None, 3]:
+        restored = loads(dumps(value))
+        if isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(restored, value)
+            assert restored.dtype == np.float32 and restored.flags.writeable
+        else:
+            assert restored == value
+    info, data = loads(dumps((stock_info, history)))
+    assert info == stock_info
+    pd.testing.assert_frame_equal(data, history)
+
+def test_serialization_is_compact():
+    embedding = np.zeros(768, dtype=np.float32) + 0.5
+    # Raw array bytes plus a few bytes of header, compressed when that helps
+    assert len(dumps(np.random.default_rng(0).normal(size=768).astype(np.float32))) < 768 * 4 + 32
+    assert len(dumps(embedding)) < 200
+    assert len(dumps("word " * 1000)) < 200
+
+def test_pickle_fallback_without_msgpack(monkeypatch):
+    monkeypatch.setattr(cache_module, "msgpack", None)
+    value = {"ticker": "AAPL", "peers": ("MSFT", "GOOGL")}
+    data = dumps(value)
+    assert data[:1] in (b"p", b"P")
+    assert loads(data) == value
+
+@pytest.mark.skipif(cache_module.msgpack is None, reason="msgpack not installed")
+def test_msgpack_keeps_tuples_and_arrays():
+    value = {"scores": np.arange(4, dtype=np.float64), "pair": ("AAPL", 1)}
+    data = dumps(value)
+    assert data[:1] in (b"m", b"M")
+    restored = loads(data)
+    assert restored["pair"] == ("AAPL", 1)
+    np.testing.assert_array_equal(restored["scores"], value["scores"])
+
+# 2. Test Backends
+def test_backend_get_set_delete_incr(backend):
+    assert backend.get("missing") is None
+    backend.set("k", b"value")
+    assert backend.get("k") == b"value"
+    backend.delete("k")
+    assert backend.get("k") is None
+    assert [backend.incr("n"), backend.incr("n")] == [1, 2]
+    assert backend.get("n") == b"2"
+
+def test_backend_ttl(backend):
+    backend.set("short", b"1", ttl=0.05)
+    backend.set("long", b"2", ttl=60)
+    time.sleep(0.1)
+    assert backend.get("short") is None
+    assert backend.get("long") == b"2"
+
+def test_memory_backend_lru():
+    backend = MemoryBackend(max_entries=2)
+    backend.incr("ns:version")
+    backend.set("a", b"1")
+    backend.set("b", b"2")
+    backend.get("a")
+    backend.set("c", b"3")
+    assert [backend.get(k) for k in "abc"] == [b"1", None, b"3"]
+    assert backend.get("ns:version") == b"1"
+
+def test_backend_from_url(tmp_path):
+    assert isinstance(backend_from_url("memory://?max_entries=10"), MemoryBackend)
+    assert backend_from_url("memory://?max_entries=10").max_entries == 10
+    assert backend_from_url(f"sqlite:///{tmp_path}/c.sqlite").path == f"{tmp_path}/c.sqlite"
+    redis = backend_from_url("redis://:secret@cache.internal:6380/2")
+    assert (redis.host, redis.port, redis.db, redis.password) == ("cache.internal", 6380, 2, "secret")
+    assert isinstance(backend_from_url("none://"), NullBackend)
+    with pytest.raises(ValueError):
+        backend_from_url("memcached://localhost")
+
+# 3. Test Cache
+def test_namespace_invalidation_across_replicas(backend):
+    replica_a = Cache(backend, "summaries", version_ttl=0, secret="test-secret")
+    replica_b = Cache(backend, "summaries", version_ttl=0, secret="test-secret")
+    other = Cache(backend, "news", version_ttl=0, secret="test-secret")
+    replica_a.set("AAPL", "Apple summary")
+    other.set("AAPL", ["headline"])
+    assert replica_b.get("AAPL") == "Apple summary"
+    replica_a.invalidate()
+    assert replica_b.get("AAPL") is None
+    assert other.get("AAPL") == ["headline"]
+
+def test_version_is_cached_between_reads():
+    backend = MemoryBackend()
+    now = [0.0]
+    replica = Cache(backend, "llm", version_ttl=1.0, clock=lambda: now[0])
+    replica.set("q", "answer")
+    Cache(backend, "llm").invalidate()
+    # Another replica's invalidation shows up once the version is re-read
+    assert replica.get("q") == "answer"
+    now[0] += 1.0
+    assert replica.get("q") is None
+
+def test_backend_errors_are_misses(capsys):
+    unreachable = Cache(RedisBackend("127.0.0.1", 1, timeout=0.2), "news")
+    unreachable.set("AAPL", ["headline"])
+    assert unreachable.get("AAPL", "default") == "default"
+    assert unreachable.stats["errors"] == 2
+    assert "Error reading news cache" in capsys.readouterr().out
+
+def test_shared_backend_without_secret_refuses_pickle(resp_server, monkeypatch, capsys):
+    monkeypatch.setattr(cache_module, "msgpack", None)
+    backend = RedisBackend(*resp_server.server_address)
+    replica = Cache(backend, "market_data")
+    replica.set("AAPL", FakeYFinance().Ticker("AAPL").history("1y"))
+    assert replica.stats["errors"] == 1 and "Won't pickle DataFrame" in capsys.readouterr().out
+    # A pickle someone else wrote is never loaded
+    backend.set(replica._key("AAPL"), dumps({"ticker": "AAPL"}))
+    assert replica.get("AAPL", "default") == "default"
+    # Arrays need no pickle, so they are still shared
+    embeddings = Cache(backend, "embeddings")
+    embeddings.set("text", np.ones(4, dtype=np.float32))
+    np.testing.assert_array_equal(embeddings.get("text"), np.ones(4, dtype=np.float32))
+    backend.close()
+
+def test_unsigned_shared_cache_keeps_pickled_namespaces_local(shared_cache, monkeypatch, capsys):
+    def packb(value, **kwargs):
+        raise TypeError("stand-in for msgpack")
+    monkeypatch.delenv("CACHE_SECRET")
+    monkeypatch.setattr(cache_module, "msgpack", SimpleNamespace(packb=packb))
+    market_data = get_cache("market_data")
+    assert isinstance(market_data.backend, MemoryBackend) and isinstance(get_cache("news").backend, RedisBackend)
+    # Warned once, when the cache is built, and writes don't fail
+    for _ in range(3):
+        get_cache("market_data").set("AAPL", FakeYFinance().Ticker("AAPL").history("1y"))
+    assert market_data.stats["errors"] == 0 and market_data.get("AAPL") is not None
+    assert capsys.readouterr().out.count("Warning: caching market_data in this process only") == 1
+    # Without msgpack nothing but arrays could be shared, so every namespace stays local
+    monkeypatch.setattr(cache_module, "msgpack", None)
+    monkeypatch.setattr(cache_module, "_caches", {})
+    assert isinstance(get_cache("news").backend, MemoryBackend)
+
+def test_signed_entries(backend):
+    history = FakeYFinance().Ticker("AAPL").history("1y")
+    replica_a = Cache(backend, "market_data", secret="test-secret")
+    replica_b = Cache(backend, "market_data", secret="test-secret")
+    replica_a.set("AAPL", history)
+    pd.testing.assert_frame_equal(replica_b.get("AAPL"), history)
+    # Entries signed with another secret, or altered, are misses
+    assert Cache(backend, "market_data", secret="other").get("AAPL") is None
+    raw = backend.get(replica_a._key("AAPL"))
+    backend.set(replica_a._key("AAPL"), raw[:-1] + bytes([raw[-1] ^ 1]))
+    assert replica_b.get("AAPL") is None and replica_b.stats["errors"] == 1
+
+def test_cached_decorator(monkeypatch):
+    monkeypatch.setenv("CACHE_URL", "memory://")
+    monkeypatch.setattr(cache_module, "_caches", {})
+    monkeypatch.setattr(cache_module, "_backends", {})
+    calls = []
+
+    @cached("summaries", unless=lambda summary: summary is None)
+    def summarize(text, max_length=130):
+        calls.append(text)
+        return None if text == "fail" else text[:max_length]
+
+    assert summarize("Apple") == summarize("Apple", 130) == "Apple"
+    summarize("fail")
+    summarize("fail")
+    assert calls == ["Apple", "fail", "fail"]
+    assert get_cache("summaries").ttl == cache_module.CACHE_TTLS["summaries"]
+
+# 4. Test Shared Paths
+def test_completion_shared_between_replicas(shared_cache, monkeypatch):
+    """A second replica (another client) gets the answer the first one paid for"""
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    import utils.ai
+    replica_a, replica_b = FakeLLM(), FakeLLM()
+    messages = [{"role": "user", "content": "How should I invest?"}]
+    answer = utils.ai.create_completion(replica_a, "llama-3.1-8b-instant", messages)
+    again = utils.ai.create_completion(replica_b, "llama-3.1-8b-instant", messages)
+    assert (replica_a.calls, replica_b.calls) == (1, 0)
+    assert again.choices[0].message.content == answer.choices[0].message.content
+
+def test_news_shared_between_replicas(shared_cache):
+    sessions = [FakeNewsSession(), FakeNewsSession()]
+    replicas = [NewsClient("test", cache=get_cache("news")) for _ in sessions]
+    for client, session in zip(replicas, sessions):
+        client.session = session
+    assert replicas[0].get("AAPL") == replicas[1].get("aapl")
+    assert [s.calls for s in sessions] == [1, 0]
+    assert replicas[1].stats["shared_hits"] == 1
+    replicas[0].invalidate()
+    replicas[1].invalidate("AAPL")
+    replicas[1].get("AAPL")
+    assert sessions[1].calls == 1
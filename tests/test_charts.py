@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.charts import MAX_CANDLES, MAX_MONTHS, HISTOGRAM_BINS, bucket_ohlc, build_chart_specs, compute_aggregates
+
+# ---- Fixtures ----
+def make_history(n_bars):
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2005-01-03", periods=n_bars)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    return pd.DataFrame(
+        {
+            "Open": close * 0.99,
+            "High": close * 1.01,
+            "Low": close * 0.98,
+            "Close": close,
+            "Volume": rng.integers(1000, 5000, n_bars),
+        },
+        index=index,
+    )
+
+@pytest.fixture
+def one_year():
+    return make_history(252)
+
+@pytest.fixture
+def twenty_years():
+    return make_history(252 * 20)
+
+# ---- Test Cases ----
+
+# 1. Test Downsampling
+def test_short_history_not_bucketed(one_year):
+    """Histories that fit are charted bar for bar"""
+    assert len(bucket_ohlc(one_year)) == len(one_year)
+
+def test_long_history_bucketed(twenty_years):
+    """Long histories are bucketed without losing the price envelope or volume"""
+    candles = bucket_ohlc(twenty_years)
+    assert len(candles) <= MAX_CANDLES
+    assert candles["High"].max() == twenty_years["High"].max()
+    assert candles["Low"].min() == twenty_years["Low"].min()
+    assert candles["Open"].iloc[0] == twenty_years["Open"].iloc[0]
+    assert candles["Close"].iloc[-1] == twenty_years["Close"].iloc[-1]
+    assert candles["Volume"].sum() == twenty_years["Volume"].sum()
+
+# 2. Test Aggregates
+def test_aggregates(one_year):
+    """Monthly aggregates and histogram counts match the daily data"""
+    aggregates = compute_aggregates(one_year)
+    assert aggregates["monthly_volume"].sum() == one_year["Volume"].sum()
+    assert aggregates["change_counts"].sum() == len(one_year) - 1
+    assert len(aggregates["change_counts"]) == HISTOGRAM_BINS
+
+def test_long_history_by_year(twenty_years):
+    """Past MAX_MONTHS the pie and bar show one entry per year"""
+    aggregates = compute_aggregates(twenty_years)
+    assert aggregates["period_name"] == "Yearly" and len(aggregates["month_labels"]) == 20
+    assert aggregates["month_labels"][0] == "2005"
+    assert aggregates["monthly_volume"].sum() == twenty_years["Volume"].sum()
+    first_year = twenty_years.loc["2005", "Close"].mean()
+    assert aggregates["monthly_close_avg"][0] == pytest.approx(first_year)
+    two_years = compute_aggregates(make_history(21 * MAX_MONTHS))
+    assert two_years["period_name"] == "Monthly"
+
+def test_chart_specs(twenty_years):
+    """All four charts are built as figure dicts that Plotly accepts"""
+    specs = build_chart_specs(twenty_years)
+    assert set(specs) == {"candlestick", "volume_pie", "monthly_bar", "histogram"}
+    trace_types = {name: go.Figure(spec).data[0].type for name, spec in specs.items()}
+    assert trace_types == {"candlestick": "candlestick", "volume_pie": "pie", "monthly_bar": "bar", "histogram": "bar"}
+    assert go.Figure(specs["volume_pie"]).layout.title.text == "Yearly Volume Distribution"
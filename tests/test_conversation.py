@@ -0,0 +1,120 @@
+import pytest
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FakeLLM, LocalVectorIndex, StubEncoder
+from utils.conversation import ConversationStore, RollingMemory, count_tokens, extractive_summary, truncate_tokens
+
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+
+# ---- Fixtures ----
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.sqlite"))
+    yield store
+    store.close()
+
+
+def fill(memory, conversation, turns):
+    for turn in range(1, turns + 1):
+        memory.add(conversation, f"Question {turn}?", f"Answer {turn}. " + "detail " * 40)
+
+# ---- Test Cases ----
+
+# 1. Test Store
+def test_turns_and_pages(store):
+    for turn in range(1, 24):
+        assert store.append("a", f"Q{turn}", f"A{turn}") == turn
+    store.append("b", "other", "conversation")
+    assert store.count("a") == 23 and store.count("b") == 1 and store.count("c") == 0
+    assert [t for t, _, _ in store.page("a", 0, 10)] == list(range(23, 13, -1))
+    assert [t for t, _, _ in store.page("a", 2, 10)] == [3, 2, 1]
+    assert store.turns("a", 22) == [("Q22", "A22"), ("Q23", "A23")]
+    store.clear("a")
+    assert store.count("a") == 0 and store.count("b") == 1
+
+def test_last_turn_changes_after_reset(store):
+    assert store.last_turn("a") == (0, None)
+    store.append("a", "Q1", "A1")
+    first = store.last_turn("a")
+    assert first[0] == 1
+    store.clear("a")
+    store.append("a", "New", "Start")
+    assert store.last_turn("a")[0] == 1 and store.last_turn("a") != first
+
+def test_conversation_survives_reopen(tmp_path):
+    path = str(tmp_path / "conversations.sqlite")
+    ConversationStore(path).append("a", "How should I invest?", "Diversify.")
+    assert ConversationStore(path).turns("a") == [("How should I invest?", "Diversify.")]
+
+# 2. Test Rolling Memory
+def test_context_is_bounded(store):
+    """However long the conversation, the context holds a budgeted summary and a few turns"""
+    memory = RollingMemory(store, recent_turns=4, compact_every=4, summary_tokens=100)
+    sizes = []
+    for turns in [10, 100, 300]:
+        fill(memory, f"c{turns}", turns)
+        context = memory.context(f"c{turns}")
+        assert context[0]["role"] == "system" and count_tokens(context[0]["content"]) <= 100 + 10
+        assert 8 <= len(context) - 1 <= 2 * 8
+        assert context[-2]["content"] == f"Question {turns}?"
+        sizes.append(sum(count_tokens(m["content"]) for m in context))
+    assert max(sizes) < 1.5 * min(sizes)
+
+def test_summaries_are_incremental(store):
+    calls = []
+
+    def summarize(summary, turns, max_tokens):
+        calls.append((summary, [q for q, _ in turns]))
+        return f"{summary} {len(turns)} more".strip()
+    memory = RollingMemory(store, summarize, recent_turns=2, compact_every=3)
+    fill(memory, "a", 7)
+    # Turns 1-3 are folded once turn 5 pushes them out of the last two; 4-6 wait for turn 8
+    assert calls == [("", ["Question 1?", "Question 2?", "Question 3?"])]
+    assert store.summary("a") == (3, "3 more")
+    memory.add("a", "Question 8?", "Answer")
+    assert calls[-1] == ("3 more", ["Question 4?", "Question 5?", "Question 6?"])
+
+def test_failed_summary_falls_back(store, capsys):
+    def summarize(summary, turns, max_tokens):
+        raise RuntimeError("LLM unavailable")
+    memory = RollingMemory(store, summarize, recent_turns=1, compact_every=1, summary_tokens=50)
+    fill(memory, "a", 3)
+    assert "- Asked: Question 2?" in store.summary("a")[1]
+    assert "Error summarizing conversation" in capsys.readouterr().out
+
+def test_summary_helpers():
+    assert truncate_tokens("one two three four", 3) == "one two"
+    turns = [(f"Question {i}?", "Answer") for i in range(50)]
+    summary = extractive_summary("", turns, 20)
+    assert count_tokens(summary) <= 20 and summary.endswith("Question 49?")
+
+# 3. Test Advisor Prompt
+def test_history_reaches_the_prompt(monkeypatch, store):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    import utils.ai
+    llm = FakeLLM()
+    monkeypatch.setattr(utils.ai, "client", llm)
+    monkeypatch.setattr(utils.ai, "SentenceTransformer", StubEncoder)
+    memory = RollingMemory(store, utils.ai.summarize_conversation, recent_turns=2, compact_every=2)
+    fill(memory, "a", 5)
+    assert llm.calls == 1
+    history = memory.context("a")
+    index = LocalVectorIndex(768)
+    messages = utils.ai.build_chat_messages("And bonds?", PROFILE, index, history)
+    assert messages[1]["content"].startswith("Summary of the earlier conversation:")
+    assert [m["role"] for m in messages[2:]] == ["user", "assistant", "user", "assistant", "user", "assistant", "user"]
+    assert messages[-1] == {"role": "user", "content": "And bonds?"}
+    # Without history the prompt is unchanged
+    assert len(utils.ai.build_chat_messages("And bonds?", PROFILE, index)) == 1
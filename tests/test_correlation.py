@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.correlation import ReturnCorrelations, describe_correlations
+
+# ---- Fixtures ----
+@pytest.fixture
+def returns():
+    """Random daily returns where T1 closely tracks T0"""
+    rng = np.random.default_rng(7)
+    data = rng.standard_normal((300, 30)).astype(np.float32) * 0.01
+    data[:, 1] = data[:, 0] * 0.9 + data[:, 1] * 0.1
+    return data
+
+@pytest.fixture
+def tickers():
+    return [f"T{i}" for i in range(30)]
+
+# ---- Test Cases ----
+
+# 1. Test Incremental Updates
+def test_matches_full_recompute(returns, tickers):
+    """Bar-by-bar updates match a correlation computed from scratch"""
+    service = ReturnCorrelations(tickers, returns[:100])
+    for bar in returns[100:]:
+        service.update(bar)
+    np.testing.assert_allclose(service.correlation(), np.corrcoef(returns.T), atol=1e-4)
+    np.testing.assert_allclose(service.covariance(), np.cov(returns.T), atol=1e-6)
+
+def test_rolling_window(returns, tickers):
+    """With a window, only the most recent bars contribute"""
+    service = ReturnCorrelations(tickers, returns[:50], window=120)
+    for start in range(50, 300, 25):
+        service.update(returns[start:start + 25])
+    assert service.returns.shape == (120, 30)
+    np.testing.assert_allclose(service.correlation(), np.corrcoef(returns[-120:].T), atol=1e-4)
+
+def test_pair_matches_matrix(returns, tickers):
+    """Pair lookups agree with the full matrix"""
+    service = ReturnCorrelations(tickers, returns)
+    assert service.pair("T3", "T9") == pytest.approx(service.correlation()[3, 9], abs=1e-5)
+
+# 2. Test Peer Lookup
+def test_top_peers(returns, tickers):
+    """Top peers are sorted, exclude the ticker itself and find the tracking ticker"""
+    service = ReturnCorrelations(tickers, returns)
+    peers = service.top_peers("T0", k=5)
+    assert peers[0][0] == "T1"
+    assert "T0" not in [peer for peer, _ in peers]
+    correlations = [corr for _, corr in peers]
+    assert correlations == sorted(correlations, reverse=True)
+
+def test_peers_refresh_after_update(returns, tickers):
+    """Peer rankings are rebuilt after new bars arrive"""
+    service = ReturnCorrelations(tickers, returns[:200])
+    before = service.top_peers("T0", k=3)
+    service.update(returns[200:])
+    assert service.peers is None
+    assert service.top_peers("T0", k=3)[0][0] == before[0][0]
+
+def test_from_prices_and_save(tmp_path):
+    """Services build from a price frame and round trip through disk"""
+    prices = pd.DataFrame(
+        {"AAPL": [100, 101, 102, 101, 103], "MSFT": [200, 202, 204, 202, 206], "XOM": [50, 49, 50, 51, 50]},
+        index=pd.date_range("2024-01-01", periods=5),
+    )
+    service = ReturnCorrelations.from_prices(prices)
+    assert service.pair("AAPL", "MSFT") == pytest.approx(1.0, abs=1e-5)
+    path = tmp_path / "returns.npz"
+    service.save(path)
+    loaded = ReturnCorrelations.load(path)
+    assert loaded.tickers == service.tickers
+    np.testing.assert_allclose(loaded.returns, service.returns)
+
+def test_describe_correlations(returns, tickers):
+    """Descriptions cover matched pairs and skip unknown tickers"""
+    service = ReturnCorrelations(tickers, returns)
+    lines = describe_correlations(service, ["T0", "T1", "UNKNOWN"])
+    assert any("between T0 and T1" in line for line in lines)
+    assert not any("UNKNOWN" in line for line in lines)
+
+# 3. Test Error Handling
+def test_invalid_bars(tickers):
+    service = ReturnCorrelations(tickers)
+    with pytest.raises(ValueError):
+        service.update(np.zeros(3))
+    with pytest.raises(ValueError):
+        service.correlation()
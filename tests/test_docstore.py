@@ -0,0 +1,126 @@
+import pytest
+import uuid
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import LocalVectorIndex, StubEncoder, build_stock_index, stubbed_app
+from utils.docstore import DocStore, group_by_ticker, rekey_index
+
+NAMESPACE = "stock-description_detailed"
+
+# ---- Fixtures ----
+@pytest.fixture
+def encoder():
+    return StubEncoder("sentence-transformers/all-mpnet-base-v2")
+
+
+@pytest.fixture
+def index(encoder):
+    return build_stock_index(50, encoder)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DocStore(str(tmp_path / "stocks.sqlite"))
+    yield store
+    store.close()
+
+
+def legacy_format(matches):
+    """The details perform_rag used to build from the query metadata"""
+    details = {}
+    for match in matches:
+        m = match["metadata"]
+        details.setdefault(m["Ticker"], {
+            "ticker": m["Ticker"], "name": m["Name"], "business_summary": m["Business Summary"],
+            "website": m["Website"], "revenue_growth": m["Revenue Growth"], "gross_margins": m["Gross Margins"],
+            "target_m_price": m["Target Mean Price"], "current_price": m["Current Price"],
+            "52weekchange": m["52 Week Change"], "sector": m["Sector"], "market_cap": m["Market Cap"],
+            "volume": m["Volume"], "recommendation_key": m["Recommendation Key"], "text": m["text"],
+        })
+    return list(details.values())
+
+# ---- Test Cases ----
+
+# 1. Test Store
+def test_hydrated_details_match_metadata(index, store, encoder):
+    """Ids-only queries hydrate to exactly what the metadata query produced"""
+    assert store.sync_from_index(index, NAMESPACE) == 50
+    assert len(store) == 50
+    vector = encoder.encode("software cloud growth").tolist()
+    full = index.query(vector=vector, top_k=12, include_metadata=True, namespace=NAMESPACE)
+    ids_only = index.query(vector=vector, top_k=12, namespace=NAMESPACE)
+    assert "metadata" not in ids_only["matches"][0]
+    assert store.hydrate(ids_only["matches"], 12) == legacy_format(full["matches"])
+
+def test_store_persists(tmp_path, index):
+    path = str(tmp_path / "stocks.sqlite")
+    DocStore(path).sync_from_index(index, NAMESPACE)
+    assert DocStore(path).get_many(["S00001"])["S00001"]["name"] == "S00001 Corp"
+
+# 2. Test Grouping
+def test_group_by_ticker():
+    matches = [
+        {"id": "AAPL#1", "score": 0.9},
+        {"id": "MSFT", "score": 0.8},
+        {"id": "AAPL#0", "score": 0.95},
+        {"id": "3f2c9a", "score": 0.7},
+        {"id": "b81e04", "score": 0.85},
+    ]
+    grouped = group_by_ticker(matches, 3, aliases={"3f2c9a": "NVDA", "b81e04": "MSFT"})
+    assert grouped == [("AAPL", "AAPL#0", 0.95), ("MSFT", "b81e04", 0.85), ("NVDA", "3f2c9a", 0.7)]
+
+def test_missing_tickers_fetched_once(index, store, encoder):
+    """An empty store fills from the index on the first query and answers the next one itself"""
+    vector = encoder.encode("oil gas mining").tolist()
+    matches = index.query(vector=vector, top_k=12, namespace=NAMESPACE)["matches"]
+    first = store.hydrate(matches, 5, index, NAMESPACE)
+    assert len(first) == 5 and index.calls["fetch"] == 1
+    assert store.hydrate(matches, 5, index, NAMESPACE) == first
+    assert index.calls["fetch"] == 1
+
+def test_random_ids_with_empty_store(index, store, encoder):
+    """Vectors keyed by random ids (as from_documents writes them) hydrate on the first query"""
+    space = index.namespaces[NAMESPACE]
+    legacy = LocalVectorIndex(encoder.dimension)
+    matches = []
+    for n, (ticker, score) in enumerate([("S00001", 0.9), ("S00002", 0.8), ("S00001", 0.7), ("S00003", 0.6)]):
+        vector_id = str(uuid.UUID(int=n + 1))
+        row = space["ids"][ticker]
+        legacy.upsert([(vector_id, space["vectors"][row], space["metadata"][row])], namespace=NAMESPACE)
+        matches.append({"id": vector_id, "score": score})
+    first = store.hydrate(matches, 3, legacy, NAMESPACE)
+    assert [detail["ticker"] for detail in first] == ["S00001", "S00002", "S00003"]
+    assert store.hydrate(matches, 3, legacy, NAMESPACE) == first
+    details, matrix = DocStore(":memory:").hydrate(matches, 3, legacy, NAMESPACE, vectors=True)
+    assert [detail["ticker"] for detail in details] == ["S00001", "S00002", "S00003"] and matrix.shape[0] == 3
+    assert store.hydrate(matches, 3, legacy, NAMESPACE, vectors=True)[1].shape[0] == 3
+
+def test_rekey_index(index, store, encoder):
+    """Duplicate random-id vectors are replaced by one vector per ticker"""
+    space = index.namespaces[NAMESPACE]
+    for n, ticker in enumerate(["S00001", "S00002", "S00001"]):
+        row = space["ids"][ticker]
+        index.upsert([(f"legacy-{n}", space["vectors"][row], space["metadata"][row])], namespace=NAMESPACE)
+    index.delete(ids=["S00001", "S00002"], namespace=NAMESPACE)
+    store.sync_from_index(index, NAMESPACE)
+    assert store.aliases(["legacy-0", "legacy-1"]) == {"legacy-0": "S00001", "legacy-1": "S00002"}
+    assert rekey_index(index, store, NAMESPACE) == 3
+    assert {"S00001", "S00002"} <= set(space["ids"]) and not any(i.startswith("legacy") for i in space["ids"])
+    assert len(space["ids"]) == 50
+
+# 3. Test App
+def test_perform_rag_queries_ids_only(index):
+    with stubbed_app(stock_index=index) as app:
+        top_matches, response = app.perform_rag("software cloud growth", None)
+        assert index.calls["fetch"] == 1
+        before = index.response_bytes
+        assert app.perform_rag("software cloud growth", None)[0] == top_matches
+    assert top_matches and len({m["ticker"] for m in top_matches}) == len(top_matches)
+    assert all(m["business_summary"] == m["text"] for m in top_matches)
+    # Once the store has them (embeddings too), a query only carries ids and scores
+    assert index.calls["fetch"] == 1
+    assert index.response_bytes - before < 50 * app.STOCK_CANDIDATES
@@ -0,0 +1,95 @@
+import pytest
+import time
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.investors as investors_module
+from benchmarks.stubs import LocalVectorIndex, StubEncoder
+from utils.investors import DEFAULT_PATH, InvestorIndex, describe_investors, get_investor_index
+
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+
+# ---- Fixtures ----
+@pytest.fixture
+def survey():
+    return pd.read_csv(DEFAULT_PATH)
+
+
+@pytest.fixture
+def index(survey):
+    return InvestorIndex(survey)
+
+
+def brute_force(index, profile, k):
+    """Distances to the k nearest rows by a plain weighted distance over the features the profile has"""
+    vector, mask = index.encode(profile)
+    return sorted(np.sqrt(np.sum(index.weights * mask * (row - vector) ** 2)) for row in index.features)[:k]
+
+# ---- Test Cases ----
+
+# 1. Test Features
+def test_feature_vectors(index, survey):
+    assert index.features.shape[0] == len(survey)
+    assert index.features.min() >= 0 and index.features.max() <= 1
+    vector, mask = index.encode(PROFILE)
+    # Age, duration, gender and purpose ("Wealth Creation") are known; objective and ranks aren't
+    assert mask[index.columns["Purpose"]].all()
+    assert not mask[index.columns["Objective"]].any() and not mask[index.columns["ranks"]].any()
+    assert vector[index.columns["duration"]] == 1.0
+
+def test_same_row_is_nearest(index, survey):
+    row = survey.iloc[7]
+    profile = {"gender": row["gender"], "age": row["age"], "objective": f"{row['Purpose']}, {row['Objective']}"}
+    distance, record = index.query(profile, 1)[0]
+    assert record["age"] == row["age"] and distance == pytest.approx(0, abs=0.3)
+
+# 2. Test Queries
+def test_matches_brute_force(index):
+    for profile in [PROFILE, {"age": 22, "duration": 1}, {"gender": "Male", "age": 30, "objective": "Income"}]:
+        # Respondents often tie on the features a profile has, so compare the distances
+        distances = [d for d, _ in index.query(profile, 5)]
+        assert distances == pytest.approx(brute_force(index, profile, 5))
+
+def test_query_is_fast(survey):
+    data = pd.concat([survey] * 250, ignore_index=True)
+    index = InvestorIndex(data)
+    index.query(PROFILE, 5)
+    start = time.perf_counter()
+    for _ in range(100):
+        index.query(PROFILE, 5)
+    # 10,000 rows, well under a millisecond a query
+    assert (time.perf_counter() - start) / 100 < 0.005
+
+def test_describe_investors(index):
+    lines = describe_investors(index.query(PROFILE, 5))
+    assert lines[0].startswith("5 survey respondents with similar profiles")
+    assert "1 = most preferred" in lines[1]
+    assert any(line.startswith("Most common main avenue:") for line in lines)
+    assert describe_investors([]) == []
+
+def test_get_investor_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(investors_module, "_index", {})
+    assert get_investor_index() is get_investor_index()
+    monkeypatch.setenv("INVESTORS_PATH", str(tmp_path / "missing.csv"))
+    assert get_investor_index() is None
+
+# 3. Test Advisor Prompt
+def test_similar_investors_in_prompt(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    import utils.ai
+    monkeypatch.setattr(utils.ai, "SentenceTransformer", StubEncoder)
+    messages = utils.ai.build_chat_messages("How should I invest?", PROFILE, LocalVectorIndex(768))
+    assert "Similar investors:\n- 5 survey respondents" in messages[0]["content"]
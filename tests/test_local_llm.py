@@ -0,0 +1,124 @@
+import pytest
+import threading
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.local_llm as local_llm
+import utils.warmup as warmup_module
+from benchmarks.stubs import FakeLLM, build_tiny_generator, stubbed_app
+from utils.local_llm import get_local_generator
+
+GROQ_MODELS = ["llama-3.1-70b-versatile", "llama-3.1-8b-instant"]
+PROFILE = {
+    "gender": "Female",
+    "age": 34,
+    "income": 8000,
+    "expenditure": 5000,
+    "savings": 20000,
+    "objective": "Wealth Creation",
+    "duration": 10,
+}
+PROMPTS = [
+    [{"role": "user", "content": "oil gas ?"}],
+    [{"role": "system", "content": "growth cloud software chips energy . bank lending insurance drugs"}, {"role": "user", "content": "dividend ?"}],
+    [{"role": "user", "content": "water"}],
+]
+
+# ---- Fixtures ----
+@pytest.fixture
+def generator():
+    generator = build_tiny_generator(max_new_tokens=12, batch_wait=0.2)
+    yield generator
+    generator.close()
+
+
+@pytest.fixture
+def local_model(monkeypatch):
+    """LOCAL_LLM_MODEL set, loading the tiny test model"""
+    monkeypatch.setattr(warmup_module, "_models", {})
+    monkeypatch.setattr(local_llm, "local_generator_factory", lambda model_name: build_tiny_generator(max_new_tokens=8))
+    monkeypatch.setenv("LOCAL_LLM_MODEL", "tiny")
+    yield
+    get_local_generator().close()
+
+# ---- Test Cases ----
+
+# 1. Test Generation
+def test_stream_and_budget(generator):
+    chunks = list(generator.stream(PROMPTS[1]))
+    assert chunks and "".join(chunks).strip() == generator.generate(PROMPTS[1])
+    assert generator.stats["tokens"] <= 2 * 12
+    # Requests can ask for fewer tokens than the budget, but not more
+    assert len(list(generator.stream(PROMPTS[1], 3))) <= 3
+    before = generator.stats["tokens"]
+    generator.generate(PROMPTS[1], 1000)
+    assert generator.stats["tokens"] - before <= 12
+
+def test_concurrent_prompts_batched(generator):
+    """Left padding and positions keep each row's output what it would be alone"""
+    alone = [generator.generate(messages) for messages in PROMPTS]
+    results = [None] * len(PROMPTS)
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, generator.generate(PROMPTS[i])))
+        for i in range(len(PROMPTS))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == alone
+    assert generator.stats["max_batch"] > 1 and len(generator.queue_seconds) == 2 * len(PROMPTS)
+
+def test_errors_reach_the_caller(generator, monkeypatch, capsys):
+    def fail(**kwargs):
+        raise RuntimeError("out of memory")
+    monkeypatch.setattr(generator, "model", fail)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        generator.generate(PROMPTS[0])
+    assert "Error generating locally: out of memory" in capsys.readouterr().out
+
+def test_prompt_without_chat_template(generator):
+    assert generator.format_prompt(PROMPTS[1]) == (
+        "system: growth cloud software chips energy . bank lending insurance drugs\n\nuser: dividend ?\n\nassistant:"
+    )
+
+def test_not_configured(monkeypatch):
+    monkeypatch.delenv("LOCAL_LLM_MODEL", raising=False)
+    assert get_local_generator() is None
+
+# 2. Test Fallback Tier
+def test_advisor_falls_back_to_local(local_model):
+    with stubbed_app(llm=FakeLLM(failing_models=GROQ_MODELS)) as app:
+        import utils.ai
+        answer = utils.ai.perform_chat_rag("How should I invest?", PROFILE, app.pinecone_index)
+        assert answer and get_local_generator().stats["requests"] == 1
+        chunks = list(utils.ai.stream_completion(utils.ai.client, GROQ_MODELS, [{"role": "user", "content": "bonds ?"}]))
+        assert chunks and get_local_generator().stats["requests"] == 2
+
+def test_stock_analysis_falls_back_to_local(local_model):
+    with stubbed_app(llm=FakeLLM(failing_models=GROQ_MODELS)) as app:
+        app.st.cache_data.clear()
+        matches, analysis = app.perform_rag("software cloud growth", None)
+        assert matches and analysis and get_local_generator().stats["requests"] == 1
+
+def test_generate_response(local_model, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    import utils.ai
+    assert utils.ai.generate_response(PROMPTS[0]) == get_local_generator().generate(PROMPTS[0])
+    assert get_local_generator().stats["requests"] == 2
+
+def test_generate_response_not_configured(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.delenv("LOCAL_LLM_MODEL", raising=False)
+    import utils.ai
+    assert utils.ai.generate_response(PROMPTS[0]) == "An error occurred: LOCAL_LLM_MODEL is not set"
+
+def test_without_local_model_errors_propagate(monkeypatch):
+    monkeypatch.delenv("LOCAL_LLM_MODEL", raising=False)
+    with stubbed_app(llm=FakeLLM(failing_models=GROQ_MODELS)) as app:
+        app.st.cache_data.clear()
+        with pytest.raises(RuntimeError, match="unavailable"):
+            app.perform_rag("software cloud growth", None)
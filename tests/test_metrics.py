@@ -0,0 +1,130 @@
+import pytest
+import json
+import threading
+import urllib.request
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import Histogram, MetricsRegistry, Trace, current_trace, serve_metrics, span, timed
+
+# ---- Fixtures ----
+@pytest.fixture
+def registry():
+    return MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+
+# ---- Test Cases ----
+
+# 1. Test Histograms
+def test_histogram_buckets():
+    """Values land in the first bucket whose upper bound is not below them"""
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 5):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(5.565)
+    assert histogram.max == 5
+
+def test_histogram_quantile():
+    """Quantiles interpolate within the bucket and never exceed the maximum"""
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for _ in range(100):
+        histogram.observe(0.05)
+    assert 0.01 < histogram.quantile(0.5) <= 0.05
+    assert histogram.quantile(1.0) == 0.05
+    assert Histogram().quantile(0.5) == 0.0
+
+# 2. Test Spans
+def test_span_records_stage(registry):
+    with span("stage", registry):
+        pass
+    assert registry.histograms["stage"].count == 1
+    assert registry.errors["stage"] == 0
+
+def test_span_counts_errors(registry):
+    """Exceptions are counted and re-raised, control flow exceptions are not errors"""
+    with pytest.raises(ValueError):
+        with span("stage", registry):
+            raise ValueError("boom")
+    with pytest.raises(KeyboardInterrupt):
+        with span("stage", registry):
+            raise KeyboardInterrupt
+    assert registry.histograms["stage"].count == 2
+    assert registry.errors["stage"] == 1
+
+def test_timed_decorator(registry):
+    @timed("double", registry)
+    def double(x):
+        """Doubles x"""
+        return 2 * x
+
+    assert double(3) == 6
+    assert double.__doc__ == "Doubles x"
+    assert registry.histograms["double"].count == 1
+
+# 3. Test Traces
+def test_trace_waterfall(registry):
+    """Spans inside a trace are kept in start order with their nesting depth"""
+    with Trace("request") as trace:
+        assert current_trace() is trace
+        with span("outer", registry):
+            with span("inner", registry):
+                pass
+        with span("after", registry):
+            pass
+    assert current_trace() is None
+    waterfall = trace.waterfall()
+    assert [(s["stage"], s["depth"]) for s in waterfall] == [("outer", 0), ("inner", 1), ("after", 0)]
+    assert waterfall[1]["start_ms"] >= waterfall[0]["start_ms"]
+    assert trace.duration * 1e3 >= waterfall[0]["duration_ms"]
+
+def test_trace_is_per_thread(registry):
+    """Spans on another thread do not leak into this thread's trace"""
+    def background():
+        with span("background", registry):
+            pass
+
+    with Trace("request") as trace:
+        worker = threading.Thread(target=background)
+        worker.start()
+        worker.join()
+    assert trace.spans == []
+    assert registry.histograms["background"].count == 1
+
+# 4. Test Export
+def test_prometheus_exposition(registry):
+    """Buckets are cumulative and end with +Inf, _sum and _count"""
+    for value in (0.005, 0.05, 5):
+        registry.observe("news", value)
+    registry.observe("news", 0.5, error=True)
+    text = registry.to_prometheus()
+    assert "# TYPE finovai_stage_duration_seconds histogram" in text
+    assert 'finovai_stage_duration_seconds_bucket{stage="news",le="0.01"} 1' in text
+    assert 'finovai_stage_duration_seconds_bucket{stage="news",le="1"} 3' in text
+    assert 'finovai_stage_duration_seconds_bucket{stage="news",le="+Inf"} 4' in text
+    assert 'finovai_stage_duration_seconds_count{stage="news"} 4' in text
+    assert 'finovai_stage_errors_total{stage="news"} 1' in text
+
+def test_json_summary(registry):
+    registry.observe("pdf", 0.02)
+    registry.observe("pdf", 0.04)
+    summary = registry.to_json()["pdf"]
+    assert summary["count"] == 2
+    assert summary["mean_ms"] == pytest.approx(30)
+    assert summary["max_ms"] == pytest.approx(40)
+
+def test_metrics_server(registry):
+    """The metrics endpoints serve both formats"""
+    registry.observe("news", 0.05)
+    server = serve_metrics(0, registry, host="127.0.0.1")
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        text = urllib.request.urlopen(f"{base}/metrics").read().decode()
+        assert text == registry.to_prometheus()
+        assert json.loads(urllib.request.urlopen(f"{base}/metrics.json").read()) == registry.to_json()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,75 @@
+import pytest
+import time
+import numpy as np
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_mmr import clustered_candidates
+from benchmarks.stubs import StubEncoder, build_stock_index, stubbed_app
+from utils.mmr import maximal_marginal_relevance
+
+# ---- Fixtures ----
+@pytest.fixture
+def candidates():
+    return clustered_candidates(100)
+
+# ---- Test Cases ----
+
+# 1. Test Selection
+def test_lambda_one_is_top_k(candidates):
+    query, embeddings, _ = candidates
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    assert maximal_marginal_relevance(query, embeddings, 8, 1.0) == list(np.argsort(-(unit @ query))[:8])
+
+def test_near_duplicates_skipped():
+    query = np.array([1.0, 0.0, 0.0])
+    embeddings = np.array([[0.9, 0.1, 0.0], [0.9, 0.1, 0.001], [0.7, 0.0, 0.7], [0.0, 1.0, 0.0]])
+    assert maximal_marginal_relevance(query, embeddings, 2, 1.0) == [0, 1]
+    assert maximal_marginal_relevance(query, embeddings, 2, 0.5) == [0, 2]
+
+def test_fewer_candidates_than_k():
+    assert maximal_marginal_relevance([1, 0], [[1, 0], [0, 1]], 5) == [0, 1]
+    assert maximal_marginal_relevance([1, 0], np.zeros((0, 2)), 5) == []
+
+# 2. Test Sector Constraint
+def test_sector_cap(candidates):
+    query, embeddings, groups = candidates
+    picked = maximal_marginal_relevance(query, embeddings, 8, 0.7, groups, 2)
+    assert len(picked) == len(set(picked)) == 8
+    sectors = [groups[i] for i in picked]
+    assert max(sectors.count(s) for s in sectors) <= 2
+    # Without the cap the closest sectors take more of the picks
+    uncapped = [groups[i] for i in maximal_marginal_relevance(query, embeddings, 8, 0.7)]
+    assert max(uncapped.count(s) for s in uncapped) > 2
+
+def test_sector_cap_relaxed_when_unavoidable():
+    query = np.array([1.0, 0.0])
+    embeddings = np.array([[1.0, 0.1], [1.0, 0.2], [1.0, 0.3], [0.0, 1.0]])
+    picked = maximal_marginal_relevance(query, embeddings, 4, 0.9, ["Tech", "Tech", "Tech", "Energy"], 1)
+    assert picked[:2] == [0, 3] and sorted(picked) == [0, 1, 2, 3]
+
+def test_mmr_is_fast(candidates):
+    query, embeddings, groups = candidates
+    maximal_marginal_relevance(query, embeddings, 8, 0.7, groups, 3)
+    start = time.perf_counter()
+    for _ in range(100):
+        maximal_marginal_relevance(query, embeddings, 8, 0.7, groups, 3)
+    # 100 candidates of 768 dimensions
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+# 3. Test App
+def test_perform_rag_diversifies():
+    index = build_stock_index(300, StubEncoder("sentence-transformers/all-mpnet-base-v2"))
+    with stubbed_app(stock_index=index) as app:
+        top_matches, _ = app.perform_rag("software cloud growth", None)
+        assert index.calls["fetch"] == 1
+        assert app.perform_rag("software cloud growth", None)[0] == top_matches
+        assert index.calls["fetch"] == 1
+        max_per_sector = app.MAX_PER_SECTOR
+        limit = app.STOCK_MATCHES
+    assert len(top_matches) == limit == len({m["ticker"] for m in top_matches})
+    sectors = [m["sector"] for m in top_matches]
+    assert max(sectors.count(s) for s in sectors) <= max_per_sector
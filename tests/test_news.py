@@ -0,0 +1,190 @@
+import pytest
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.news import NewsClient
+
+# ---- Fixtures ----
+class NewsAPIStub(ThreadingHTTPServer):
+    """Local NewsAPI stand-in that counts requests"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), NewsAPIHandler)
+        self.requests = []
+        self.headers = []
+        self.delay = 0
+        self.status = 200
+        self.body = None
+        self.etag = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v2/everything"
+
+    def handle_error(self, request, client_address):
+        # The timeout test hangs up before the response is written
+        pass
+
+
+class NewsAPIHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        self.server.requests.append(params)
+        self.server.headers.append(dict(self.headers))
+        time.sleep(self.server.delay)
+        if self.server.etag and self.headers.get("If-None-Match") == self.server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        articles = [
+            {
+                "source": {"id": None, "name": "Stub Wire"},
+                "author": "Reporter",
+                "title": f"{params['q'][0]} headline {i}",
+                "description": "Description",
+                "url": f"https://example.com/{i}",
+                "urlToImage": "https://example.com/image.png",
+                "publishedAt": "2024-01-01T00:00:00Z",
+                "content": "Full content " * 50,
+            }
+            for i in range(20)
+        ]
+        body = self.server.body or json.dumps({"status": "ok", "articles": articles}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        if self.server.etag:
+            self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def news_api():
+    server = NewsAPIStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(news_api):
+    news_client = NewsClient("test-key", base_url=news_api.url, timeout=(1, 1))
+    yield news_client
+    news_client.close()
+
+# ---- Test Cases ----
+
+# 1. Test Fetching
+def test_trimmed_articles(client, news_api):
+    """Only the rendered fields of the first page_size articles are kept"""
+    articles = client.get("aapl")
+    assert len(articles) == 5
+    assert set(articles[0]) == {"title", "url", "description", "publishedAt", "source"}
+    assert articles[0]["source"] == "Stub Wire"
+    assert news_api.requests[0]["q"] == ["AAPL"]
+    assert news_api.requests[0]["pageSize"] == ["5"]
+
+# 2. Test Caching
+def test_cache_hits(client, news_api):
+    """Repeated lookups are served from cache"""
+    client.get("AAPL")
+    client.get("AAPL")
+    client.get("aapl")
+    assert len(news_api.requests) == 1
+    assert client.stats["upstream_calls"] == 1
+    assert client.hit_ratio == pytest.approx(2 / 3)
+
+def test_ttl_expiry(news_api):
+    """Entries are refetched once their TTL passes"""
+    now = [0.0]
+    news_client = NewsClient("test-key", base_url=news_api.url, ttl=60, clock=lambda: now[0])
+    news_client.get("AAPL")
+    now[0] = 59
+    news_client.get("AAPL")
+    assert len(news_api.requests) == 1
+    now[0] = 61
+    news_client.get("AAPL")
+    assert len(news_api.requests) == 2
+
+def test_conditional_refresh(news_api):
+    """An expired entry is revalidated with its ETag and a 304 keeps the articles"""
+    now = [0.0]
+    news_client = NewsClient("test-key", base_url=news_api.url, ttl=60, clock=lambda: now[0])
+    news_api.etag = '"v1"'
+    articles = news_client.get("AAPL")
+    now[0] = 61
+    assert news_client.get("AAPL") == articles
+    assert news_api.headers[1]["If-None-Match"] == '"v1"'
+    assert news_client.stats["not_modified"] == 1
+    # Once the upstream has something new, it is fetched in full
+    news_api.etag = '"v2"'
+    now[0] = 122
+    assert news_client.get("AAPL") == articles and news_client.stats["not_modified"] == 1
+    assert len(news_api.requests) == 3
+    news_client.invalidate("AAPL")
+    news_client.get("AAPL")
+    assert "If-None-Match" not in news_api.headers[3]
+
+def test_concurrent_requests_coalesced(client, news_api):
+    """Concurrent requests for one ticker share a single upstream call"""
+    news_api.delay = 0.3
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(client.get, ["MSFT"] * 8))
+    assert len(news_api.requests) == 1
+    assert all(result == results[0] for result in results)
+    assert client.stats["coalesced"] == 7
+
+def test_prefetch_watchlist(client, news_api):
+    """Prefetching warms the cache for every ticker on the watchlist"""
+    for future in client.prefetch(["AAPL", "MSFT", "NVDA"]):
+        future.result()
+    assert len(news_api.requests) == 3
+    client.get("NVDA")
+    assert client.stats["hits"] == 1
+
+# 3. Test Error Handling
+def test_error_status_cached_briefly(news_api):
+    """Upstream errors return no articles and are not retried until error_ttl passes"""
+    now = [0.0]
+    news_client = NewsClient("test-key", base_url=news_api.url, error_ttl=30, clock=lambda: now[0])
+    news_api.status = 429
+    assert news_client.get("AAPL") == []
+    assert news_client.get("AAPL") == []
+    assert len(news_api.requests) == 1
+    news_api.status = 200
+    now[0] = 31
+    assert len(news_client.get("AAPL")) == 5
+
+def test_malformed_body_cached_briefly(news_api, capsys):
+    now = [0.0]
+    news_client = NewsClient("test-key", base_url=news_api.url, error_ttl=30, clock=lambda: now[0])
+    news_api.body = b"<html>Bad Gateway</html>"
+    assert news_client.get("AAPL") == []
+    assert news_client.get("AAPL") == []
+    assert len(news_api.requests) == 1
+    assert "Failed to fetch news" in capsys.readouterr().out
+
+def test_timeout(news_api):
+    """Slow upstream responses time out instead of blocking the page"""
+    news_api.delay = 1.5
+    news_client = NewsClient("test-key", base_url=news_api.url, timeout=(1, 0.2))
+    news_client.session.adapters["http://"].max_retries.total = 0
+    start = time.perf_counter()
+    assert news_client.get("AAPL") == []
+    assert time.perf_counter() - start < 1.5
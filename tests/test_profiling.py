@@ -0,0 +1,139 @@
+import pytest
+import threading
+import tracemalloc
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.profiling as profiling
+from utils.profiling import Profile, profiled, profiling_requested
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(200)]
+
+class BusyProfiler:
+    """Stands in for cProfile.Profile when another profiler already holds the hook"""
+
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+# ---- Fixtures ----
+@pytest.fixture
+def profiles():
+    return []
+
+# ---- Test Cases ----
+
+# 1. Test Profile
+def test_profile_saved_and_summarized(tmp_path):
+    with Profile("request", str(tmp_path)) as profile:
+        busy(20_000)
+        blocks = allocate()
+    assert profile.duration > 0 and profile.peak_kb >= 200
+    assert any(row["function"].startswith("busy (test_profiling.py") for row in profile.functions)
+    assert profile.functions == sorted(profile.functions, key=lambda row: row["cumulative_ms"], reverse=True)
+    assert any("test_profiling.py" in row["line"] and row["size_kb"] >= 200 for row in profile.allocations)
+    assert os.path.exists(profile.path)
+    with open(profile.path[: -len(".prof")] + ".txt") as f:
+        report = f.read()
+    assert report == profile.report() and "allocated at" in report
+    del blocks
+
+def test_tracemalloc_left_as_found(tmp_path):
+    assert not tracemalloc.is_tracing()
+    with Profile("request", str(tmp_path)):
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+    tracemalloc.start()
+    try:
+        with Profile("request", str(tmp_path)):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_save_error(tmp_path, capsys):
+    (tmp_path / "file").write_text("")
+    with Profile("request", str(tmp_path / "file")) as profile:
+        busy(100)
+    assert profile.path is None and profile.functions
+    assert "Error saving profile" in capsys.readouterr().out
+
+def test_failed_start_leaves_tracing_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "cProfile", SimpleNamespace(Profile=BusyProfiler))
+    with pytest.raises(ValueError):
+        with Profile("request", str(tmp_path)):
+            pass
+    assert not tracemalloc.is_tracing()
+
+def test_old_profiles_pruned(tmp_path):
+    kept = []
+    for _ in range(4):
+        with Profile("request", str(tmp_path), keep=2) as profile:
+            busy(100)
+        kept = (kept + [profile.path])[-2:]
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path[: -len(".prof")]) + extension for path in kept for extension in (".prof", ".txt")
+    )
+
+# 2. Test Decorator
+def test_disabled_does_nothing(tmp_path, profiles):
+    fn = profiled("busy", lambda: False, profiles.append, str(tmp_path))(busy)
+    assert fn(10) == busy(10) and fn.__name__ == "busy"
+    assert profiles == [] and os.listdir(tmp_path) == []
+
+def test_enabled_profiles_each_call(tmp_path, profiles):
+    fn = profiled("busy", lambda: True, profiles.append, str(tmp_path))(busy)
+    fn(10)
+    fn(10)
+    assert [p.name for p in profiles] == ["busy", "busy"] and len(os.listdir(tmp_path)) == 4
+
+def test_nested_calls_share_a_profile(tmp_path, profiles):
+    inner = profiled("inner", lambda: True, profiles.append, str(tmp_path))(busy)
+    outer = profiled("outer", lambda: True, profiles.append, str(tmp_path))(lambda: inner(1000))
+    outer()
+    assert [p.name for p in profiles] == ["outer"]
+    assert any(row["function"].startswith("busy") for row in profiles[0].functions)
+
+def test_profiled_on_error(tmp_path, profiles):
+    fn = profiled("fails", lambda: True, profiles.append, str(tmp_path))(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        fn()
+    assert profiles[0].path and not tracemalloc.is_tracing()
+
+def test_profiler_unavailable(tmp_path, profiles, monkeypatch, capsys):
+    monkeypatch.setattr(profiling, "cProfile", SimpleNamespace(Profile=BusyProfiler))
+    fn = profiled("busy", lambda: True, profiles.append, str(tmp_path))(busy)
+    assert fn(10) == busy(10)
+    assert profiles == [] and not tracemalloc.is_tracing()
+    assert "Error starting profile: Another profiling tool is already active" in capsys.readouterr().out
+
+def test_one_profile_at_a_time(tmp_path, profiles):
+    """A call made while another thread is profiled runs unprofiled"""
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=profiled("slow", lambda: True, profiles.append, str(tmp_path))(slow))
+    thread.start()
+    started.wait(5)
+    assert profiled("busy", lambda: True, profiles.append, str(tmp_path))(busy)(10) == busy(10)
+    release.set()
+    thread.join()
+    assert [p.name for p in profiles] == ["slow"]
+
+def test_env_switch(monkeypatch):
+    monkeypatch.delenv("FINOVAI_PROFILE", raising=False)
+    assert not profiling_requested()
+    monkeypatch.setenv("FINOVAI_PROFILE", "1")
+    assert profiling_requested()
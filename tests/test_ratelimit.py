@@ -0,0 +1,255 @@
+import pytest
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import Mock
+import requests
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.db
+import utils.ratelimit as ratelimit
+from benchmarks.stubs import FakeYFinance, LocalVectorIndex, StubEncoder
+from utils.ratelimit import AdaptiveConcurrency, RateLimiter, Throttled, TokenBucket, parse_limits, throttle_delay
+
+# ---- Fixtures ----
+class ThrottlingServer(ThreadingHTTPServer):
+    """Local API that allows rate requests a second (burst at once) and answers 429 beyond that"""
+    daemon_threads = True
+
+    def __init__(self, rate=20, burst=5, retry_after=True):
+        super().__init__(("127.0.0.1", 0), ThrottlingHandler)
+        self.rate = rate
+        self.burst = burst
+        self.retry_after = retry_after
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.counts = {200: 0, 429: 0}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/quote"
+
+    def take(self):
+        """Returns 0 when the request is allowed, else the seconds until it would be"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.counts[200] += 1
+                return 0
+            self.counts[429] += 1
+            return (1 - self.tokens) / self.rate
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        wait = self.server.take()
+        body = b"{}" if not wait else b'{"error": "rate limited"}'
+        self.send_response(429 if wait else 200)
+        if wait and self.server.retry_after:
+            self.send_header("Retry-After", f"{wait:.3f}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThrottlingServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as session:
+        yield session
+
+
+def take_tokens(path, count, results):
+    bucket = TokenBucket("shared", rate=20, burst=1, path=path)
+    for _ in range(count):
+        bucket.acquire()
+    results.put(time.time())
+
+# ---- Test Cases ----
+
+# 1. Test Throttle Detection
+def test_throttle_delay():
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Retry-After"] = "2"
+    assert throttle_delay(response) == 2.0
+    assert throttle_delay(requests.HTTPError(response=response)) == 2.0
+
+    class YFRateLimitError(Exception):
+        pass
+    assert throttle_delay(YFRateLimitError("Too Many Requests")) == 0.0
+    assert throttle_delay(Mock(status_code=200)) is None
+    assert throttle_delay(ValueError("bad symbol")) is None
+    assert parse_limits("groq=0.5:10:20, yahoo=2") == {"groq": (0.5, 10.0, 20.0), "yahoo": (2.0, 1.0, None)}
+
+# 2. Test Token Bucket
+def test_bucket_burst_then_rate(tmp_path):
+    now = [1000.0]
+    bucket = TokenBucket("groq", rate=2, burst=3, path=str(tmp_path / "rl.sqlite"), clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    # Out of tokens: each further reservation queues half a second behind the last
+    assert [bucket.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+    with pytest.raises(Throttled):
+        bucket.reserve(max_wait=1.0)
+    now[0] += 10
+    assert bucket.available() == 3
+
+def test_bucket_block(tmp_path):
+    now = [0.0]
+    bucket = TokenBucket("yahoo", rate=10, burst=10, path=str(tmp_path / "rl.sqlite"), clock=lambda: now[0])
+    bucket.block(2.0)
+    assert bucket.reserve() == pytest.approx(2.1)
+    # Callers queued behind the block are spread out at the normal rate
+    assert bucket.reserve() == pytest.approx(2.2)
+
+def test_bucket_shared_across_processes(tmp_path):
+    """Three processes share one budget: 30 tokens at 20/s take about 1.45s however they split"""
+    path = str(tmp_path / "rl.sqlite")
+    TokenBucket("shared", rate=20, burst=1, path=path)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    start = time.time()
+    workers = [context.Process(target=take_tokens, args=(path, 10, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+    finished = max(results.get(timeout=5) for _ in workers)
+    assert finished - start >= 1.4
+
+# 3. Test Adaptive Concurrency
+def test_aimd_limit():
+    limiter = AdaptiveConcurrency(initial=4, maximum=8, cooldown=60)
+    for _ in range(4):
+        limiter.on_success(0.1)
+    assert 4.8 < limiter.limit < 5
+    limiter.on_throttle()
+    limiter.on_throttle()
+    # The second 429 arrived within the cooldown and counts once
+    assert limiter.stats["decreases"] == 1
+    assert limiter.limit == pytest.approx(2.47, abs=0.02)
+    slow = AdaptiveConcurrency(initial=4, latency_target=0.5, cooldown=0)
+    slow.on_success(2.0)
+    assert slow.limit == 2
+
+def test_slots_cap_concurrency():
+    limiter = AdaptiveConcurrency(initial=2, maximum=2)
+    peak, active, lock = [0], [0], threading.Lock()
+
+    def work(_):
+        with limiter.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(8)))
+    assert peak[0] == 2
+
+# 4. Test Against A Throttling Server
+def test_limiter_keeps_to_the_ceiling(server, session, tmp_path):
+    """Through the limiter, 60 requests from 8 threads all succeed with almost no 429s"""
+    limiter = RateLimiter("stub", rate=20, burst=5, path=str(tmp_path / "rl.sqlite"), concurrency=8)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(lambda _: limiter.call(session.get, server.url).status_code, range(60)))
+    elapsed = time.perf_counter() - start
+    assert statuses == [200] * 60
+    assert server.counts[429] <= 3
+    # (60 - burst) / rate = 2.75s at the ceiling
+    assert 60 / elapsed > 0.8 * 20
+
+def test_unlimited_clients_cause_an_error_storm(server, session):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(lambda _: session.get(server.url).status_code, range(60)))
+    assert statuses.count(429) > 20
+
+def test_retries_after_throttling(server, session, tmp_path):
+    """Without a Retry-After header the limiter backs off exponentially, then gives up"""
+    server.retry_after = False
+    server.rate = 0.001
+    server.tokens = 0
+    limiter = RateLimiter("stub", rate=100, burst=100, path=str(tmp_path / "rl.sqlite"), retries=2, backoff=0.01)
+    with pytest.raises(Throttled):
+        limiter.call(session.get, server.url)
+    assert server.counts[429] == 3
+    assert limiter.stats["throttled"] == 3
+    assert limiter.concurrency.stats["decreases"] == 1
+
+def test_get_limiter(monkeypatch, tmp_path):
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+    monkeypatch.setenv("RATE_LIMITS", "off")
+    assert ratelimit.get_limiter("groq").call(lambda x: x * 2, 21) == 42
+    monkeypatch.setenv("RATE_LIMITS", "groq=5:2")
+    monkeypatch.setenv("RATE_LIMIT_PATH", str(tmp_path / "rl.sqlite"))
+    limiter = ratelimit.get_limiter("groq")
+    assert (limiter.bucket.rate, limiter.bucket.burst, limiter.concurrency.latency_target) == (5, 2, None)
+    assert ratelimit.get_limiter("groq") is limiter
+    yahoo = ratelimit.get_limiter("yahoo")
+    assert (yahoo.bucket.rate, yahoo.concurrency.latency_target) == (ratelimit.LIMITS["yahoo"][0], ratelimit.LIMITS["yahoo"][2])
+
+# 5. Test Stock Ingestion
+def test_ingestion_defers_throttled_tickers(monkeypatch, tmp_path):
+    """Throttling is waited out rather than recorded as failure; only real failures are"""
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+    monkeypatch.setenv("RATE_LIMITS", "yahoo=1000:1000,pinecone=1000:1000")
+    monkeypatch.setenv("RATE_LIMIT_PATH", str(tmp_path / "rl.sqlite"))
+    ratelimit.get_limiter("yahoo").backoff = 0.01
+
+    class YFRateLimitError(Exception):
+        pass
+    yfinance = FakeYFinance()
+    throttled = {"AAPL": 2, "MSFT": 1}
+    real_ticker = yfinance.Ticker
+
+    def ticker(symbol):
+        if throttled.get(symbol):
+            throttled[symbol] -= 1
+            raise YFRateLimitError("Too Many Requests. Rate limited. Try after a while.")
+        stock = real_ticker(symbol)
+        stock.info = {**stock.info, "symbol": symbol}
+        if symbol == "NOSUM":
+            del stock.info["longBusinessSummary"]
+        return stock
+    monkeypatch.setattr(utils.db, "yf", SimpleNamespace(Ticker=ticker))
+    monkeypatch.setattr(utils.db, "SentenceTransformer", StubEncoder)
+
+    successful, unsuccessful = tmp_path / "ok.txt", tmp_path / "failed.txt"
+    successful.write_text("TSLA\n")
+    index = LocalVectorIndex(768)
+    counts = utils.db.ingest_stocks(
+        index, ["AAPL", "MSFT", "NOSUM", "TSLA", "AAPL"],
+        successful_path=str(successful), unsuccessful_path=str(unsuccessful),
+    )
+    assert counts == {"ingested": 2, "failed": 1, "skipped": 2}
+    assert set(successful.read_text().split()) == {"TSLA", "AAPL", "MSFT"}
+    assert unsuccessful.read_text().split() == ["NOSUM"]
+    assert ratelimit.get_limiter("yahoo").stats["throttled"] == 3
+    space = index.namespaces[utils.db.STOCK_NAMESPACE]
+    assert set(space["ids"]) == {"AAPL", "MSFT"}
+    assert space["metadata"][space["ids"]["AAPL"]]["Ticker"] == "AAPL"
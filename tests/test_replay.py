@@ -0,0 +1,158 @@
+import pytest
+import threading
+import time
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FakeLLM, FakeNewsSession, FakeYFinance
+from utils.replay import (
+    HTTP_SESSION,
+    OPENAI,
+    YFINANCE,
+    ReplayMiss,
+    ReplayStore,
+    Replayer,
+    request_key,
+)
+
+MESSAGES = [{"role": "user", "content": "How should I invest?"}]
+
+# ---- Fixtures ----
+@pytest.fixture
+def store(tmp_path):
+    replay_store = ReplayStore(str(tmp_path / "replay.sqlite"))
+    yield replay_store
+    replay_store.close()
+
+
+def recorded(store, target, service, spec, use):
+    """Runs use(wrapped target) once in record mode"""
+    return use(Replayer("record", store).wrap(target, service, **spec))
+
+
+class Unpicklable:
+    """Response object that only survives storage through to_dict"""
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {"matches": [{"id": "a"}]}
+
+# ---- Test Cases ----
+
+# 1. Test Request Keys
+def test_request_key_normalization():
+    """Credentials, timeouts, key order and float noise don't change the key"""
+    a = request_key("newsapi", "get", ("url",), {"params": {"q": "AAPL", "apiKey": "1"}, "timeout": 3})
+    b = request_key("newsapi", "get", ("url",), {"params": {"apiKey": "2", "q": "AAPL"}})
+    assert a == b
+    assert request_key("pinecone", "query", (), {"vector": np.array([0.1 + 1e-12])}) == request_key(
+        "pinecone", "query", (), {"vector": [0.1]}
+    )
+    assert a != request_key("newsapi", "get", ("url",), {"params": {"q": "MSFT"}})
+
+# 2. Test Modes
+def test_passthrough_returns_target():
+    """Passthrough mode adds nothing between the app and the client"""
+    llm = FakeLLM()
+    replayer = Replayer("passthrough")
+    assert replayer.wrap(llm, "groq", **OPENAI) is llm
+    assert replayer.wrap_lazy(lambda: llm, "groq", **OPENAI) is llm
+
+def test_record_then_replay_offline(store):
+    """A recorded completion replays identically without calling the client"""
+    llm = FakeLLM()
+    live = recorded(store, llm, "groq", OPENAI, lambda c: c.chat.completions.create(model="m", messages=MESSAGES))
+    assert llm.calls == 1
+
+    def never_built():
+        raise AssertionError("the live client was built")
+
+    client = Replayer("replay", store).wrap_lazy(never_built, "groq", **OPENAI)
+    replayed = client.chat.completions.create(model="m", messages=MESSAGES)
+    assert replayed.choices[0].message.content == live.choices[0].message.content
+    assert llm.calls == 1
+
+def test_replay_miss(store):
+    client = Replayer("replay", store).wrap(FakeLLM(), "groq", **OPENAI)
+    with pytest.raises(ReplayMiss):
+        client.chat.completions.create(model="m", messages=MESSAGES)
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        Replayer("rewind")
+    with pytest.raises(ValueError):
+        Replayer("record")
+
+# 3. Test Clients
+def test_yfinance_navigation(store):
+    """Ticker(...).history and .info are recorded per symbol and arguments"""
+    yf = FakeYFinance()
+    recorded(store, yf, "yfinance", YFINANCE, lambda y: (y.Ticker("AAPL").history(period="1y"), y.Ticker("AAPL").info))
+    replayed = Replayer("replay", store).wrap(yf, "yfinance", **YFINANCE)
+    pd.testing.assert_frame_equal(replayed.Ticker("AAPL").history(period="1y"), yf.Ticker("AAPL").history(period="1y"))
+    assert replayed.Ticker("AAPL").info == yf.Ticker("AAPL").info
+    assert replayed.Ticker("AAPL").ticker == "AAPL"
+    with pytest.raises(ReplayMiss):
+        replayed.Ticker("AAPL").history(period="5y")
+
+def test_news_session(store):
+    """NewsAPI responses are keyed without the API key"""
+    session = FakeNewsSession()
+    recorded(store, session, "newsapi", HTTP_SESSION, lambda s: s.get("url", params={"q": "AAPL", "apiKey": "secret"}))
+    replayed = Replayer("replay", store).wrap(session, "newsapi", **HTTP_SESSION)
+    response = replayed.get("url", params={"q": "AAPL", "apiKey": "other"}, timeout=5)
+    assert response.status_code == 200
+    assert len(response.json()["articles"]) == 20
+    assert session.calls == 1
+
+def test_stream_recorded(store):
+    """Streams are stored as their chunks and replayed as a fresh iterator"""
+    llm = FakeLLM(completion_tokens=20)
+    live = recorded(store, llm, "groq", OPENAI, lambda c: c.chat.completions.create(model="m", messages=MESSAGES, stream=True))
+    live_text = "".join(chunk.choices[0].delta.content for chunk in live)
+    replayed = Replayer("replay", store).wrap(llm, "groq", **OPENAI).chat.completions.create(
+        model="m", messages=MESSAGES, stream=True
+    )
+    assert "".join(chunk.choices[0].delta.content for chunk in replayed) == live_text
+
+def test_unpicklable_response_stored_as_dict(store):
+    client = Replayer("record", store).wrap(type("Index", (), {"query": lambda self, **kw: Unpicklable()})(), "pinecone", calls=("query",))
+    client.query(top_k=1)
+    replayed = Replayer("replay", store).wrap(None, "pinecone", calls=("query",))
+    assert replayed.query(top_k=1) == {"matches": [{"id": "a"}]}
+
+# 4. Test Latency Injection
+def test_recorded_latency(store):
+    """Replays sleep the recorded latency, a fixed latency, or nothing"""
+    recorded(store, FakeLLM(latency=0.1), "groq", OPENAI, lambda c: c.chat.completions.create(model="m", messages=MESSAGES))
+
+    def replay_seconds(**kwargs):
+        client = Replayer("replay", store, **kwargs).wrap(None, "groq", **OPENAI)
+        start = time.perf_counter()
+        client.chat.completions.create(model="m", messages=MESSAGES)
+        return time.perf_counter() - start
+
+    assert replay_seconds() >= 0.1
+    assert 0.05 <= replay_seconds(latency_scale=0.5) < 0.1
+    assert replay_seconds(latency=None) < 0.05
+    assert replay_seconds(latency=0.02) >= 0.02
+
+# 5. Test Store
+def test_store_persists_compressed(store, tmp_path):
+    """Responses survive reopening the store and are stored compressed"""
+    recorded(store, FakeYFinance(), "yfinance", YFINANCE, lambda y: y.Ticker("AAPL").history(period="5y"))
+    reopened = ReplayStore(store.path)
+    try:
+        [(service, count, size, _)] = reopened.summary()
+        assert (service, count) == ("yfinance", 1)
+        assert size < FakeYFinance().Ticker("AAPL").history(period="5y").memory_usage().sum()
+        client = Replayer("replay", reopened, latency=None).wrap(None, "yfinance", **YFINANCE)
+        assert len(client.Ticker("AAPL").history(period="5y")) == 1260
+    finally:
+        reopened.close()
@@ -0,0 +1,67 @@
+import pytest
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.report import ReportBuilder, export_to_pdf
+import utils.utils as ut
+
+# ---- Fixtures ----
+@pytest.fixture
+def sample_user_profile():
+    """Sample user profile for testing"""
+    return {
+        "gender": "Male",
+        "age": 30,
+        "income": 8000,
+        "expenditure": 5000,
+        "savings": 50000,
+        "objective": "Growth",
+        "duration": 10
+    }
+
+@pytest.fixture
+def history():
+    return [(f"Question {i}", f"Answer {i} – with “smart quotes”") for i in range(5)]
+
+# ---- Test Cases ----
+
+# 1. Test Report Output
+def test_export_to_pdf(sample_user_profile, history):
+    """One-shot export produces a PDF even with non latin-1 characters"""
+    pdf = export_to_pdf(sample_user_profile, history)
+    assert pdf.startswith(b"%PDF")
+
+def test_incremental_matches_full(sample_user_profile, history):
+    """Appending answers one at a time gives the same document as building it at once"""
+    builder = ReportBuilder()
+    for i in range(1, len(history) + 1):
+        builder.to_bytes(sample_user_profile, history[:i])
+    assert builder.to_bytes(sample_user_profile, history) == export_to_pdf(sample_user_profile, history)
+
+# 2. Test Memoization
+def test_memoized_until_history_changes(sample_user_profile, history):
+    """Bytes are reused for the same profile and history and rebuilt on change"""
+    ut.RUN_COUNTS.clear()
+    builder = ReportBuilder()
+    first = builder.to_bytes(sample_user_profile, history, version=(len(history), 1.0))
+    assert builder.to_bytes(sample_user_profile, list(history)) is first
+    assert not builder.is_current(sample_user_profile, None)
+    builder.to_bytes(sample_user_profile, history, version=(len(history), 1.0))
+    assert builder.is_current(sample_user_profile, (len(history), 1.0))
+    assert ut.RUN_COUNTS["pdf"] == 1
+
+    assert not builder.is_current(sample_user_profile, (len(history) + 1, 2.0))
+    assert not builder.is_current(dict(sample_user_profile, age=45), (len(history), 1.0))
+    builder.to_bytes(sample_user_profile, history + [("Q", "A")], version=(len(history) + 1, 2.0))
+    assert ut.RUN_COUNTS["pdf"] == 2
+
+def test_rebuilds_after_reset(sample_user_profile, history):
+    """A changed profile or a reset history starts a fresh document"""
+    builder = ReportBuilder()
+    builder.to_bytes(sample_user_profile, history)
+    changed = dict(sample_user_profile, age=45)
+    assert builder.to_bytes(changed, history[:2]) == export_to_pdf(changed, history[:2])
+    assert builder.to_bytes(changed, [("New", "Start")]) == export_to_pdf(changed, [("New", "Start")])
@@ -0,0 +1,110 @@
+import pytest
+import csv
+import json
+import threading
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FakeLLM, stubbed_app
+from utils.screening import ResultWriter, main, read_jobs, screen
+
+# ---- Fixtures ----
+@pytest.fixture
+def app():
+    with stubbed_app(llm=FakeLLM(latency=0.05)) as app:
+        yield app
+
+
+class PeakCounter:
+    """Wraps fn and records the most calls in flight at once"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.active = self.peak = self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+# ---- Test Cases ----
+
+# 1. Test Inputs
+def test_read_jobs(tmp_path):
+    text = tmp_path / "q.txt"
+    text.write_text("EV makers\n\n# skipped\ncloud security\n")
+    assert read_jobs(str(text)) == [("EV makers", None), ("cloud security", None)]
+
+    table = tmp_path / "q.csv"
+    table.write_text('query,market_cap,recommendation_keys\nEV makers,1e9,"buy,hold"\ncloud security,,\n')
+    defaults = {"Market Cap": 0, "Volume": 10**4, "Recommendation Keys": ["buy"]}
+    jobs = read_jobs(str(table), defaults)
+    assert jobs[0] == ("EV makers", {"Market Cap": 1e9, "Volume": 10**4, "Recommendation Keys": ["buy", "hold"]})
+    assert jobs[1] == ("cloud security", defaults)
+
+    lines = tmp_path / "q.jsonl"
+    lines.write_text(json.dumps({"query": "banks", "volume": 500, "recommendation_keys": ["buy"]}) + "\n")
+    assert read_jobs(str(lines))[0][1]["Volume"] == 500
+
+# 2. Test Screening
+def test_screen_batches_and_bounds(app, monkeypatch):
+    """One encode for every query, and never more analyses in flight than allowed"""
+    embed = PeakCounter(app.embed_queries)
+    analyze = PeakCounter(app.analyze_stocks)
+    monkeypatch.setattr(app, "embed_queries", embed)
+    monkeypatch.setattr(app, "analyze_stocks", analyze)
+    jobs = [(f"cloud software {i}", None) for i in range(12)]
+    streamed = []
+    results, stats = screen(app, jobs, streamed.append, query_workers=6, analysis_workers=3)
+    assert embed.calls == 1
+    assert analyze.calls == 12 and 1 < analyze.peak <= 3
+    assert [r["query"] for r in results] == [q for q, _ in jobs]
+    assert sorted(r["query"] for r in streamed) == sorted(q for q, _ in jobs)
+    assert stats["ok"] == 12 and all(r["tickers"] and r["analysis"] for r in results)
+
+def test_screen_matches_perform_rag(app):
+    query, filters = "oil gas dividends", {"Market Cap": 10**8, "Volume": 10**4, "Recommendation Keys": ["buy", "hold"]}
+    matches, _ = app.perform_rag(query, filters)
+    results, _ = screen(app, [(query, filters)])
+    assert results[0]["tickers"] == [m["ticker"] for m in matches]
+
+def test_failures_are_recorded(app, monkeypatch, capsys):
+    real = app.analyze_stocks
+
+    def analyze(query, matches):
+        if query == "bad":
+            raise RuntimeError("LLM unavailable")
+        return real(query, matches)
+    monkeypatch.setattr(app, "analyze_stocks", analyze)
+    results, stats = screen(app, [("good", None), ("bad", None)])
+    assert (stats["ok"], stats["failed"]) == (1, 1)
+    assert results[1]["error"] == "LLM unavailable" and results[1]["tickers"]
+    assert "Error analyzing 'bad'" in capsys.readouterr().out
+
+# 3. Test Outputs
+def test_result_writer_formats(tmp_path):
+    result = {"query": "EV", "tickers": ["TSLA", "RIVN"], "names": ["Tesla", "Rivian"], "analysis": "Buy", "error": None, "seconds": 0.1}
+    for name in ["out.csv", "out.jsonl"]:
+        writer = ResultWriter(str(tmp_path / name))
+        writer.write(result)
+        writer.close()
+    assert list(csv.DictReader(open(tmp_path / "out.csv")))[0]["tickers"] == "TSLA RIVN"
+    assert json.loads((tmp_path / "out.jsonl").read_text()) == result
+
+def test_cli_offline(tmp_path, capsys):
+    queries = tmp_path / "q.txt"
+    queries.write_text("EV makers\ncloud security\n")
+    output = tmp_path / "out.jsonl"
+    results, stats = main([str(queries), "-o", str(output), "--offline", "--recommendation", "buy,hold"])
+    assert len(output.read_text().splitlines()) == 2 and stats["ok"] == 2
+    assert "queries/s" in capsys.readouterr().out
@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sentiment import SentimentScorer, describe_sentiment, sentiment_label
+
+# ---- Fixtures ----
+@pytest.fixture
+def scorer():
+    return SentimentScorer()
+
+@pytest.fixture
+def articles():
+    return {
+        "AAPL": [
+            {"title": "Apple beats estimates as iPhone sales surge", "description": "Record quarter.", "url": "https://a/1"},
+            {"title": "Apple unveils new product lineup", "description": "", "url": "https://a/2"},
+        ],
+        "XYZ": [
+            {"title": "XYZ shares plunge after fraud probe", "description": "Analysts downgrade the stock.", "url": "https://x/1"},
+        ],
+    }
+
+# ---- Test Cases ----
+
+# 1. Test Scoring
+def test_polarity(scorer):
+    """Positive, negative and neutral headlines score accordingly and stay in (-1, 1)"""
+    scores = scorer.score_texts(["Shares surge on strong growth", "Stock tumbles on weak outlook", "Company holds annual meeting"])
+    assert scores[0] > 0.5
+    assert scores[1] < -0.5
+    assert scores[2] == 0
+    assert np.all(np.abs(scores) < 1)
+
+def test_negation(scorer):
+    """Negators flip the words that follow them, but not across sentences"""
+    assert scorer.score_texts(["Earnings did not miss estimates"])[0] > 0
+    assert scorer.score_texts(["Margins aren't weak"])[0] > 0
+    assert scorer.score_texts(["No comment. Shares fall"])[0] < 0
+
+def test_batch_matches_single(scorer):
+    """Scoring a batch gives the same result as scoring each text alone"""
+    texts = ["Not a loss", "", "Profits rise", "never", "Shares drop"]
+    batch = scorer.score_texts(texts)
+    single = [scorer.score_texts([text])[0] for text in texts]
+    np.testing.assert_allclose(batch, single)
+
+# 2. Test Caching
+def test_articles_cached_by_url(scorer, articles):
+    """Articles already seen are not scored again"""
+    first = scorer.score_articles(articles)
+    scorer.score_texts = None  # any rescoring would now fail
+    again = scorer.score_articles({"AAPL": articles["AAPL"]})
+    assert again["AAPL"] == first["AAPL"]
+
+def test_cache_bounded(articles):
+    """The least recently used articles are evicted beyond cache_size"""
+    scorer = SentimentScorer(cache_size=2)
+    scorer.score_articles(articles)
+    assert list(scorer._cache) == ["https://a/2", "https://x/1"]
+
+def test_eviction_during_scoring(articles):
+    """A cached article evicted by another call while this one scores keeps its score"""
+    scorer = SentimentScorer(cache_size=2)
+    first = scorer.score_articles({"AAPL": articles["AAPL"][:1]})
+    score_texts = scorer.score_texts
+
+    def evict_meanwhile(texts):
+        scorer.score_texts = score_texts
+        scorer.score_articles({"XYZ": articles["XYZ"], "AAPL": articles["AAPL"][1:]})
+        return score_texts(texts)
+    scorer.score_texts = evict_meanwhile
+    result = scorer.score_articles({"AAPL": articles["AAPL"][:1], "NEW": [{"title": "Strong growth", "url": "https://n/1"}]})
+    assert result["AAPL"] == first["AAPL"] and len(result["NEW"]) == 1
+    assert len(scorer._cache) == 2
+
+# 3. Test Aggregation
+def test_ticker_signals(scorer, articles):
+    """Per-ticker signals average their article scores"""
+    signals = scorer.ticker_signals({**articles, "EMPTY": []})
+    assert signals["AAPL"]["label"] == "positive"
+    assert signals["AAPL"]["articles"] == 2
+    assert signals["AAPL"]["positive"] == 1
+    assert signals["XYZ"]["label"] == "negative"
+    assert "EMPTY" not in signals
+
+def test_describe_sentiment(scorer, articles):
+    lines = describe_sentiment(scorer.ticker_signals(articles))
+    assert len(lines) == 2
+    assert lines[0].startswith("Recent news sentiment for AAPL is positive")
+
+def test_labels():
+    assert sentiment_label(0.5) == "positive"
+    assert sentiment_label(0.0) == "neutral"
+    assert sentiment_label(-0.5) == "negative"
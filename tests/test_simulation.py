@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.allocation import compute_allocation
+from utils.simulation import (
+    allocation_to_weights,
+    project_profile,
+    simulate_portfolio,
+    summarize_projection,
+)
+
+# ---- Fixtures ----
+@pytest.fixture
+def sample_user_profile():
+    """Sample user profile for testing"""
+    return {
+        "gender": "Male",
+        "age": 30,
+        "income": 8000,
+        "expenditure": 5000,
+        "savings": 50000,
+        "objective": "Growth",
+        "duration": 10
+    }
+
+# ---- Test Cases ----
+
+# 1. Test Projection Output
+def test_projection_shape(sample_user_profile):
+    """Projection covers every month of the duration at each percentile"""
+    projection = project_profile(sample_user_profile, compute_allocation(sample_user_profile), n_paths=2000, seed=1)
+    assert projection["months"].shape == (120,)
+    assert set(projection["percentiles"]) == {5, 25, 50, 75, 95}
+    for values in projection["percentiles"].values():
+        assert values.shape == (120,)
+    assert projection["contributed"][-1] == 50000 + 3000 * 120
+
+def test_percentiles_ordered(sample_user_profile):
+    """Higher percentiles are never below lower percentiles"""
+    projection = project_profile(sample_user_profile, compute_allocation(sample_user_profile), n_paths=2000, seed=1)
+    bands = np.array(list(projection["percentiles"].values()))
+    assert (np.diff(bands, axis=0) >= 0).all()
+
+def test_chunking_matches_unchunked(sample_user_profile):
+    """Chunked simulation gives statistically the same bands as a single pass"""
+    allocation = compute_allocation(sample_user_profile)
+    full = project_profile(sample_user_profile, allocation, n_paths=20000, seed=1)
+    chunked = project_profile(sample_user_profile, allocation, n_paths=20000, chunk_months=7, seed=2)
+    np.testing.assert_allclose(chunked["percentiles"][50], full["percentiles"][50], rtol=0.02)
+
+def test_bond_heavy_portfolio_narrower():
+    """Bond/FD heavy portfolios have a narrower spread of outcomes than equity heavy ones"""
+    equity = simulate_portfolio([75, 10, 10, 5, 0, 0], 10000, 500, 20, n_paths=5000, seed=3)
+    bonds = simulate_portfolio([0, 0, 60, 40, 0, 0], 10000, 500, 20, n_paths=5000, seed=3)
+    spread = lambda p: p["percentiles"][95][-1] - p["percentiles"][5][-1]
+    assert spread(bonds) < spread(equity)
+
+def test_summarize_projection(sample_user_profile):
+    """Summary lists contributions followed by each percentile"""
+    projection = project_profile(sample_user_profile, compute_allocation(sample_user_profile), n_paths=1000, seed=1)
+    rows = summarize_projection(projection)
+    assert rows[0][0] == "Total Contributed"
+    assert len(rows) == 6
+
+# 2. Test Error Handling
+def test_invalid_allocation():
+    """Allocations must cover every asset class"""
+    with pytest.raises(ValueError):
+        allocation_to_weights([50, 50])
+    with pytest.raises(ValueError):
+        simulate_portfolio([75, 10, 10, 5, 0, 0], 10000, 500, 0)
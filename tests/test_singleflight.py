@@ -0,0 +1,179 @@
+import pytest
+import asyncio
+import threading
+import time
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FakeLLM, FakeYFinance
+from utils.singleflight import SingleFlight, make_key, singleflight
+
+N = 8
+
+# ---- Fixtures ----
+class SlowUpstream:
+    """Counts calls and takes long enough for concurrent callers to overlap"""
+    def __init__(self, delay=0.2, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return ("result", args, kwargs)
+
+
+def concurrently(fn, *args, n=N, **kwargs):
+    """Calls fn from n threads released at the same moment; returns results and errors"""
+    barrier = threading.Barrier(n)
+
+    def call(_):
+        barrier.wait()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            return e
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        return list(executor.map(call, range(n)))
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """Imports app.py with a slow fake LLM and yfinance"""
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    with patch("utils.db.initialize_pinecone"), patch("pinecone.Pinecone"):
+        sys.modules.pop("app", None)
+        app = importlib.import_module("app")
+    monkeypatch.setattr(app, "client", FakeLLM(latency=0.2))
+    monkeypatch.setattr(app, "yf", FakeYFinance(latency=0.2))
+    app.st.cache_data.clear()
+    yield app
+    app.st.cache_data.clear()
+    sys.modules.pop("app", None)
+
+# ---- Test Cases ----
+
+# 1. Test Threads
+def test_concurrent_identical_calls_share_one_execution():
+    upstream = SlowUpstream()
+    flight = SingleFlight()
+    results = concurrently(flight.do, "AAPL", upstream, "AAPL")
+    assert upstream.calls == 1
+    assert [result for result, _ in results] == [("result", ("AAPL",), {})] * N
+    assert sorted(shared for _, shared in results) == [False] + [True] * (N - 1)
+    assert flight.stats == {"calls": 1, "coalesced": N - 1}
+    assert flight.in_flight() == 0
+
+def test_different_keys_run_separately():
+    upstream = SlowUpstream()
+
+    @singleflight()
+    def fetch(ticker):
+        return upstream(ticker)
+
+    tickers = ["AAPL", "MSFT"] * (N // 2)
+    barrier = threading.Barrier(len(tickers))
+    with ThreadPoolExecutor(max_workers=len(tickers)) as executor:
+        results = list(executor.map(lambda t: (barrier.wait(), fetch(t))[1], tickers))
+    assert upstream.calls == 2
+    assert [args[0] for _, args, _ in results] == tickers
+
+def test_errors_are_shared_and_not_kept():
+    upstream = SlowUpstream(error=RuntimeError("upstream down"))
+
+    @singleflight()
+    def fetch(ticker):
+        return upstream(ticker)
+
+    results = concurrently(fetch, "AAPL")
+    assert upstream.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # Completed calls leave nothing behind, so the next call goes upstream again
+    upstream.error = None
+    assert fetch("AAPL")[0] == "result"
+    assert upstream.calls == 2
+
+def test_arguments_are_normalized():
+    upstream = SlowUpstream()
+
+    @singleflight()
+    def fetch(ticker, period="1y", **options):
+        return upstream(ticker, period)
+
+    calls = [
+        lambda: fetch("AAPL"),
+        lambda: fetch("AAPL", "1y"),
+        lambda: fetch(period="1y", ticker="AAPL"),
+        lambda: fetch("AAPL", period="1y"),
+    ]
+    barrier = threading.Barrier(len(calls))
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        list(executor.map(lambda call: (barrier.wait(), call()), calls))
+    assert upstream.calls == 1
+    assert make_key({"b": 1, "a": 2}) == make_key({"a": 2, "b": 1})
+
+# 2. Test Asyncio
+def test_concurrent_coroutines_share_one_execution():
+    calls = []
+
+    @singleflight()
+    async def fetch(ticker):
+        calls.append(ticker)
+        await asyncio.sleep(0.1)
+        return ticker.lower()
+
+    async def main():
+        return await asyncio.gather(*(fetch("AAPL") for _ in range(N)))
+
+    assert asyncio.run(main()) == ["aapl"] * N
+    assert calls == ["AAPL"]
+    assert fetch.flight.stats["coalesced"] == N - 1
+
+def test_coroutines_wait_on_threads():
+    upstream = SlowUpstream()
+    flight = SingleFlight()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(flight.do, "AAPL", upstream, "AAPL")
+        time.sleep(0.05)
+
+        async def main():
+            return await asyncio.gather(*(flight.do_async("AAPL", upstream, "AAPL") for _ in range(3)))
+
+        waiters = asyncio.run(main())
+    assert leader.result() == (("result", ("AAPL",), {}), False)
+    assert waiters == [(("result", ("AAPL",), {}), True)] * 3
+    assert upstream.calls == 1
+
+# 3. Test App Paths
+def test_stock_data_fetched_once(app_module):
+    """Concurrent cache misses for one ticker make a single yfinance call"""
+    ticker_calls = Mock(wraps=app_module.yf.Ticker)
+    app_module.yf.Ticker = ticker_calls
+    results = concurrently(app_module.fetch_stock_data, "AAPL")
+    assert ticker_calls.call_count == 1
+    assert all(info["shortName"] == results[0][0]["shortName"] for info, _ in results)
+
+def test_summary_completed_once(app_module):
+    results = concurrently(app_module.summarize_text, "Apple designs phones and computers.")
+    assert app_module.client.calls == 1
+    assert len(set(results)) == 1 and results[0] != app_module.SUMMARY_UNAVAILABLE
+
+def test_completion_coalesced_per_client_and_request(app_module):
+    messages = [{"role": "user", "content": "How should I invest?"}]
+    results = concurrently(app_module.create_completion, app_module.client, "llama-3.1-8b-instant", messages)
+    assert app_module.client.calls == 1
+    assert len({r.choices[0].message.content for r in results}) == 1
+    # A different request is its own call
+    app_module.create_completion(app_module.client, "llama-3.1-8b-instant", [{"role": "user", "content": "Other"}])
+    assert app_module.client.calls == 2
@@ -0,0 +1,109 @@
+import pytest
+import importlib
+import threading
+import time
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.testclient import TestClient
+from benchmarks.stubs import FakeLLM, FakeNewsSession, StubEncoder, stubbed_app
+import utils.warmup as warmup_module
+from utils.metrics import MetricsRegistry
+from utils.warmup import Warmup, load_model, warmup_enabled, warmup_tickers
+
+# ---- Fixtures ----
+@pytest.fixture(autouse=True)
+def models(monkeypatch):
+    monkeypatch.setattr(warmup_module, "_models", {})
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+# ---- Test Cases ----
+
+# 1. Test Model Cache
+def test_model_loaded_once():
+    loads = StubEncoder.loads
+    threads = [threading.Thread(target=load_model, args=(StubEncoder, "sentence-transformers/all-mpnet-base-v2")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    model = load_model(StubEncoder, "sentence-transformers/all-mpnet-base-v2")
+    assert StubEncoder.loads == loads + 1
+    assert load_model(StubEncoder, "BAAI/bge-large-en-v1.5") is not model
+
+# 2. Test Warmup
+def test_tasks_run_in_background(registry):
+    release = threading.Event()
+    warmup = Warmup([("slow", release.wait), ("fast", lambda: None)], workers=2, registry=registry).start()
+    assert not warmup.wait(0.2)
+    progress = warmup.progress()
+    assert progress["ready"] is False and progress["done"] == 1 and progress["running"] == 1
+    assert progress["tasks"]["slow"]["state"] == "running"
+    release.set()
+    assert warmup.wait(5)
+    assert warmup.progress()["done"] == 2 and warmup.duration >= 0.2
+    assert registry.histograms["warmup.slow"].count == 1
+
+def test_failed_task_still_ready(registry, capsys):
+    def fail():
+        raise RuntimeError("index unreachable")
+    warmup = Warmup([("index", fail), ("model", lambda: None)], registry=registry).start()
+    assert warmup.wait(5)
+    progress = warmup.progress()
+    assert progress["failed"] == 1 and progress["tasks"]["index"]["state"] == "failed"
+    assert registry.errors["warmup.index"] == 1
+    assert "Error warming up index: index unreachable" in capsys.readouterr().out
+
+def test_no_tasks():
+    assert Warmup([]).start().ready.is_set()
+
+def test_settings(monkeypatch):
+    monkeypatch.setenv("WARMUP_TICKERS", "aapl, msft,,")
+    assert warmup_tickers() == ["AAPL", "MSFT"]
+    monkeypatch.setenv("WARMUP", "off")
+    assert not warmup_enabled()
+
+# 3. Test App
+def test_first_requests_after_warmup():
+    llm, news_session = FakeLLM(), FakeNewsSession()
+    with stubbed_app(llm=llm, news_session=news_session) as app:
+        app.st.cache_data.clear()
+        warmup = Warmup(app.warmup_tasks(["AAPL"])).start()
+        assert warmup.wait(30)
+        assert warmup.progress()["failed"] == 0
+        loads, llm_calls, news_calls = StubEncoder.loads, llm.calls, news_session.calls
+        # The Company Research page for a warmed ticker and its news are served from cache
+        app.warm_company("AAPL")
+        app.fetch_news("AAPL")
+        assert (llm.calls, news_session.calls) == (llm_calls, news_calls)
+        # and a stock search doesn't load the model again
+        app.perform_rag("software cloud growth", None)
+        assert StubEncoder.loads == loads
+        app.st.cache_data.clear()
+
+def test_api_readiness(monkeypatch):
+    monkeypatch.setenv("WARMUP", "on")
+    release = threading.Event()
+    advisor = SimpleNamespace(
+        perform_rag=lambda query, filters: None,
+        start_warmup=lambda: Warmup([("model", release.wait)]).start(),
+    )
+    api = importlib.import_module("api")
+    with TestClient(api.create_api(advisor)) as client:
+        response = client.get("/ready")
+        assert response.status_code == 503 and response.json()["warmup"]["tasks"]["model"]["state"] == "running"
+        release.set()
+        for _ in range(50):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.05)
+        assert client.get("/ready").json() == {"ready": True}
+        assert client.get("/health").json()["warmup"]["done"] == 1
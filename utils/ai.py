@@ -4,15 +4,27 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from sentence_transformers import SentenceTransformer
 from utils.prompts import financial_advisor_prompt
+from utils.allocation import compute_allocation, format_allocation
+from utils.metrics import span, timed
+from utils.replay import REPLAY, OPENAI
+from utils.singleflight import make_key, singleflight
+from utils.ratelimit import get_limiter
+from utils.cache import cached
+from utils.investors import describe_investors, get_investor_index
+from utils.warmup import load_model
+from utils.local_llm import get_local_generator
 
 # Load environment variables
 load_dotenv()
 HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+# Survey respondents closest to the user's profile whose preferences go in the prompt
+SIMILAR_INVESTORS = 5
 
 client = OpenAI(
     base_url="https://api.groq.com/openai/v1",
     api_key=os.getenv("GROQ_API_KEY")
 )
+client = REPLAY.wrap(client, "groq", **OPENAI)
 
 def setup_chat_model(client, system_prompt):
     def generate_chat_response(query):
@@ -40,44 +52,74 @@ def setup_retrieval_chain(client, pinecone_index, embedding_model, system_prompt
     
     return chat_model, retriever
 
-def generate_response(pipe, messages):
+def generate_response(messages, max_new_tokens=None):
+    """
+    Answers chat messages with the local model (LOCAL_LLM_MODEL), batched with any
+    other local requests
+    """
+    generator = get_local_generator()
+    if generator is None:
+        return "An error occurred: LOCAL_LLM_MODEL is not set"
     try:
-        # Optimize generation parameters
-        response = pipe(
-            messages,
-            max_length=512,  # Reduced from 2048 for faster responses
-            num_return_sequences=1,
-            do_sample=True,
-            temperature=0.7,
-            top_p=0.95,
-            top_k=50,
-            pad_token_id=pipe.tokenizer.eos_token_id,
-            repetition_penalty=1.1,
-            truncation=True,
-        )
-
-        if response and isinstance(response, list) and len(response) > 0:
-            return response[0]["generated_text"]
-        return "I apologize, but I couldn't generate a response. Please try again."
-
+        return generator.generate(messages, max_new_tokens)
     except Exception as e:
         print(f"Error generating response: {str(e)}")
         return f"An error occurred: {str(e)}"
 
+@cached("llm", key=lambda client, model, messages: make_key(model, messages))
+@singleflight(key=lambda client, model, messages: (id(client), model, make_key(messages)))
+def create_completion(client, model, messages):
+    """
+    Chat completion; concurrent identical requests share one upstream call, and calls
+    wait their turn under Groq's rate limit instead of failing over on a 429
+    """
+    return get_limiter("groq").call(client.chat.completions.create, model=model, messages=messages)
+
+@timed("advisor.embedding")
+@cached("embeddings", key=lambda text, model_name: make_key(text, model_name))
+@singleflight()
 def get_huggingface_embeddings(text, model_name="sentence-transformers/all-mpnet-base-v2"):
-    model = SentenceTransformer(model_name)
+    model = load_model(SentenceTransformer, model_name)
     return model.encode(text)
 
-def perform_chat_rag(query, user_profile, pinecone_index):
+def stream_completion(client, models, messages):
+    """
+    Streams a chat completion as text chunks, trying each model in turn until one
+    starts, then the local model when there is one; a model that fails mid-stream
+    is not retried
+    """
+    for i, model in enumerate(models):
+        try:
+            stream = get_limiter("groq").call(client.chat.completions.create, model=model, messages=messages, stream=True)
+            break
+        except Exception as e:
+            print(f"Error starting chat stream with {model}: {str(e)}")
+            if i == len(models) - 1:
+                generator = get_local_generator()
+                if generator is None:
+                    raise
+                yield from generator.stream(messages)
+                return
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def build_chat_messages(query, user_profile, pinecone_index, history=None):
+    """
+    Retrieves advice context for the query and returns the advisor's prompt messages;
+    history (from RollingMemory.context) carries the earlier turns, with the question
+    repeated after them
+    """
     # embed the query
     raw_query_embedding = get_huggingface_embeddings(query)
     
     # find the top matches from finov1 index
-    top_matches = pinecone_index.query(
-        vector=raw_query_embedding.tolist(),
-        top_k=5,
-        include_metadata=True
-    )
+    with span("advisor.pinecone_query"):
+        top_matches = pinecone_index.query(
+            vector=raw_query_embedding.tolist(),
+            top_k=5,
+            include_metadata=True
+        )
 
     # Create context from matches
     context = "Based on our financial database:\n"
@@ -85,6 +127,16 @@ def perform_chat_rag(query, user_profile, pinecone_index):
         if 'text' in match['metadata']:
             context += f"\n- {match['metadata']['text']}"
 
+    # Preferences of the most similar survey respondents, compared on the profile's fields
+    investors = get_investor_index()
+    if investors is not None:
+        with span("advisor.similar_investors"):
+            lines = describe_investors(investors.query(user_profile, SIMILAR_INVESTORS))
+        context += "\n\nSimilar investors:\n" + "\n".join(f"- {line}" for line in lines)
+
+    # Solve the allocation rules locally so the LLM only has to explain them
+    allocation = compute_allocation(user_profile)
+
     # Format the prompt using the template
     formatted_prompt = financial_advisor_prompt.format(
         gender=user_profile['gender'],
@@ -94,24 +146,56 @@ def perform_chat_rag(query, user_profile, pinecone_index):
         savings=user_profile['savings'],
         objective=user_profile['objective'],
         duration=user_profile['duration'],
-        user_question=f"{query}\n\nAdditional Context:\n{context}"
+        user_question=f"{query}\n\nAdditional Context:\n{context}",
+        allocation=format_allocation(user_profile, allocation)
     )
+    if history:
+        return [{"role": "system", "content": formatted_prompt}, *history, {"role": "user", "content": query}]
+    return [{"role": "system", "content": formatted_prompt}]
+
+@timed("advisor")
+def perform_chat_rag(query, user_profile, pinecone_index, history=None):
+    messages = build_chat_messages(query, user_profile, pinecone_index, history)
 
     try:
-        llm_response = client.chat.completions.create(
-            model='llama-3.1-70b-versatile',
-            messages=[
-                {"role": "system", "content": formatted_prompt}
-            ]
-        )
+        with span("advisor.completion"):
+            llm_response = create_completion(
+                client,
+                model='llama-3.1-70b-versatile',
+                messages=messages
+            )
         return llm_response.choices[0].message.content
     except Exception as e:
         print(f"Error in chat completion: {str(e)}")
         # Fallback to smaller model
-        llm_response = client.chat.completions.create(
-            model='llama-3.1-8b-instant',
-            messages=[
-                {"role": "system", "content": formatted_prompt}
-            ]
-        )
-        return llm_response.choices[0].message.content
+        try:
+            with span("advisor.completion_fallback"):
+                llm_response = create_completion(
+                    client,
+                    model='llama-3.1-8b-instant',
+                    messages=messages
+                )
+            return llm_response.choices[0].message.content
+        except Exception as e:
+            # Then to the local model, when Groq is down altogether
+            generator = get_local_generator()
+            if generator is None:
+                raise
+            print(f"Error in fallback chat completion: {str(e)}")
+            with span("advisor.completion_local"):
+                return generator.generate(messages)
+
+def summarize_conversation(summary, turns, max_tokens):
+    """
+    Folds advisor turns into the running conversation summary, for RollingMemory
+    """
+    transcript = "\n".join(f"Question: {question}\nAnswer: {answer}" for question, answer in turns)
+    response = create_completion(
+        client,
+        model='llama-3.1-8b-instant',
+        messages=[
+            {"role": "system", "content": f"You keep a running summary of an investment advice conversation. Merge the new turns into the summary in at most {max_tokens * 3 // 4} words, keeping the user's goals, constraints, figures and the advice given."},
+            {"role": "user", "content": f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+        ]
+    )
+    return response.choices[0].message.content
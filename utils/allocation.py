@@ -0,0 +1,141 @@
+import numpy as np
+
+
+# Asset classes and bands (in %) from get_portfolio_guidelines, in a fixed order
+ASSET_CLASSES = [
+    "Equity/Stocks",
+    "Mutual Funds",
+    "Government Bonds",
+    "Fixed Deposits",
+    "Gold",
+    "Others",
+]
+MIN_BANDS = np.array([0, 0, 10, 5, 0, 0], dtype=float)
+MAX_BANDS = np.array([75, 50, 60, 40, 25, 20], dtype=float)
+
+# Starting mix for each time horizon bucket before the age and surplus rules apply
+HORIZONS = ["Short", "Medium", "Long"]
+HORIZON_TARGETS = np.array(
+    [
+        [15, 15, 35, 25, 5, 5],  # Short (<5 years)
+        [35, 25, 20, 10, 5, 5],  # Medium (5-10 years)
+        [55, 20, 10, 5, 5, 5],  # Long (>10 years)
+    ],
+    dtype=float,
+)
+
+# Conservative tilt: share of equity and mutual fund weight moved into bonds / FDs
+CONSERVATIVE_SURPLUS_RATIO = 0.2
+CONSERVATIVE_SHIFT = 0.4
+CONSERVATIVE_SPLIT = np.array([0, 0, 0.6, 0.4, 0, 0], dtype=float)
+
+_BISECTION_STEPS = 50
+
+
+def horizon_bucket(durations):
+    """
+    Maps investment durations (years) to horizon bucket indices (0=Short, 1=Medium, 2=Long)
+    """
+    durations = np.asarray(durations, dtype=float)
+    return np.where(durations < 5, 0, np.where(durations <= 10, 1, 2))
+
+
+def _project_to_bands(targets, lower, upper, total=100.0):
+    """
+    Finds the closest weights to targets that lie within [lower, upper] and sum to total.
+
+    Solves for a per-row shift t such that sum(clip(targets + t, lower, upper)) == total
+    by bisection, which is vectorized across all rows at once.
+    """
+    lo = np.full(targets.shape[0], -total)
+    hi = np.full(targets.shape[0], total)
+    for _ in range(_BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        sums = np.clip(targets + mid[:, None], lower, upper).sum(axis=1)
+        too_low = sums < total
+        lo = np.where(too_low, mid, lo)
+        hi = np.where(too_low, hi, mid)
+    return np.clip(targets + hi[:, None], lower, upper)
+
+
+def _round_to_total(weights, total=100):
+    """
+    Rounds weights to whole percentages with the largest remainder method.
+
+    Bands are whole numbers, so flooring never drops below a lower band and the
+    rows that get rounded up had a fractional part, so never exceed an upper band.
+    """
+    floored = np.floor(weights + 1e-9)
+    remainder = np.rint(total - floored.sum(axis=1)).astype(int)
+    fractions = weights - floored
+    order = np.argsort(-fractions, axis=1, kind="stable")
+    ranks = np.argsort(order, axis=1)
+    return (floored + (ranks < remainder[:, None])).astype(int)
+
+
+def compute_allocations(ages, durations, incomes, expenditures):
+    """
+    Computes rule-based portfolio allocations for a batch of profiles.
+
+    Returns an (n, len(ASSET_CLASSES)) integer array of percentages where every row
+    sums to 100 and every column lies within MIN_BANDS / MAX_BANDS.
+    """
+    ages = np.atleast_1d(np.asarray(ages, dtype=float))
+    durations = np.atleast_1d(np.asarray(durations, dtype=float))
+    incomes = np.atleast_1d(np.asarray(incomes, dtype=float))
+    expenditures = np.atleast_1d(np.asarray(expenditures, dtype=float))
+    n = np.broadcast_shapes(ages.shape, durations.shape, incomes.shape, expenditures.shape)[0]
+
+    targets = HORIZON_TARGETS[np.broadcast_to(horizon_bucket(durations), (n,))].copy()
+
+    # Conservative allocation if surplus < 20% of income
+    conservative = np.broadcast_to(is_conservative(incomes, expenditures), (n,))
+    shifted = targets[:, :2] * CONSERVATIVE_SHIFT
+    targets[:, :2] -= np.where(conservative[:, None], shifted, 0)
+    targets += np.where(conservative[:, None], shifted.sum(axis=1, keepdims=True) * CONSERVATIVE_SPLIT, 0)
+
+    # Age-based risk capacity: 100 - age = max equity exposure
+    upper = np.tile(MAX_BANDS, (n, 1))
+    upper[:, 0] = max_equity(np.broadcast_to(ages, (n,)))
+    lower = np.tile(MIN_BANDS, (n, 1))
+
+    return _round_to_total(_project_to_bands(targets, lower, upper))
+
+
+def max_equity(ages):
+    """
+    Returns the maximum equity exposure (100 - age, within the equity band) in whole percent
+    """
+    return np.clip(np.floor(100 - np.asarray(ages, dtype=float)), MIN_BANDS[0], MAX_BANDS[0])
+
+
+def is_conservative(incomes, expenditures):
+    """
+    Returns True where the monthly surplus is below 20% of income
+    """
+    incomes = np.asarray(incomes, dtype=float)
+    surplus = incomes - np.asarray(expenditures, dtype=float)
+    return surplus < CONSERVATIVE_SURPLUS_RATIO * np.maximum(incomes, 0)
+
+
+def compute_allocation(profile):
+    """
+    Computes the rule-based allocation for a single user profile as {asset class: percent}
+    """
+    weights = compute_allocations(
+        profile["age"], profile["duration"], profile["income"], profile["expenditure"]
+    )[0]
+    return dict(zip(ASSET_CLASSES, weights.tolist()))
+
+
+def format_allocation(profile, allocation):
+    """
+    Renders a computed allocation and the rules that produced it for the LLM prompt
+    """
+    horizon = HORIZONS[int(horizon_bucket(profile["duration"]))]
+    conservative = bool(is_conservative(profile["income"], profile["expenditure"]))
+    lines = [f"- {asset}: {percent}%" for asset, percent in allocation.items()]
+    lines.append(f"- Time Horizon: {horizon}")
+    lines.append(f"- Max Equity Exposure (100 - age): {int(max_equity(profile['age']))}%")
+    lines.append(f"- Conservative Allocation Applied: {'Yes' if conservative else 'No'}")
+    return "\n".join(lines)
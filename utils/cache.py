@@ -0,0 +1,555 @@
+import functools
+import hashlib
+import hmac
+import inspect
+import os
+import pickle
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from utils.singleflight import make_key
+
+try:
+    import msgpack
+except ImportError:  # optional; values are pickled without it
+    msgpack = None
+
+
+DEFAULT_URL = "memory://"
+# Seconds entries live in each namespace the app uses
+CACHE_TTLS = {
+    "market_data": 15 * 60,
+    "news": 15 * 60,
+    "summaries": 24 * 60 * 60,
+    "embeddings": 30 * 24 * 60 * 60,
+    "llm": 60 * 60,
+}
+# Namespaces whose values (DataFrames, SDK responses) can only be pickled
+PICKLED_NAMESPACES = {"market_data", "llm"}
+# Payloads at least this large are zlib-compressed when that makes them smaller
+COMPRESS_MIN = 1024
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+_ARRAY_EXT = 1
+_TUPLE_EXT = 2
+_MISSING = object()
+
+
+# ---- Serialization ----
+# One leading byte says how the rest is encoded: "n" raw NumPy array, "m" msgpack,
+# "p" pickle; upper case means the rest is zlib-compressed.
+
+def _pack_array(array):
+    header = f"{array.dtype.str}|{','.join(map(str, array.shape))}".encode()
+    return len(header).to_bytes(2, "big") + header + np.ascontiguousarray(array).tobytes()
+
+
+def _unpack_array(data):
+    size = int.from_bytes(data[:2], "big")
+    dtype, shape = data[2 : 2 + size].decode().split("|")
+    shape = tuple(int(n) for n in shape.split(",") if n)
+    return np.frombuffer(data[2 + size :], dtype=np.dtype(dtype)).reshape(shape).copy()
+
+
+def _msgpack_default(value):
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_TUPLE_EXT, _msgpack_dumps(list(value)))
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        return msgpack.ExtType(_ARRAY_EXT, _pack_array(value))
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    raise TypeError(f"Can't msgpack {type(value).__name__}")
+
+
+def _msgpack_ext(code, data):
+    if code == _ARRAY_EXT:
+        return _unpack_array(data)
+    if code == _TUPLE_EXT:
+        return tuple(_msgpack_loads(data))
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_dumps(value):
+    # strict_types sends tuples to the default hook, so they come back as tuples
+    return msgpack.packb(value, default=_msgpack_default, strict_types=True, use_bin_type=True)
+
+
+def _msgpack_loads(data):
+    return msgpack.unpackb(data, ext_hook=_msgpack_ext, raw=False, strict_map_key=False)
+
+
+def dumps(value, allow_pickle=True):
+    """
+    Serializes a value compactly: arrays as raw bytes, plain data as msgpack when
+    installed, anything else (DataFrames, SDK responses) as pickle unless
+    allow_pickle is false, in which case it raises TypeError
+    """
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        kind, payload = b"n", _pack_array(value)
+    else:
+        kind, payload = b"p", None
+        if msgpack is not None:
+            try:
+                kind, payload = b"m", _msgpack_dumps(value)
+            except (TypeError, ValueError, OverflowError):
+                pass
+        if payload is None:
+            if not allow_pickle:
+                raise TypeError(f"Won't pickle {type(value).__name__} for an unsigned shared cache")
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) >= COMPRESS_MIN:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            return kind.upper() + compressed
+    return kind + payload
+
+
+def loads(data, allow_pickle=True):
+    kind, payload = data[:1], data[1:]
+    if kind.isupper():
+        kind, payload = kind.lower(), zlib.decompress(payload)
+    if kind == b"n":
+        return _unpack_array(payload)
+    if kind == b"m":
+        if msgpack is None:
+            raise ValueError("Cached value needs msgpack to decode")
+        return _msgpack_loads(payload)
+    if not allow_pickle:
+        raise ValueError("Refusing to unpickle a value from an unsigned shared cache")
+    return pickle.loads(payload)
+
+
+def sign(data, secret):
+    """
+    Prefixes data with its HMAC-SHA256 under secret
+    """
+    return hmac.new(secret, data, hashlib.sha256).digest() + data
+
+
+def verify(data, secret):
+    """
+    Returns the data sign() was given, or raises ValueError if it was signed with
+    another secret or altered since
+    """
+    signature, data = data[:SIGNATURE_SIZE], data[SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, hmac.new(secret, data, hashlib.sha256).digest()):
+        raise ValueError("Cached value has a bad signature")
+    return data
+
+
+# ---- Backends ----
+# Backends store bytes under string keys: get(key), set(key, value, ttl), delete(*keys),
+# incr(key) and close(). TTLs are in seconds; None keeps the entry until evicted.
+# shared is true when other machines can write entries this process reads.
+
+class NullBackend:
+    """
+    Stores nothing; every lookup misses
+    """
+
+    shared = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def close(self):
+        pass
+
+
+class MemoryBackend:
+    """
+    LRU dict with per-entry expiry, private to this process. Counters are kept apart
+    from the LRU, so a namespace version is never evicted.
+    """
+
+    shared = False
+
+    def __init__(self, max_entries=4096, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires = self.clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._counters.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def close(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class SQLiteBackend:
+    """
+    Cache file on local disk, shared by the processes on one machine. Expired rows
+    are skipped on read and purged every purge_every writes.
+    """
+
+    shared = False
+
+    def __init__(self, path="data/cache.sqlite", clock=time.time, purge_every=1000):
+        self.path = path
+        self.clock = clock
+        self.purge_every = purge_every
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, self.clock())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        expires = self.clock() + ttl if ttl else None
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, value, expires))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._db.execute("DELETE FROM cache WHERE expires <= ?", (self.clock(),))
+
+    def delete(self, *keys):
+        with self._lock:
+            self._db.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+
+    def incr(self, key):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                value = int(row[0]) + 1 if row else 1
+                self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, NULL)", (key, str(value).encode()))
+                self._db.execute("COMMIT")
+                return value
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RedisError(Exception):
+    pass
+
+
+class _RESPConnection:
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts += [f"${len(arg)}\r\n".encode(), arg, b"\r\n"]
+        self.sock.sendall(b"".join(parts))
+
+    def read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self.reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self.read() for _ in range(size)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RedisBackend:
+    """
+    Minimal RESP client for Redis (or anything that speaks its protocol) so replicas
+    share one cache. Connections are pooled; one that fails is dropped and the error
+    raised, and the next command opens a fresh one.
+    """
+
+    shared = True
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=2.0, pool_size=8):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        connection = _RESPConnection(self.host, self.port, self.timeout)
+        if self.password:
+            connection.send("AUTH", self.password)
+            connection.read()
+        if self.db:
+            connection.send("SELECT", self.db)
+            connection.read()
+        return connection
+
+    def execute(self, *args):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            connection.send(*args)
+            reply = connection.read()
+        except RedisError:
+            self._release(connection)
+            raise
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection)
+        return reply
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def get(self, key):
+        return self.execute("GET", key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.execute("SET", key, value, "PX", int(ttl * 1000))
+        else:
+            self.execute("SET", key, value)
+
+    def delete(self, *keys):
+        if keys:
+            self.execute("DEL", *keys)
+
+    def incr(self, key):
+        return self.execute("INCR", key)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def backend_from_url(url):
+    """
+    Builds a backend from memory://?max_entries=N, sqlite:///relative/path.sqlite,
+    redis://[:password@]host:port/db or none://
+    """
+    parsed = urlparse(url)
+    options = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+    if parsed.scheme == "memory":
+        return MemoryBackend(int(options.get("max_entries", 4096)))
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(parsed.path[1:] or "data/cache.sqlite")
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisBackend(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, parsed.password)
+    if parsed.scheme == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown cache backend {url!r}")
+
+
+class Cache:
+    """
+    One namespace of a backend. Keys are hashed under the namespace's version, so
+    invalidate() drops every entry for all replicas at once by bumping the version;
+    the old entries age out by TTL. Each process re-reads the version at most every
+    version_ttl seconds, which bounds how long another replica can serve stale
+    entries. Backend errors are printed and treated as misses, so a cache outage
+    only costs speed.
+
+    With a secret, entries are signed and ones that fail verification are misses.
+    Unpickling runs code, so on a shared backend without a secret values that need
+    pickle are neither stored nor loaded.
+    """
+
+    def __init__(self, backend, namespace, ttl=None, version_ttl=1.0, clock=time.monotonic, secret=None):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self.clock = clock
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.allow_pickle = bool(self.secret) or not backend.shared
+        self.stats = Counter()
+        self._version = None
+        self._version_read = float("-inf")
+
+    def version(self):
+        now = self.clock()
+        if self._version is None or now - self._version_read >= self.version_ttl:
+            raw = self.backend.get(f"{self.namespace}:version")
+            self._version = int(raw) if raw else 0
+            self._version_read = now
+        return self._version
+
+    def _key(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return f"{self.namespace}:{self.version()}:{digest}"
+
+    def get(self, key, default=None):
+        try:
+            raw = self.backend.get(self._key(key))
+            if raw is None:
+                self.stats["misses"] += 1
+                return default
+            if self.secret:
+                raw = verify(raw, self.secret)
+            value = loads(raw, self.allow_pickle)
+        except Exception as e:
+            print(f"Error reading {self.namespace} cache: {str(e)}")
+            self.stats["errors"] += 1
+            return default
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        try:
+            data = dumps(value, self.allow_pickle)
+            if self.secret:
+                data = sign(data, self.secret)
+            self.backend.set(self._key(key), data, ttl or self.ttl)
+            self.stats["sets"] += 1
+        except Exception as e:
+            print(f"Error writing {self.namespace} cache: {str(e)}")
+            self.stats["errors"] += 1
+
+    def delete(self, key):
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            print(f"Error deleting from {self.namespace} cache: {str(e)}")
+
+    def invalidate(self):
+        """
+        Drops every entry in the namespace, for every process sharing the backend
+        """
+        self._version = self.backend.incr(f"{self.namespace}:version")
+        self._version_read = self.clock()
+
+
+_backends = {}
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace):
+    """
+    Returns the process-wide cache for a namespace on the backend named by CACHE_URL
+    (default memory://), with the namespace's TTL from CACHE_TTLS, signing entries
+    with CACHE_SECRET when it is set. On a shared backend without a secret, a
+    namespace whose values need pickle is kept in this process's memory instead.
+    """
+    url = os.getenv("CACHE_URL", DEFAULT_URL)
+    secret = os.getenv("CACHE_SECRET")
+    with _caches_lock:
+        cache = _caches.get((url, namespace))
+        if cache is None:
+            if url not in _backends:
+                _backends[url] = backend_from_url(url)
+            backend = _backends[url]
+            if backend.shared and not secret and (namespace in PICKLED_NAMESPACES or msgpack is None):
+                print(f"Warning: caching {namespace} in this process only; set CACHE_SECRET to share it")
+                if DEFAULT_URL not in _backends:
+                    _backends[DEFAULT_URL] = backend_from_url(DEFAULT_URL)
+                backend = _backends[DEFAULT_URL]
+            cache = _caches[(url, namespace)] = Cache(backend, namespace, CACHE_TTLS.get(namespace), secret=secret)
+        return cache
+
+
+def cached(namespace, key=None, ttl=None, unless=None):
+    """
+    Decorator keeping results in the namespace's shared cache. Arguments are bound to
+    the signature with defaults applied; key, when given, receives them and returns
+    the cache key. Results for which unless(result) is true aren't stored.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = key(**bound.arguments) if key is not None else f"{name}:{make_key(**bound.arguments)}"
+            cache = get_cache(namespace)
+            result = cache.get(cache_key, _MISSING)
+            if result is not _MISSING:
+                return result
+            result = fn(*args, **kwargs)
+            if unless is None or not unless(result):
+                cache.set(cache_key, result, ttl)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Above this many bars the candlestick is bucketed; a chart can't show more candles than pixels anyway
+MAX_CANDLES = 400
+HISTOGRAM_BINS = 30
+# Above this many months (a 2 year history with partial months at both ends) the volume
+# pie and average close bar go by year, so All Time doesn't draw hundreds of slivers
+MAX_MONTHS = 25
+
+
+def bucket_ohlc(data, max_points=MAX_CANDLES):
+    """
+    Downsamples daily bars into at most max_points OHLC buckets of consecutive bars.
+
+    Each bucket keeps the first open, highest high, lowest low, last close and total
+    volume, so the envelope of the price series is preserved exactly.
+    """
+    n = len(data)
+    if n <= max_points:
+        return data[["Open", "High", "Low", "Close", "Volume"]]
+    size = int(np.ceil(n / max_points))
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    return pd.DataFrame(
+        {
+            "Open": data["Open"].to_numpy()[starts],
+            "High": np.maximum.reduceat(data["High"].to_numpy(), starts),
+            "Low": np.minimum.reduceat(data["Low"].to_numpy(), starts),
+            "Close": data["Close"].to_numpy()[ends],
+            "Volume": np.add.reduceat(data["Volume"].to_numpy(), starts),
+        },
+        index=data.index[starts],
+    )
+
+
+def compute_aggregates(data):
+    """
+    Precomputes everything the Company Research charts need from the daily bars;
+    the month_labels and monthly_* entries cover years instead past MAX_MONTHS
+    """
+    monthly = data.resample("ME").agg({"Volume": "sum", "Close": "mean"})
+    label_format = "%b" if len(monthly) <= 13 else "%b %Y"
+    period_name = "Monthly"
+    if len(monthly) > MAX_MONTHS:
+        # Means of the daily closes, not of the monthly means, so short years aren't overweighted
+        monthly = data.resample("YE").agg({"Volume": "sum", "Close": "mean"})
+        label_format, period_name = "%Y", "Yearly"
+    counts, edges = np.histogram(data["Close"].diff().dropna(), bins=HISTOGRAM_BINS)
+    return {
+        "candles": bucket_ohlc(data),
+        "period_name": period_name,
+        "month_labels": list(monthly.index.strftime(label_format)),
+        "monthly_volume": monthly["Volume"].to_numpy(),
+        "monthly_close_avg": monthly["Close"].to_numpy(),
+        "change_counts": counts,
+        "change_edges": edges,
+    }
+
+
+def build_chart_specs(data):
+    """
+    Builds the candlestick, monthly (or yearly) volume pie, monthly (or yearly)
+    average bar and daily change histogram as Plotly figure dicts from precomputed
+    aggregates
+    """
+    aggregates = compute_aggregates(data)
+    candles = aggregates["candles"]
+    period_name = aggregates["period_name"]
+
+    candlestick = go.Figure(
+        data=[
+            go.Candlestick(
+                x=candles.index,
+                open=candles["Open"],
+                high=candles["High"],
+                low=candles["Low"],
+                close=candles["Close"],
+            )
+        ]
+    )
+    candlestick.update_layout(
+        title="Candlestick Chart",
+        xaxis_title="Date",
+        yaxis_title="Price",
+    )
+
+    volume_pie = go.Figure(
+        go.Pie(
+            values=aggregates["monthly_volume"],
+            labels=aggregates["month_labels"],
+            hole=0.3,
+        )
+    )
+    volume_pie.update_layout(
+        title=f"{period_name} Volume Distribution",
+        autosize=False,
+        width=400,
+        height=400,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5,
+        ),
+    )
+
+    monthly_bar = go.Figure(go.Bar(x=aggregates["month_labels"], y=aggregates["monthly_close_avg"]))
+    monthly_bar.update_layout(
+        title=f"{period_name} Average Close Price",
+        xaxis_title="Month" if period_name == "Monthly" else "Year",
+        yaxis_title="Average Close Price",
+    )
+
+    # Ship the 30 binned counts instead of every daily change
+    edges = aggregates["change_edges"]
+    histogram = go.Figure(
+        go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=aggregates["change_counts"],
+            width=np.diff(edges),
+        )
+    )
+    histogram.update_layout(
+        title="Daily Price Change Distribution",
+        xaxis_title="Price Change",
+        yaxis_title="Frequency",
+        bargap=0,
+    )
+
+    return {
+        "candlestick": candlestick.to_dict(),
+        "volume_pie": volume_pie.to_dict(),
+        "monthly_bar": monthly_bar.to_dict(),
+        "histogram": histogram.to_dict(),
+    }
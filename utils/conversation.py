@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_PATH = "data/conversations.sqlite"
+# Prompt sizes are budgeted in tokens; about four characters each is close enough
+# for English text and avoids loading a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text, max_tokens):
+    """
+    Cuts text to max_tokens, at a word boundary when there is one
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    return cut[: cut.rfind(" ")] if " " in cut else cut
+
+
+def extractive_summary(summary, turns, max_tokens):
+    """
+    Summary without a model: the earlier summary plus one line per question,
+    dropping the oldest lines first to fit max_tokens
+    """
+    lines = ([summary] if summary else []) + [f"- Asked: {question}" for question, _ in turns]
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_tokens("\n".join(lines), max_tokens)
+
+
+class ConversationStore:
+    """
+    Advisor conversations in SQLite: turns by (conversation, turn number) so a page
+    or the last few turns is an index range read whatever the length, plus the
+    rolling summary of the turns before them
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS turns (conversation TEXT, turn INTEGER, question TEXT, answer TEXT, "
+            "created REAL, PRIMARY KEY (conversation, turn))"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS summaries (conversation TEXT PRIMARY KEY, upto INTEGER, summary TEXT)")
+        self._db.commit()
+
+    def append(self, conversation, question, answer):
+        """
+        Adds a turn and returns its number, counting from 1
+        """
+        with self._lock:
+            turn = self._db.execute(
+                "SELECT COALESCE(MAX(turn), 0) + 1 FROM turns WHERE conversation = ?", (conversation,)
+            ).fetchone()[0]
+            self._db.execute("INSERT INTO turns VALUES (?, ?, ?, ?, ?)", (conversation, turn, question, answer, time.time()))
+            self._db.commit()
+        return turn
+
+    def count(self, conversation):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(MAX(turn), 0) FROM turns WHERE conversation = ?", (conversation,)
+            ).fetchone()[0]
+
+    def last_turn(self, conversation):
+        """
+        Returns (number, time added) of the latest turn, or (0, None); it changes
+        whenever a turn is added or the conversation is cleared and restarted
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT turn, created FROM turns WHERE conversation = ? ORDER BY turn DESC LIMIT 1", (conversation,)
+            ).fetchone()
+        return row or (0, None)
+
+    def turns(self, conversation, first=1, last=None):
+        """
+        Returns [(question, answer)] for turns first to last, oldest first
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT question, answer FROM turns WHERE conversation = ? AND turn BETWEEN ? AND ? ORDER BY turn",
+                (conversation, first, last if last is not None else 2**62),
+            ).fetchall()
+        return rows
+
+    def page(self, conversation, page=0, page_size=10):
+        """
+        Returns page of [(turn, question, answer)], newest first
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT turn, question, answer FROM turns WHERE conversation = ? ORDER BY turn DESC LIMIT ? OFFSET ?",
+                (conversation, page_size, page * page_size),
+            ).fetchall()
+
+    def summary(self, conversation):
+        """
+        Returns (last turn the summary covers, summary)
+        """
+        with self._lock:
+            row = self._db.execute("SELECT upto, summary FROM summaries WHERE conversation = ?", (conversation,)).fetchone()
+        return row or (0, "")
+
+    def set_summary(self, conversation, upto, summary):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (conversation, upto, summary))
+            self._db.commit()
+
+    def clear(self, conversation):
+        with self._lock:
+            self._db.execute("DELETE FROM turns WHERE conversation = ?", (conversation,))
+            self._db.execute("DELETE FROM summaries WHERE conversation = ?", (conversation,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RollingMemory:
+    """
+    Bounded chat context: the last recent_turns verbatim, and everything older folded
+    into a stored summary of at most summary_tokens. Turns are folded compact_every
+    at a time, so summarize runs once per that many turns; the context never holds
+    more than recent_turns + compact_every turns besides the summary.
+
+    summarize(previous summary, [(question, answer)], max_tokens) returns the new
+    summary; its result is cut to the budget if it runs over.
+    """
+
+    def __init__(self, store, summarize=extractive_summary, recent_turns=4, compact_every=4, summary_tokens=300):
+        self.store = store
+        self.summarize = summarize
+        self.recent_turns = recent_turns
+        self.compact_every = compact_every
+        self.summary_tokens = summary_tokens
+
+    def add(self, conversation, question, answer):
+        """
+        Stores a turn, folding older turns into the summary when enough are waiting
+        """
+        turn = self.store.append(conversation, question, answer)
+        upto, summary = self.store.summary(conversation)
+        oldest_recent = turn - self.recent_turns + 1
+        if oldest_recent - 1 - upto >= self.compact_every:
+            folded = self.store.turns(conversation, upto + 1, oldest_recent - 1)
+            try:
+                summary = self.summarize(summary, folded, self.summary_tokens)
+            except Exception as e:
+                print(f"Error summarizing conversation: {str(e)}")
+                summary = extractive_summary(summary, folded, self.summary_tokens)
+            self.store.set_summary(conversation, oldest_recent - 1, truncate_tokens(summary, self.summary_tokens))
+        return turn
+
+    def context(self, conversation):
+        """
+        Returns the chat messages carrying the conversation so far: the summary, then
+        the turns after it as user and assistant messages
+        """
+        upto, summary = self.store.summary(conversation)
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        for question, answer in self.store.turns(conversation, upto + 1):
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
@@ -0,0 +1,211 @@
+import sys
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from utils.ratelimit import get_limiter
+from utils.replay import REPLAY, YFINANCE
+
+yf = REPLAY.wrap(yf, "yfinance", **YFINANCE)
+
+
+class ReturnCorrelations:
+    """
+    Aligned daily returns for a ticker universe with an incrementally updated
+    covariance / correlation matrix and precomputed top-k correlated peers.
+
+    Only running sums (sum x and X^T X) are kept, so each new bar costs one
+    rank-k update instead of a full rebuild. If window is set, bars older than
+    the window are subtracted out again as new bars arrive.
+    """
+
+    def __init__(self, tickers, returns=None, window=None, max_peers=20, block_size=1024):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.window = window
+        self.max_peers = min(max_peers, max(len(self.tickers) - 1, 0))
+        self.block_size = block_size
+
+        n = len(self.tickers)
+        # Returns live in rows [_start, _stop) of a buffer that grows by doubling
+        self._buffer = np.empty((0, n), dtype=np.float32)
+        self._start = 0
+        self._stop = 0
+        self.sums = np.zeros(n, dtype=np.float64)
+        self.cross = np.zeros((n, n), dtype=np.float32)
+        self.count = 0
+        self.peers = None
+        self.peer_correlations = None
+        if returns is not None:
+            self.update(returns)
+
+    def update(self, bars):
+        """
+        Adds one bar (n,) or several bars (k, n) of aligned returns; NaN counts as no change
+        """
+        bars = np.nan_to_num(np.atleast_2d(np.asarray(bars, dtype=np.float32)))
+        if bars.shape[1] != len(self.tickers):
+            raise ValueError("Bars must have one return per ticker")
+
+        self._append(bars)
+        expired = self._buffer[self._start : self._start]
+        if self.window and self.count + len(bars) > self.window:
+            expired = self._buffer[self._start : self._stop - self.window]
+            self._start = self._stop - self.window
+
+        # One rank-k update adds the new bars and removes the expired ones
+        self.sums += bars.sum(axis=0, dtype=np.float64) - expired.sum(axis=0, dtype=np.float64)
+        self.cross += np.concatenate([bars, expired]).T @ np.concatenate([bars, -expired])
+        self.count += len(bars) - len(expired)
+
+        # Peer rankings are rebuilt lazily on the next lookup
+        self.peers = None
+        self.peer_correlations = None
+
+    def _append(self, bars):
+        if self._stop + len(bars) > len(self._buffer):
+            active = self.returns
+            capacity = max(2 * len(self._buffer), len(active) + len(bars), 64)
+            if len(active) + len(bars) <= len(self._buffer) // 2:
+                capacity = len(self._buffer)
+            buffer = np.empty((capacity, len(self.tickers)), dtype=np.float32)
+            buffer[: len(active)] = active
+            self._buffer, self._start, self._stop = buffer, 0, len(active)
+        self._buffer[self._stop : self._stop + len(bars)] = bars
+        self._stop += len(bars)
+
+    @property
+    def returns(self):
+        """
+        Aligned daily returns as a (bars, tickers) array
+        """
+        return self._buffer[self._start : self._stop]
+
+    def _std(self):
+        mean = self.sums / self.count
+        var = (np.diag(self.cross) - self.count * mean**2) / (self.count - 1)
+        return np.sqrt(np.maximum(var, 0))
+
+    def covariance(self, rows=None):
+        """
+        Returns the sample covariance matrix, or only the given rows of it
+        """
+        if self.count < 2:
+            raise ValueError("At least two bars are needed for covariance")
+        rows = slice(None) if rows is None else rows
+        mean = self.sums / self.count
+        return (self.cross[rows] - self.count * np.outer(mean[rows], mean)) / (self.count - 1)
+
+    def correlation(self, rows=None):
+        """
+        Returns the correlation matrix, or only the given rows of it
+        """
+        cov = self.covariance(rows)
+        std = self._std()
+        rows_std = std[slice(None) if rows is None else rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(rows_std, std)
+        return np.nan_to_num(corr)
+
+    def pair(self, ticker_a, ticker_b):
+        """
+        Returns the correlation between two tickers in O(1)
+        """
+        i, j = self.index[ticker_a], self.index[ticker_b]
+        if self.count < 2:
+            raise ValueError("At least two bars are needed for correlation")
+        mean = self.sums[[i, j]] / self.count
+        cov = self.cross[np.ix_([i, j], [i, j])] - self.count * np.outer(mean, mean)
+        denominator = np.sqrt(max(cov[0, 0], 0) * max(cov[1, 1], 0))
+        return float(cov[0, 1] / denominator) if denominator else 0.0
+
+    def _rank_peers(self):
+        """
+        Precomputes the max_peers most correlated tickers for every ticker, block by block
+        so the full correlation matrix is never materialized
+        """
+        n, k = len(self.tickers), self.max_peers
+        peers = np.empty((n, k), dtype=np.int32)
+        peer_correlations = np.empty((n, k), dtype=np.float32)
+        for start in range(0, n if k else 0, self.block_size):
+            rows = np.arange(start, min(start + self.block_size, n))
+            corr = self.correlation(rows=rows)
+            corr[np.arange(len(rows)), rows] = -np.inf
+            top = np.argpartition(-corr, k - 1, axis=1)[:, :k]
+            top_corr = np.take_along_axis(corr, top, axis=1)
+            order = np.argsort(-top_corr, axis=1)
+            peers[rows] = np.take_along_axis(top, order, axis=1)
+            peer_correlations[rows] = np.take_along_axis(top_corr, order, axis=1)
+        self.peers = peers
+        self.peer_correlations = peer_correlations
+
+    def top_peers(self, ticker, k=5):
+        """
+        Returns [(peer ticker, correlation)] for the k most correlated tickers
+        """
+        if self.peers is None:
+            self._rank_peers()
+        i = self.index[ticker]
+        k = min(k, self.max_peers)
+        return [
+            (self.tickers[j], float(c))
+            for j, c in zip(self.peers[i, :k], self.peer_correlations[i, :k])
+        ]
+
+    def save(self, path):
+        np.savez_compressed(path, tickers=np.array(self.tickers), returns=self.returns)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path) as data:
+            return cls(data["tickers"].tolist(), data["returns"], **kwargs)
+
+    @classmethod
+    def from_prices(cls, prices, **kwargs):
+        """
+        Builds the service from a DataFrame of daily closes with one column per ticker
+        """
+        prices = prices.dropna(axis=1, how="all").ffill()
+        returns = prices.pct_change(fill_method=None).iloc[1:]
+        return cls([str(c) for c in returns.columns], returns.to_numpy(), **kwargs)
+
+
+def download_prices(tickers, period="1y", batch_size=200):
+    """
+    Downloads aligned daily closes for the tickers from Yahoo Finance in batches
+    """
+    frames = []
+    for start in range(0, len(tickers), batch_size):
+        batch = list(tickers[start : start + batch_size])
+        try:
+            data = get_limiter("yahoo").call(yf.download, batch, period=period, auto_adjust=True, progress=False)
+            frames.append(data["Close"])
+        except Exception as e:
+            print(f"Error downloading prices for batch starting at {batch[0]}: {str(e)}")
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
+
+
+def describe_correlations(service, tickers, k=3):
+    """
+    Describes measured return correlations between and around the given tickers for the LLM
+    """
+    tickers = [t for t in dict.fromkeys(tickers) if t in service.index]
+    lines = []
+    for i, a in enumerate(tickers):
+        for b in tickers[i + 1 :]:
+            lines.append(f"Correlation of daily returns between {a} and {b} is {service.pair(a, b):.2f}.")
+    for ticker in tickers:
+        peers = ", ".join(f"{peer} ({corr:.2f})" for peer, corr in service.top_peers(ticker, k))
+        if peers:
+            lines.append(f"{ticker} is most correlated with {peers}.")
+    return lines
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.correlation successful_tickers.txt data/returns.npz
+    with open(sys.argv[1]) as f:
+        universe = [line.strip() for line in f if line.strip()]
+    service = ReturnCorrelations.from_prices(download_prices(universe))
+    service.save(sys.argv[2])
+    print(f"Saved returns for {len(service.tickers)} tickers to {sys.argv[2]}")
@@ -1,6 +1,44 @@
 from pinecone import Pinecone
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import yfinance as yf
 from sentence_transformers import SentenceTransformer
+from utils.docstore import DEFAULT_PATH as DOCSTORE_PATH, DocStore
+from utils.ratelimit import Throttled, get_limiter
+from utils.replay import REPLAY, YFINANCE
+from utils.warmup import load_model
+
+yf = REPLAY.wrap(yf, "yfinance", **YFINANCE)
+
+STOCK_NAMESPACE = "stock-description_detailed"
+# Fields kept from yfinance's info, under the names the stock analysis filters on
+STOCK_FIELDS = {
+    "Ticker": "symbol",
+    "Name": "longName",
+    "Business Summary": "longBusinessSummary",
+    "City": "city",
+    "State": "state",
+    "Country": "country",
+    "Industry": "industry",
+    "Sector": "sector",
+    "Website": "website",
+    "Market Cap": "marketCap",
+    "Volume": "volume",
+    "Profit Margins": "profitMargins",
+    "Total Revenue": "totalRevenue",
+    "Revenue Growth": "revenueGrowth",
+    "Gross Margins": "grossMargins",
+    "EBIDTA Margins": "ebitdaMargins",
+    "52 Week Change": "52WeekChange",
+    "Target Mean Price": "targetMeanPrice",
+    "Current Price": "currentPrice",
+    "Recommendation Key": "recommendationKey",
+}
 
 
 def initialize_pinecone(api_key, environment, index_name):
@@ -13,7 +51,7 @@ def initialize_pinecone(api_key, environment, index_name):
 
 
 def load_dataset_to_pinecone(index, dataset_path, model_name="BAAI/bge-large-en-v1.5"):
-    model = SentenceTransformer(model_name)
+    model = load_model(SentenceTransformer, model_name)
     data = pd.read_csv(dataset_path)
     for idx, row in data.iterrows():
         text = f"""
@@ -37,4 +75,95 @@ def load_dataset_to_pinecone(index, dataset_path, model_name="BAAI/bge-large-en-
         # Convert all values to strings to ensure compatibility
         metadata = {k: str(v) for k, v in row.to_dict().items()}
 
-        index.upsert([(str(idx), embedding, metadata)])
+        get_limiter("pinecone").call(index.upsert, [(str(idx), embedding, metadata)])
+
+
+def get_stock_info(symbol):
+    """
+    Returns the stock's yfinance info under the index's metadata names
+    """
+    stock_info = get_limiter("yahoo").call(lambda: yf.Ticker(symbol).info)
+    properties = {name: stock_info.get(key, "Information not available") for name, key in STOCK_FIELDS.items()}
+    # No placeholder here, so tickers without a summary can be told apart
+    properties["Business Summary"] = stock_info.get("longBusinessSummary")
+    return properties
+
+
+def _read_tickers(path):
+    try:
+        with open(path) as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def ingest_stocks(
+    index,
+    tickers,
+    namespace=STOCK_NAMESPACE,
+    model_name="sentence-transformers/all-mpnet-base-v2",
+    successful_path="successful_tickers.txt",
+    unsuccessful_path="unsuccessful_tickers.txt",
+    max_workers=5,
+    store=None,
+):
+    """
+    Embeds each ticker's business summary into the stock index, skipping tickers
+    already in successful_path. Yahoo and Pinecone calls go through the shared rate
+    limiters, so throttling slows the job down instead of failing tickers; a ticker
+    still throttled after the retries is left out of both files and picked up by the
+    next run. Only real failures (no summary, bad symbol) go to unsuccessful_path.
+    Ingested documents are also written to store (a DocStore) when given.
+    Returns counts of ingested, skipped, failed and deferred tickers.
+    """
+    model = load_model(SentenceTransformer, model_name)
+    done = _read_tickers(successful_path)
+    lock = threading.Lock()
+    counts = Counter(skipped=0)
+
+    def record(path, ticker, outcome):
+        with lock:
+            counts[outcome] += 1
+            if path:
+                with open(path, "a") as f:
+                    f.write(f"{ticker}\n")
+
+    def process(ticker):
+        try:
+            stock_data = get_stock_info(ticker)
+            description = stock_data["Business Summary"]
+            if not description:
+                raise ValueError("no business summary")
+            embedding = model.encode(description).tolist()
+            # Pinecone metadata can't hold nulls; "text" is where the LangChain store keeps the document
+            metadata = {k: v for k, v in stock_data.items() if v is not None}
+            metadata["text"] = description
+            get_limiter("pinecone").call(index.upsert, vectors=[(ticker, embedding, metadata)], namespace=namespace)
+            if store is not None:
+                store.put([metadata], vectors=[embedding])
+            record(successful_path, ticker, "ingested")
+        except Throttled as e:
+            print(f"Deferred {ticker}: {str(e)}")
+            record(None, ticker, "deferred")
+        except Exception as e:
+            print(f"Error processing {ticker}: {str(e)}")
+            record(unsuccessful_path, ticker, "failed")
+
+    pending = [t for t in dict.fromkeys(tickers) if t not in done]
+    counts["skipped"] = len(tickers) - len(pending)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(process, pending))
+    return counts
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.db [company_tickers.json]
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    with open(sys.argv[1] if len(sys.argv) > 1 else "company_tickers.json") as f:
+        company_tickers = json.load(f)
+    index = initialize_pinecone(os.getenv("PINECONE_API_KEY"), None, "stocks")
+    store = DocStore(os.getenv("DOCSTORE_PATH", DOCSTORE_PATH))
+    counts = ingest_stocks(index, [stock["ticker"] for stock in company_tickers.values()], store=store)
+    print(", ".join(f"{count} {outcome}" for outcome, count in counts.items()))
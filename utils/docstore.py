@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import sys
+import threading
+import numpy as np
+
+
+DEFAULT_PATH = "data/stocks.sqlite"
+# (column, index metadata name, key in the details perform_rag renders)
+FIELDS = [
+    ("name", "Name", "name"),
+    ("summary", "Business Summary", "business_summary"),
+    ("website", "Website", "website"),
+    ("sector", "Sector", "sector"),
+    ("recommendation_key", "Recommendation Key", "recommendation_key"),
+    ("market_cap", "Market Cap", "market_cap"),
+    ("volume", "Volume", "volume"),
+    ("revenue_growth", "Revenue Growth", "revenue_growth"),
+    ("gross_margins", "Gross Margins", "gross_margins"),
+    ("target_mean_price", "Target Mean Price", "target_m_price"),
+    ("current_price", "Current Price", "current_price"),
+    ("week_change_52", "52 Week Change", "52weekchange"),
+]
+NUMERIC = {"market_cap", "volume", "revenue_growth", "gross_margins", "target_mean_price", "current_price", "week_change_52"}
+
+
+def ticker_of(vector_id, aliases=None):
+    """
+    Vectors are keyed by ticker, or "TICKER#n" for several per company; older
+    vectors with random ids are resolved through the store's aliases
+    """
+    if aliases and vector_id in aliases:
+        return aliases[vector_id]
+    return vector_id.split("#", 1)[0]
+
+
+def group_by_ticker(matches, limit, aliases=None):
+    """
+    Keeps the best-scoring match per ticker; returns up to limit (ticker, vector id,
+    score) in score order
+    """
+    best = {}
+    for match in matches:
+        metadata = match.get("metadata") or {}
+        ticker = metadata.get("Ticker") or ticker_of(match["id"], aliases)
+        if ticker not in best or match["score"] > best[ticker][2]:
+            best[ticker] = (ticker, match["id"], match["score"])
+    return sorted(best.values(), key=lambda item: -item[2])[:limit]
+
+
+class DocStore:
+    """
+    Local copy of the stock documents keyed by ticker, so vector queries only need
+    to return ids and scores. The summary is stored once (the index keeps it twice,
+    as "Business Summary" and "text") and numeric fields as numbers. Embeddings are
+    kept as float32 when known, for reranking without asking the index for values.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        columns = ", ".join(f"{column} {'NUMERIC' if column in NUMERIC else 'TEXT'}" for column, _, _ in FIELDS)
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS stocks (ticker TEXT PRIMARY KEY, {columns})")
+        self._db.execute("CREATE TABLE IF NOT EXISTS vector_ids (vector_id TEXT PRIMARY KEY, ticker TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (ticker TEXT PRIMARY KEY, embedding BLOB NOT NULL)")
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM stocks").fetchone()[0]
+
+    def put(self, records, vector_ids=None, vectors=None):
+        """
+        Stores index metadata records (as written by ingest_stocks); vector_ids, when
+        given, records which vector each came from, and vectors their embeddings
+        """
+        rows = [
+            (record["Ticker"], *(record.get(name) for _, name, _ in FIELDS))
+            for record in records
+        ]
+        with self._lock:
+            self._db.executemany(f"INSERT OR REPLACE INTO stocks VALUES ({', '.join('?' * (len(FIELDS) + 1))})", rows)
+            if vector_ids:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO vector_ids VALUES (?, ?)",
+                    [(vector_id, record["Ticker"]) for vector_id, record in zip(vector_ids, records) if vector_id != record["Ticker"]],
+                )
+            if vectors is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                    [
+                        (record["Ticker"], np.asarray(vector, dtype=np.float32).tobytes())
+                        for record, vector in zip(records, vectors)
+                        if vector is not None
+                    ],
+                )
+            self._db.commit()
+
+    def aliases(self, vector_ids):
+        """
+        Returns {vector id: ticker} for the ids that aren't tickers themselves
+        """
+        vector_ids = list(vector_ids)
+        if not vector_ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT vector_id, ticker FROM vector_ids WHERE vector_id IN ({', '.join('?' * len(vector_ids))})",
+                vector_ids,
+            ).fetchall()
+        return dict(rows)
+
+    def get_many(self, tickers):
+        """
+        Returns {ticker: details} for the tickers in the store
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        columns = ", ".join(column for column, _, _ in FIELDS)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT ticker, {columns} FROM stocks WHERE ticker IN ({', '.join('?' * len(tickers))})", tickers
+            ).fetchall()
+        details = {}
+        for ticker, *values in rows:
+            detail = {"ticker": ticker}
+            detail.update({key: value for (_, _, key), value in zip(FIELDS, values)})
+            detail["text"] = detail["business_summary"]
+            details[ticker] = detail
+        return details
+
+    def get_vectors(self, tickers):
+        """
+        Returns {ticker: float32 embedding} for the tickers with a stored embedding
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT ticker, embedding FROM embeddings WHERE ticker IN ({', '.join('?' * len(tickers))})", tickers
+            ).fetchall()
+        return {ticker: np.frombuffer(blob, dtype=np.float32) for ticker, blob in rows}
+
+    def hydrate(self, matches, limit, index=None, namespace=None, vectors=False):
+        """
+        Groups id-only matches by ticker and returns the details of the best limit
+        companies, in score order. Matches that still carry metadata are stored on the
+        way; tickers missing from the store are fetched from the index once and kept,
+        as are random-id vectors not yet known to belong to a ticker.
+        With vectors, returns (details, embeddings matrix) for the companies whose
+        embedding is known, fetching the missing ones in the same call.
+        """
+        matches = list(matches)
+        with_metadata = [m for m in matches if (m.get("metadata") or {}).get("Ticker")]
+        if with_metadata:
+            self.put(
+                [m["metadata"] for m in with_metadata],
+                [m["id"] for m in with_metadata],
+                [m.get("values") for m in with_metadata],
+            )
+        fetched_ids = set()
+        while True:
+            # Random vector ids only resolve to tickers once fetched, which can merge or
+            # reorder the groups, so regroup after every fetch
+            grouped = group_by_ticker(matches, limit, self.aliases(m["id"] for m in matches))
+            details = self.get_many(ticker for ticker, _, _ in grouped)
+            embeddings = self.get_vectors(ticker for ticker, _, _ in grouped) if vectors else {}
+            missing = [
+                vector_id
+                for ticker, vector_id, _ in grouped
+                if (ticker not in details or (vectors and ticker not in embeddings)) and vector_id not in fetched_ids
+            ]
+            if not missing or index is None:
+                break
+            fetched = index.fetch(ids=missing, namespace=namespace)["vectors"]
+            fetched_ids.update(missing)
+            records = [(vector_id, vector) for vector_id, vector in fetched.items() if vector.get("metadata")]
+            if records:
+                self.put(
+                    [vector["metadata"] for _, vector in records],
+                    [vector_id for vector_id, _ in records],
+                    [vector.get("values") for _, vector in records],
+                )
+        if not vectors:
+            return [details[ticker] for ticker, _, _ in grouped if ticker in details]
+        found = [ticker for ticker, _, _ in grouped if ticker in details and ticker in embeddings]
+        matrix = np.stack([embeddings[ticker] for ticker in found]) if found else np.zeros((0, 0), dtype=np.float32)
+        return [details[ticker] for ticker in found], matrix
+
+    def sync_from_index(self, index, namespace=None, batch_size=100):
+        """
+        Copies every document in an index namespace into the store; returns how many
+        """
+        count = 0
+        for ids in index.list(namespace=namespace):
+            ids = list(ids)
+            for start in range(0, len(ids), batch_size):
+                fetched = index.fetch(ids=ids[start : start + batch_size], namespace=namespace)["vectors"]
+                records = [(vector_id, vector) for vector_id, vector in fetched.items() if vector.get("metadata")]
+                self.put(
+                    [vector["metadata"] for _, vector in records],
+                    [vector_id for vector_id, _ in records],
+                    [vector.get("values") for _, vector in records],
+                )
+                count += len(records)
+        return count
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def rekey_index(index, store, namespace=None, batch_size=100):
+    """
+    Moves vectors with random ids (from older ingestion runs, often several per
+    company) to one vector per company keyed by ticker, so top_k returns top_k
+    distinct companies; returns the number of ids removed
+    """
+    with store._lock:
+        aliases = store._db.execute("SELECT vector_id, ticker FROM vector_ids ORDER BY ticker").fetchall()
+    removed = 0
+    for start in range(0, len(aliases), batch_size):
+        batch = dict(aliases[start : start + batch_size])
+        fetched = index.fetch(ids=list(batch), namespace=namespace)["vectors"]
+        vectors = {}
+        for vector_id, vector in fetched.items():
+            vectors.setdefault(batch[vector_id], (batch[vector_id], vector["values"], vector["metadata"]))
+        if vectors:
+            index.upsert(vectors=list(vectors.values()), namespace=namespace)
+        index.delete(ids=list(batch), namespace=namespace)
+        removed += len(batch)
+    with store._lock:
+        store._db.execute("DELETE FROM vector_ids")
+        store._db.commit()
+    return removed
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.docstore [--rekey]
+    from dotenv import load_dotenv
+    from pinecone import Pinecone
+
+    load_dotenv()
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index("stocks")
+    store = DocStore(os.getenv("DOCSTORE_PATH", DEFAULT_PATH))
+    print(f"Synced {store.sync_from_index(index, 'stock-description_detailed')} documents, {len(store)} companies")
+    if "--rekey" in sys.argv:
+        print(f"Replaced {rekey_index(index, store, 'stock-description_detailed')} vector ids with tickers")
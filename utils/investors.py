@@ -0,0 +1,142 @@
+import os
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_PATH = "data/Finance_data.csv"
+# Survey columns ranking each avenue from 1 (most preferred) to 7
+RANK_COLUMNS = {
+    "Mutual_Funds": "Mutual Funds",
+    "Equity_Market": "Equity",
+    "Debentures": "Debentures",
+    "Government_Bonds": "Government Bonds",
+    "Fixed_Deposits": "Fixed Deposits",
+    "PPF": "PPF",
+    "Gold": "Gold",
+}
+# Survey duration answers as years, to compare with the profile's duration
+DURATION_YEARS = {"Less than 1 year": 0.5, "1-3 years": 2.0, "3-5 years": 4.0, "More than 5 years": 7.0}
+CATEGORICAL = ["gender", "Purpose", "Objective"]
+# Relative weight of each feature group in the distance; age and duration are
+# what a profile always has, so they dominate
+WEIGHTS = {"age": 2.0, "duration": 2.0, "gender": 0.5, "Purpose": 1.0, "Objective": 1.0, "ranks": 1.0}
+# Answers summarized for the prompt, besides the avenue ranks
+PREFERENCES = {
+    "Avenue": "main avenue",
+    "Expect": "expected return",
+    "Invest_Monitor": "monitoring",
+    "Factor": "deciding factor",
+    "What are your savings objectives?": "saving for",
+}
+
+
+class InvestorIndex:
+    """
+    Survey respondents as numeric feature vectors (scaled age and duration, one-hot
+    gender, purpose and objective, scaled avenue ranks) for exact nearest-neighbour
+    search. A profile only fills in the features it has; the others are left out of
+    its distances.
+    """
+
+    def __init__(self, data):
+        self.data = data.reset_index(drop=True)
+        self.records = self.data.to_dict("records")
+        self.columns = {}
+        blocks, weights = [], []
+
+        def add(name, values, weight):
+            values = np.asarray(values, dtype=np.float64).reshape(len(self.data), -1)
+            self.columns[name] = slice(sum(b.shape[1] for b in blocks), sum(b.shape[1] for b in blocks) + values.shape[1])
+            blocks.append(values)
+            weights.append(np.full(values.shape[1], weight / values.shape[1]))
+
+        self.age_range = (float(self.data["age"].min()), max(float(self.data["age"].max() - self.data["age"].min()), 1.0))
+        add("age", (self.data["age"] - self.age_range[0]) / self.age_range[1], WEIGHTS["age"])
+        add("duration", self.data["Duration"].map(DURATION_YEARS) / max(DURATION_YEARS.values()), WEIGHTS["duration"])
+        self.categories = {}
+        for column in CATEGORICAL:
+            self.categories[column] = sorted(self.data[column].unique())
+            add(column, np.stack([self.data[column] == value for value in self.categories[column]], axis=1), WEIGHTS[column])
+        add("ranks", (self.data[list(RANK_COLUMNS)] - 1) / 6, WEIGHTS["ranks"])
+        self.features = np.ascontiguousarray(np.hstack(blocks))
+        self.squared = self.features**2
+        self.weights = np.concatenate(weights)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_PATH):
+        return cls(pd.read_csv(path))
+
+    def encode(self, profile):
+        """
+        Returns the profile's (vector, mask) in feature space; mask is 0 where the
+        profile says nothing
+        """
+        vector = np.zeros(self.features.shape[1])
+        mask = np.zeros(self.features.shape[1])
+
+        def put(name, values):
+            vector[self.columns[name]] = values
+            mask[self.columns[name]] = 1.0
+
+        if profile.get("age") is not None:
+            put("age", (float(profile["age"]) - self.age_range[0]) / self.age_range[1])
+        if profile.get("duration") is not None:
+            put("duration", min(float(profile["duration"]), max(DURATION_YEARS.values())) / max(DURATION_YEARS.values()))
+        if profile.get("gender") in self.categories["gender"]:
+            put("gender", [value == profile["gender"] for value in self.categories["gender"]])
+        # The profile's objective is free text; it counts when it names a survey answer
+        objective = str(profile.get("objective") or "").lower()
+        for column in ["Purpose", "Objective"]:
+            named = [value.lower() in objective for value in self.categories[column]]
+            if any(named):
+                put(column, named)
+        return vector, mask
+
+    def query(self, profile, k=5):
+        """
+        Returns [(distance, survey row as a dict)] for the k nearest respondents
+        """
+        vector, mask = self.encode(profile)
+        weights = self.weights * mask
+        # |x - q|^2 weighted, expanded into two matrix-vector products
+        squared = self.squared @ weights - 2 * (self.features @ (weights * vector)) + (vector**2) @ weights
+        distances = np.sqrt(np.maximum(squared, 0))
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(float(distances[i]), self.records[i]) for i in nearest]
+
+
+def describe_investors(matches):
+    """
+    Summarizes what the matched respondents prefer, as lines for the prompt
+    """
+    if not matches:
+        return []
+    rows = [record for _, record in matches]
+    ages = [row["age"] for row in rows]
+    ranks = sorted((sum(row[column] for row in rows) / len(rows), label) for column, label in RANK_COLUMNS.items())
+    lines = [
+        f"{len(rows)} survey respondents with similar profiles (ages {min(ages)}-{max(ages)}, "
+        f"mostly investing for {Counter(row['Duration'] for row in rows).most_common(1)[0][0]})",
+        "Their average ranking of avenues (1 = most preferred): " + ", ".join(f"{label} {rank:.1f}" for rank, label in ranks),
+    ]
+    for column, label in PREFERENCES.items():
+        value, count = Counter(row[column] for row in rows).most_common(1)[0]
+        lines.append(f"Most common {label}: {value} ({count} of {len(rows)})")
+    return lines
+
+
+_index = {}
+
+
+def get_investor_index(path=None):
+    """
+    Returns the index over INVESTORS_PATH (default data/Finance_data.csv), loaded
+    once per path, or None when the file isn't there
+    """
+    path = path or os.getenv("INVESTORS_PATH", DEFAULT_PATH)
+    if path not in _index:
+        _index[path] = InvestorIndex.from_csv(path) if os.path.exists(path) else None
+    return _index[path]
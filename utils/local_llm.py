@@ -0,0 +1,207 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+from utils.warmup import load_model
+
+
+DEFAULT_MAX_NEW_TOKENS = 256
+DEFAULT_MAX_PROMPT_TOKENS = 2048
+DEFAULT_BATCH_SIZE = 8
+# Seconds the first request of a batch waits for others to join it
+DEFAULT_BATCH_WAIT = 0.01
+FALLBACK_REPLY = "I apologize, but I couldn't generate a response. Please try again."
+
+_done = object()
+
+
+class _Request:
+    __slots__ = ("prompt", "max_new_tokens", "tokens", "submitted_at")
+
+    def __init__(self, prompt, max_new_tokens):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.tokens = queue.Queue()
+        self.submitted_at = time.perf_counter()
+
+
+class LocalGenerator:
+    """
+    Text generation with a local causal LM (a small instruction model on CPU), for
+    when the hosted LLMs are down. Prompts go through a queue; a worker thread takes
+    whatever is waiting, up to max_batch_size, and decodes it as one left-padded
+    batch with a KV cache, streaming each request's text as its tokens come. Every
+    request gets at most max_new_tokens.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        max_batch_size=DEFAULT_BATCH_SIZE,
+        max_new_tokens=DEFAULT_MAX_NEW_TOKENS,
+        max_prompt_tokens=DEFAULT_MAX_PROMPT_TOKENS,
+        batch_wait=DEFAULT_BATCH_WAIT,
+        temperature=0.0,
+    ):
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        # Decoding appends on the right, so prompts are padded, and cut, on the left
+        self.tokenizer.padding_side = "left"
+        self.tokenizer.truncation_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.batch_wait = batch_wait
+        self.temperature = temperature
+        self.stats = Counter()
+        # Seconds each recent request waited before its batch started
+        self.queue_seconds = deque(maxlen=1000)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._serve, daemon=True, name="local-llm")
+        self._worker.start()
+
+    @classmethod
+    def from_pretrained(cls, model_name, **kwargs):
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForCausalLM.from_pretrained(model_name)
+        return cls(model, tokenizer, **kwargs)
+
+    def format_prompt(self, messages):
+        """
+        Chat messages as prompt text, with the model's chat template when it has one
+        """
+        if getattr(self.tokenizer, "chat_template", None):
+            return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        return "\n\n".join(f"{m['role']}: {m['content']}" for m in messages) + "\n\nassistant:"
+
+    def stream(self, messages, max_new_tokens=None):
+        """
+        Yields the reply to chat messages as text chunks
+        """
+        budget = min(max_new_tokens or self.max_new_tokens, self.max_new_tokens)
+        request = _Request(self.format_prompt(messages), budget)
+        self._queue.put(request)
+        while True:
+            chunk = request.tokens.get()
+            if chunk is _done:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    def generate(self, messages, max_new_tokens=None):
+        return "".join(self.stream(messages, max_new_tokens)).strip() or FALLBACK_REPLY
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _serve(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            batch = [request]
+            deadline = time.perf_counter() + self.batch_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+            try:
+                self._decode(batch)
+            except Exception as e:
+                print(f"Error generating locally: {str(e)}")
+                for request in batch:
+                    request.tokens.put(e)
+
+    def _decode(self, batch):
+        started = time.perf_counter()
+        with torch.inference_mode():
+            inputs = self.tokenizer(
+                [request.prompt for request in batch],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.max_prompt_tokens,
+            )
+            attention_mask = inputs["attention_mask"]
+            # Positions count from each prompt's first real token, not the padding
+            positions = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+            input_ids = inputs["input_ids"]
+            past = None
+            generated = [[] for _ in batch]
+            sent = [""] * len(batch)
+            active = [True] * len(batch)
+            for _ in range(max(request.max_new_tokens for request in batch)):
+                output = self.model(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    position_ids=positions,
+                    past_key_values=past,
+                    use_cache=True,
+                )
+                past = output.past_key_values
+                logits = output.logits[:, -1, :]
+                if self.temperature:
+                    next_ids = torch.multinomial(torch.softmax(logits / self.temperature, dim=-1), 1)[:, 0]
+                else:
+                    next_ids = logits.argmax(dim=-1)
+                for row, request in enumerate(batch):
+                    if not active[row]:
+                        continue
+                    token = int(next_ids[row])
+                    if token != self.tokenizer.eos_token_id:
+                        generated[row].append(token)
+                        self.stats["tokens"] += 1
+                        # Decoding the whole reply keeps multi-token characters and spacing intact
+                        text = self.tokenizer.decode(generated[row], skip_special_tokens=True)
+                        if text.startswith(sent[row]) and text != sent[row]:
+                            request.tokens.put(text[len(sent[row]) :])
+                            sent[row] = text
+                    if token == self.tokenizer.eos_token_id or len(generated[row]) >= request.max_new_tokens:
+                        active[row] = False
+                        request.tokens.put(_done)
+                if not any(active):
+                    break
+                # Finished rows keep decoding padding until the batch is done
+                next_ids = torch.where(torch.tensor(active), next_ids, self.tokenizer.pad_token_id)
+                input_ids = next_ids[:, None]
+                attention_mask = torch.cat([attention_mask, attention_mask.new_ones((len(batch), 1))], dim=-1)
+                positions = positions[:, -1:] + 1
+        for row, request in enumerate(batch):
+            if active[row]:
+                request.tokens.put(_done)
+            self.queue_seconds.append(started - request.submitted_at)
+        self.stats["requests"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+
+def get_local_generator():
+    """
+    The generator for LOCAL_LLM_MODEL (e.g. Qwen/Qwen2.5-0.5B-Instruct), loaded
+    once per process, or None when it isn't set
+    """
+    model_name = os.getenv("LOCAL_LLM_MODEL")
+    if not model_name:
+        return None
+    return load_model(local_generator_factory, model_name)
+
+
+def local_generator_factory(model_name):
+    return LocalGenerator.from_pretrained(
+        model_name,
+        max_new_tokens=int(os.getenv("LOCAL_LLM_MAX_NEW_TOKENS", DEFAULT_MAX_NEW_TOKENS)),
+        max_batch_size=int(os.getenv("LOCAL_LLM_BATCH", DEFAULT_BATCH_SIZE)),
+    )
@@ -0,0 +1,240 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Histogram upper bounds in seconds, from cache hits up to slow LLM completions
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "finovai"
+
+_current_trace = contextvars.ContextVar("finovai_trace", default=None)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram in the Prometheus layout
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow bucket; not cumulative
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Estimates a quantile by linear interpolation within its bucket, as
+        Prometheus' histogram_quantile does
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (self.max,), self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = upper
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    Thread-safe latency histograms and error counts per stage
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, error=False):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if error:
+                self.errors[stage] += 1
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+
+    def to_prometheus(self, prefix=METRIC_PREFIX):
+        """
+        Renders all stages in the Prometheus text exposition format
+        """
+        name = f"{prefix}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Latency of instrumented stages.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for upper, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{upper:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            lines.append(f"# HELP {prefix}_stage_errors_total Instrumented stages that raised.")
+            lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+            for stage in sorted(self.histograms):
+                lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {self.errors[stage]}')
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        """
+        Summarizes every stage as counts and millisecond latencies
+        """
+        with self._lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "errors": self.errors[stage],
+                    "total_ms": round(histogram.sum * 1e3, 3),
+                    "mean_ms": round(histogram.sum / histogram.count * 1e3, 3),
+                    "p50_ms": round(histogram.quantile(0.5) * 1e3, 3),
+                    "p95_ms": round(histogram.quantile(0.95) * 1e3, 3),
+                    "max_ms": round(histogram.max * 1e3, 3),
+                }
+                for stage, histogram in sorted(self.histograms.items())
+            }
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Trace:
+    """
+    Collects the spans of one request, e.g. a page run, for a waterfall view
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.depth = 0
+        self.started_at = None
+        self.start = None
+        self.duration = None
+        self._token = None
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        _current_trace.reset(self._token)
+        return False
+
+    def waterfall(self):
+        """
+        Returns the spans in start order as dicts with millisecond offsets
+        """
+        return [
+            {"stage": stage, "start_ms": start * 1e3, "duration_ms": duration * 1e3, "depth": depth, "error": error}
+            for stage, start, duration, depth, error in sorted(self.spans, key=lambda s: s[1])
+        ]
+
+
+class Span:
+    """
+    Times a block, records it in the registry and, inside a trace, in the waterfall
+    """
+
+    __slots__ = ("stage", "registry", "trace", "depth", "start")
+
+    def __init__(self, stage, registry=REGISTRY):
+        self.stage = stage
+        self.registry = registry
+
+    def __enter__(self):
+        self.trace = _current_trace.get()
+        if self.trace is not None:
+            self.depth = self.trace.depth
+            self.trace.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        # Control flow such as Streamlit's rerun derives from BaseException and is not an error
+        error = exc_type is not None and issubclass(exc_type, Exception)
+        self.registry.observe(self.stage, elapsed, error)
+        if self.trace is not None:
+            self.trace.depth -= 1
+            self.trace.spans.append((self.stage, self.start - self.trace.start, elapsed, self.depth, error))
+        return False
+
+
+def span(stage, registry=REGISTRY):
+    return Span(stage, registry)
+
+
+def timed(stage, registry=REGISTRY):
+    """
+    Decorator recording every call of the function as a span
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(stage, registry):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def serve_metrics(port, registry=REGISTRY, host="0.0.0.0"):
+    """
+    Serves /metrics (Prometheus text) and /metrics.json from a background thread
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = registry.to_prometheus().encode()
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body = json.dumps(registry.to_json()).encode()
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    return server
@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def maximal_marginal_relevance(query, embeddings, k=4, lambda_mult=0.5, groups=None, max_per_group=None):
+    """
+    Picks k candidates that are relevant to the query but not to each other: each
+    step takes the candidate maximizing lambda_mult * similarity to the query minus
+    (1 - lambda_mult) * its highest similarity to those already picked (1 is plain
+    top-k, 0 is pure diversity). With groups (a label per candidate, e.g. sector) and
+    max_per_group, no group gets more than that many picks while other groups still
+    have candidates. Returns candidate indices in pick order.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    k = min(k, len(embeddings))
+    if k <= 0:
+        return []
+    norms = np.sqrt(np.einsum("ij,ij->i", embeddings, embeddings))[:, None]
+    unit = embeddings / np.where(norms == 0, 1, norms)
+    query = np.asarray(query, dtype=np.float32)
+    relevance = unit @ (query / (np.linalg.norm(query) or 1))
+
+    if groups is not None and max_per_group:
+        labels = {}
+        codes = np.array([labels.setdefault(group, len(labels)) for group in groups])
+        counts = np.zeros(len(labels), dtype=int)
+    else:
+        codes = None
+
+    closest = np.zeros(len(unit), dtype=np.float32)
+    available = np.ones(len(unit), dtype=bool)
+    picked = []
+    for _ in range(k):
+        allowed = available
+        if codes is not None:
+            allowed = available & (counts[codes] < max_per_group)
+            if not allowed.any():
+                allowed = available
+        scores = lambda_mult * relevance - (1 - lambda_mult) * closest if picked else relevance.copy()
+        scores[~allowed] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        if codes is not None:
+            counts[codes[best]] += 1
+        similarity = unit @ unit[best]
+        closest = similarity if len(picked) == 1 else np.maximum(closest, similarity)
+    return picked
@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.ratelimit import Throttled, get_limiter
+from utils.singleflight import SingleFlight
+
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+
+def trim_article(article):
+    """
+    Keeps only the fields the news sidebar renders
+    """
+    return {
+        "title": article.get("title"),
+        "url": article.get("url"),
+        "description": article.get("description"),
+        "publishedAt": article.get("publishedAt"),
+        "source": (article.get("source") or {}).get("name"),
+    }
+
+
+class NewsClient:
+    """
+    NewsAPI client with a pooled HTTP session, strict timeouts and a per-ticker TTL
+    cache of trimmed articles. Concurrent requests for the same ticker share a single
+    upstream call, and a watchlist can be prefetched in the background. Given a shared
+    cache (utils.cache), replicas reuse each other's fetches. When the upstream sends
+    an ETag or Last-Modified, refreshing an expired entry is a conditional request,
+    and a 304 keeps the articles already held.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        base_url=NEWS_API_URL,
+        page_size=5,
+        ttl=15 * 60,
+        error_ttl=60,
+        timeout=(3.05, 10),
+        pool_size=10,
+        max_workers=4,
+        clock=time.monotonic,
+        cache=None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.page_size = page_size
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self.clock = clock
+        self.cache = cache
+
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-prefetch")
+        self._lock = threading.Lock()
+        self._cache = {}
+        # ticker -> (conditional request headers, articles they validate)
+        self._validators = {}
+        self._flight = SingleFlight()
+        self.stats = Counter()
+
+    def _fetch(self, ticker):
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+            previous = self._validators.get(ticker)
+        try:
+            response = get_limiter("newsapi").call(
+                self.session.get,
+                self.base_url,
+                params={"q": ticker, "pageSize": self.page_size, "apiKey": self.api_key},
+                headers=previous[0] if previous else None,
+                timeout=self.timeout,
+            )
+            if response.status_code == 304 and previous:
+                with self._lock:
+                    self.stats["not_modified"] += 1
+                return previous[1]
+            if response.status_code != 200:
+                print(f"Failed to fetch news: {response.status_code}")
+                return None
+            # A malformed body raises requests' JSONDecodeError, a RequestException
+            articles = response.json().get("articles", [])
+        except (requests.RequestException, Throttled) as e:
+            print(f"Failed to fetch news: {str(e)}")
+            return None
+        articles = [trim_article(article) for article in articles[: self.page_size]]
+        # Validators for the next fetch, when the upstream sends them
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        conditional = {}
+        if etag:
+            conditional["If-None-Match"] = etag
+        if last_modified:
+            conditional["If-Modified-Since"] = last_modified
+        with self._lock:
+            if conditional:
+                self._validators[ticker] = (conditional, articles)
+            else:
+                self._validators.pop(ticker, None)
+        return articles
+
+    def get(self, ticker):
+        """
+        Returns the trimmed articles for a ticker, from cache when fresh
+        """
+        key = ticker.upper()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > self.clock():
+                self.stats["hits"] += 1
+                return entry[1]
+        articles, shared = self._flight.do(key, self._load, key)
+        with self._lock:
+            self.stats["coalesced" if shared else "misses"] += 1
+        return articles
+
+    def _load(self, key):
+        # A call that finished between the cache check and joining the flight has stored them
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > self.clock():
+                return entry[1]
+        articles = self.cache.get(key) if self.cache is not None else None
+        if articles is not None:
+            with self._lock:
+                self.stats["shared_hits"] += 1
+                self._cache[key] = (self.clock() + self.ttl, articles)
+            return articles
+        articles = self._fetch(key)
+        if articles is not None and self.cache is not None:
+            self.cache.set(key, articles, self.ttl)
+        # Failures are cached briefly so a struggling upstream isn't hammered
+        ttl = self.ttl if articles is not None else self.error_ttl
+        articles = articles or []
+        with self._lock:
+            self._cache[key] = (self.clock() + ttl, articles)
+        return articles
+
+    def prefetch(self, tickers):
+        """
+        Warms the cache for a watchlist in background threads; returns the futures
+        """
+        return [self._executor.submit(self.get, ticker) for ticker in tickers]
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._cache.clear()
+                self._validators.clear()
+            else:
+                self._cache.pop(ticker.upper(), None)
+                self._validators.pop(ticker.upper(), None)
+        if self.cache is not None:
+            if ticker is None:
+                self.cache.invalidate()
+            else:
+                self.cache.delete(ticker.upper())
+
+    @property
+    def hit_ratio(self):
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return (self.stats["hits"] + self.stats["coalesced"]) / lookups if lookups else 0.0
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
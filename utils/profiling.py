@@ -0,0 +1,224 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+
+
+DEFAULT_DIR = "profiles"
+# Profiles kept in the directory (PROFILE_KEEP); older ones are deleted
+DEFAULT_KEEP = 100
+# Rows kept in the summary of a profile
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+
+_tracing = {"users": 0}
+_tracing_lock = threading.Lock()
+# Held while a profiled call runs. Only one cProfile profiler can be active at a time
+# (Python 3.12+ refuses a second), so calls that find it taken, including nested
+# ones, run unprofiled and are part of the profile already running, if on its thread
+_profiling_lock = threading.Lock()
+
+
+def profiling_requested():
+    """
+    True when FINOVAI_PROFILE=1, which profiles every request
+    """
+    return os.getenv("FINOVAI_PROFILE") == "1"
+
+
+def hottest_functions(stats, limit=TOP_FUNCTIONS):
+    """
+    Returns the functions with the most cumulative time as dicts, from pstats.Stats
+    """
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{function} ({os.path.basename(filename)}:{line})" if line else function,
+                "calls": calls,
+                "own_ms": own * 1e3,
+                "cumulative_ms": cumulative * 1e3,
+            }
+        )
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:limit]
+
+
+def top_allocations(before, after, limit=TOP_ALLOCATIONS):
+    """
+    Returns the source lines that allocated the most between two tracemalloc
+    snapshots, as dicts
+    """
+    return [
+        {
+            "line": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": stat.size_diff / 1024,
+            "count": stat.count_diff,
+        }
+        for stat in after.compare_to(before, "lineno")[:limit]
+        if stat.size_diff > 0
+    ]
+
+
+def _start_tracing():
+    with _tracing_lock:
+        _tracing["users"] += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing["started"] = True
+        tracemalloc.reset_peak()
+
+
+def _stop_tracing():
+    with _tracing_lock:
+        _tracing["users"] -= 1
+        if not _tracing["users"] and _tracing.pop("started", False):
+            tracemalloc.stop()
+
+
+class Profile:
+    """
+    Profiles one request with cProfile and tracemalloc, saves the .prof file and a
+    text report (hottest functions, top allocation sites) to directory, and keeps
+    the summary. tracemalloc is process-wide, so allocations made by other threads
+    meanwhile are counted too.
+    """
+
+    def __init__(self, name, directory=None, keep=None):
+        self.name = name
+        self.directory = directory or os.getenv("PROFILE_DIR", DEFAULT_DIR)
+        self.keep = keep or int(os.getenv("PROFILE_KEEP", DEFAULT_KEEP))
+        self.started_at = None
+        self.duration = None
+        self.functions = []
+        self.allocations = []
+        self.peak_kb = None
+        self.path = None
+        self._profiler = None
+        self._snapshot = None
+        self._start = None
+
+    def __enter__(self):
+        _start_tracing()
+        try:
+            self._snapshot = tracemalloc.take_snapshot()
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        except BaseException:
+            self._snapshot = None
+            _stop_tracing()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.disable()
+        self.duration = time.perf_counter() - self._start
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            self.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            _stop_tracing()
+        stats = pstats.Stats(self._profiler)
+        self.functions = hottest_functions(stats)
+        self.allocations = top_allocations(self._snapshot, snapshot)
+        self._snapshot = None
+        self.save(stats)
+        return False
+
+    def report(self):
+        """
+        The summary as text
+        """
+        lines = [
+            f"{self.name} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at))}: "
+            f"{self.duration * 1e3:.0f} ms, peak traced memory {self.peak_kb:.0f} KB",
+            "",
+            f"{'cumulative ms':>14} {'own ms':>10} {'calls':>8}  function",
+        ]
+        lines += [
+            f"{row['cumulative_ms']:>14.1f} {row['own_ms']:>10.1f} {row['calls']:>8}  {row['function']}"
+            for row in self.functions
+        ]
+        lines += ["", f"{'KB':>10} {'blocks':>8}  allocated at"]
+        lines += [f"{row['size_kb']:>10.1f} {row['count']:>8}  {row['line']}" for row in self.allocations]
+        return "\n".join(lines) + "\n"
+
+    def save(self, stats):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stem = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}-{self.name}-{uuid.uuid4().hex[:6]}"
+            self.path = os.path.join(self.directory, f"{stem}.prof")
+            stats.dump_stats(self.path)
+            with open(os.path.join(self.directory, f"{stem}.txt"), "w") as f:
+                f.write(self.report())
+        except Exception as e:
+            print(f"Error saving profile: {str(e)}")
+            self.path = None
+            return
+        prune_profiles(self.directory, self.keep)
+
+
+def prune_profiles(directory, keep):
+    """
+    Deletes all but the newest keep profiles (.prof and .txt pairs) in directory
+    """
+    try:
+        stems = {}
+        for filename in os.listdir(directory):
+            stem, extension = os.path.splitext(filename)
+            if extension in (".prof", ".txt"):
+                path = os.path.join(directory, filename)
+                stems[stem] = max(stems.get(stem, 0), os.path.getmtime(path))
+        for stem in sorted(stems, key=lambda stem: (stems[stem], stem), reverse=True)[keep:]:
+            for extension in (".prof", ".txt"):
+                path = os.path.join(directory, stem + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+    except OSError as e:
+        print(f"Error pruning profiles: {str(e)}")
+
+
+def profiled(name, enabled=profiling_requested, on_profile=None, directory=None):
+    """
+    Runs the function inside a Profile when enabled() says so at call time, and
+    hands the finished profile to on_profile; otherwise, while another profiled
+    call is running in the process, or if the profiler can't start, calls it
+    directly
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled() or not _profiling_lock.acquire(blocking=False):
+                return fn(*args, **kwargs)
+            profile = Profile(name, directory)
+            try:
+                with ExitStack() as stack:
+                    try:
+                        stack.enter_context(profile)
+                    except Exception as e:
+                        # e.g. another profiler, not one of ours, is active
+                        print(f"Error starting profile: {str(e)}")
+                    return fn(*args, **kwargs)
+            finally:
+                _profiling_lock.release()
+                # A profile that never started has nothing to report
+                if on_profile is not None and profile.duration is not None:
+                    on_profile(profile)
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.profiling profiles/<file>.prof [...]
+    for path in sys.argv[1:]:
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        print(out.getvalue())
@@ -39,6 +39,16 @@ def get_portfolio_guidelines():
     """
 
 
+def get_computed_allocation_rules():
+    return """
+    # Computed Allocation
+    The allocation below has already been calculated from the Portfolio Allocation Guidelines
+    by our rule engine. Use these exact percentages; do not recalculate or change them.
+    Only explain and justify this allocation for the user's profile and question.
+    {allocation}
+    """
+
+
 def get_restrictions():
     return """
     # Response Restrictions
@@ -81,6 +91,7 @@ financial_advisor_prompt = PromptTemplate(
 
     {get_validation_rules()}
     {get_portfolio_guidelines()}
+    {get_computed_allocation_rules()}
     {get_restrictions()}
     {get_formatting_requirements()}
     """,
@@ -93,5 +104,6 @@ financial_advisor_prompt = PromptTemplate(
         "objective",
         "duration",
         "user_question",
+        "allocation",
     ],
 )
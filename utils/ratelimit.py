@@ -0,0 +1,288 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+DEFAULT_PATH = "data/ratelimit.sqlite"
+# Requests per second, burst and latency target in seconds per provider. Every process
+# using the same file shares the rates; calls slower than the target lower this process's
+# concurrency. Override with RATE_LIMITS="groq=0.5:10:20,yahoo=2:20" (no target when left
+# out) or disable with RATE_LIMITS=off
+LIMITS = {
+    # 30 requests a minute on Groq's free tier; a long completion takes several seconds
+    "groq": (0.5, 10, 20.0),
+    # 100 requests a day on NewsAPI's developer plan, usable as one burst
+    "newsapi": (100 / 86400, 100, 5.0),
+    # Yahoo doesn't publish a limit; it starts answering 429 at a few requests a second
+    "yahoo": (2.0, 20, 5.0),
+    "pinecone": (50.0, 100, 1.0),
+}
+
+
+class Throttled(Exception):
+    """
+    The provider kept throttling, or waiting for a token would take longer than allowed
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_limits(spec):
+    """
+    Parses "name=rate:burst:latency_target,..." into {name: (rate, burst, latency_target)};
+    burst defaults to 1 and latency_target to None
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        rate, _, rest = value.partition(":")
+        burst, _, latency_target = rest.partition(":")
+        limits[name.strip()] = (float(rate), float(burst or 1), float(latency_target) if latency_target else None)
+    return limits
+
+
+def throttle_delay(outcome):
+    """
+    Returns the seconds to back off when a response or exception says the provider
+    is throttling (HTTP 429 or an SDK rate-limit error): Retry-After when present,
+    else 0. Returns None for anything else
+    """
+    is_error = isinstance(outcome, BaseException)
+    response = getattr(outcome, "response", None) if is_error else outcome
+    status = getattr(outcome, "status_code", None) if is_error else None
+    if status is None:
+        status = getattr(response, "status_code", None)
+    if status != 429 and not (is_error and "RateLimit" in type(outcome).__name__):
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(float(headers.get("Retry-After")), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    """
+    Token bucket kept in SQLite so every process on the machine draws from the same
+    budget. Each reservation runs in an IMMEDIATE transaction: it refills the bucket
+    for the time elapsed, takes its tokens (going into debt if needed) and returns how
+    long the caller has to wait, which is slept outside the transaction.
+    """
+
+    def __init__(self, name, rate, burst, path=DEFAULT_PATH, clock=time.time):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.clock = clock
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+
+    def _update(self, change):
+        # change(tokens available now) returns (tokens to store, result)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = self._db.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(now - row[1], 0) * self.rate)
+                tokens, result = change(tokens)
+                self._db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (self.name, tokens, now))
+                self._db.execute("COMMIT")
+                return result
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def reserve(self, tokens=1, max_wait=None):
+        """
+        Takes tokens and returns the seconds to wait before using them; raises
+        Throttled, taking nothing, when that wait would exceed max_wait
+        """
+        def change(available):
+            wait = max(tokens - available, 0) / self.rate
+            if max_wait is not None and wait > max_wait:
+                raise Throttled(f"{self.name}: next token in {wait:.1f}s", retry_after=wait)
+            return available - tokens, wait
+        return self._update(change)
+
+    def acquire(self, tokens=1, max_wait=None):
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def block(self, seconds):
+        """
+        Holds every process off for the given seconds; afterwards tokens come back at
+        the normal rate, so the callers waiting don't all fire at once
+        """
+        self._update(lambda available: (min(available, -seconds * self.rate), None))
+
+    def available(self):
+        return self._update(lambda available: (available, available))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on concurrent calls within this process. Each success raises the limit
+    by increase / limit, about +increase per round of calls; a throttle, or a call
+    slower than latency_target, multiplies it by decrease. Decreases closer together
+    than cooldown seconds count once, so a burst of 429s from calls that were already
+    in flight doesn't collapse the limit.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, increase=1.0, decrease=0.5, latency_target=None, cooldown=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.stats = Counter()
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self.in_flight >= max(int(self.limit), 1):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def _cut(self):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._last_decrease = now
+            self.stats["decreases"] += 1
+
+    def on_success(self, latency):
+        with self._cond:
+            if self.latency_target is not None and latency > self.latency_target:
+                self._cut()
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self._cut()
+
+
+class RateLimiter:
+    """
+    Shared token bucket plus adaptive concurrency for one provider. call() waits for a
+    token and a free slot, then runs the request. Throttled requests (429 responses or
+    rate-limit errors) are retried after the provider's Retry-After, or an exponential
+    backoff with jitter, during which every process holds off. After retries it raises
+    Throttled, so callers can tell throttling apart from real failures.
+    """
+
+    def __init__(
+        self,
+        name,
+        rate,
+        burst,
+        path=DEFAULT_PATH,
+        concurrency=4,
+        max_concurrency=16,
+        latency_target=None,
+        retries=3,
+        backoff=1.0,
+        max_wait=30.0,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(name, rate, burst, path)
+        self.concurrency = AdaptiveConcurrency(concurrency, maximum=max_concurrency, latency_target=latency_target)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.stats = Counter()
+
+    def call(self, fn, *args, **kwargs):
+        delay = None
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire(max_wait=self.max_wait)
+            error = None
+            with self.concurrency.slot():
+                start = time.perf_counter()
+                try:
+                    result = fn(*args, **kwargs)
+                    delay = throttle_delay(result)
+                except Exception as e:
+                    delay = throttle_delay(e)
+                    if delay is None:
+                        self.stats["errors"] += 1
+                        raise
+                    error = e
+                latency = time.perf_counter() - start
+            if delay is None:
+                self.concurrency.on_success(latency)
+                self.stats["calls"] += 1
+                return result
+            self.stats["throttled"] += 1
+            self.concurrency.on_throttle()
+            delay = delay or self.backoff * 2**attempt * random.uniform(0.5, 1.0)
+            self.bucket.block(delay)
+        raise Throttled(f"{self.name} still throttling after {self.retries} retries", retry_after=delay) from error
+
+
+class Passthrough:
+    """
+    Stands in for a limiter when rate limiting is off
+    """
+
+    def call(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+PASSTHROUGH = Passthrough()
+
+
+def get_limiter(name):
+    """
+    Returns the process-wide limiter for a provider, configured from LIMITS, RATE_LIMITS
+    and RATE_LIMIT_PATH; with RATE_LIMITS=off calls go straight through
+    """
+    spec = os.getenv("RATE_LIMITS", "")
+    if spec == "off":
+        return PASSTHROUGH
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            rate, burst, latency_target = {**LIMITS, **parse_limits(spec)}[name]
+            limiter = _limiters[name] = RateLimiter(
+                name, rate, burst, os.getenv("RATE_LIMIT_PATH", DEFAULT_PATH), latency_target=latency_target
+            )
+        return limiter
@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+import numpy as np
+
+
+MODES = ("passthrough", "record", "replay")
+DEFAULT_PATH = "data/replay.sqlite"
+# Request parameters that identify the caller rather than the request
+IGNORED_PARAMS = {"apiKey", "api_key", "timeout", "progress"}
+
+# What to record for each kind of client: calls are recorded method calls, properties
+# are recorded attribute reads, and navigate names lead to objects that are proxied too
+OPENAI = {"navigate": ("chat", "completions"), "calls": ("create",)}
+YFINANCE = {"navigate": ("Ticker",), "calls": ("history", "download"), "properties": ("info",)}
+PINECONE_INDEX = {"calls": ("query", "upsert", "fetch", "describe_index_stats")}
+HTTP_SESSION = {"calls": ("get", "post")}
+
+
+class ReplayMiss(LookupError):
+    pass
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items()) if k not in IGNORED_PARAMS}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _normalize(value.tolist())
+    if isinstance(value, (float, np.floating)):
+        # Embeddings of the same text differ in the last bits between runs and machines
+        return float(f"{float(value):.6g}")
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    return repr(value)
+
+
+def request_key(service, operation, args=(), kwargs=None):
+    """
+    Returns the store key for a request: a hash of its normalized service, operation
+    and arguments, ignoring credentials and timeouts
+    """
+    request = [service, operation, _normalize(list(args)), _normalize(kwargs or {})]
+    return hashlib.sha256(json.dumps(request, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _describe_args(args, kwargs):
+    parts = [json.dumps(_normalize(a)) for a in args]
+    parts += [f"{k}={json.dumps(_normalize(v))}" for k, v in sorted(kwargs.items()) if k not in IGNORED_PARAMS]
+    return ", ".join(parts)
+
+
+def _is_stream(value):
+    return hasattr(value, "__next__") and not isinstance(value, (str, bytes, dict, list))
+
+
+def _dumps(value):
+    try:
+        return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 6)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        # Some SDK responses don't pickle; their dict form is read the same way by the app
+        return zlib.compress(pickle.dumps(value.to_dict(), protocol=pickle.HIGHEST_PROTOCOL), 6)
+
+
+class ReplayStore:
+    """
+    SQLite file of zlib-compressed pickled responses keyed by request hash
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._memo = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                service TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                latency REAL NOT NULL,
+                recorded_at REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Returns (kind, value, latency) or None
+        """
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is None:
+                row = self._db.execute("SELECT kind, payload, latency FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                entry = self._memo[key] = (row[0], row[1], row[2])
+        kind, payload, latency = entry
+        # Unpickle on every hit so callers never share a mutable response
+        return kind, pickle.loads(zlib.decompress(payload)), latency
+
+    def put(self, key, service, operation, kind, value, latency):
+        payload = _dumps(value)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, service, operation, kind, payload, latency, time.time()),
+            )
+            self._db.commit()
+            self._memo[key] = (kind, payload, latency)
+
+    def summary(self):
+        """
+        Returns [(service, responses, compressed bytes, mean recorded latency)]
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT service, COUNT(*), SUM(LENGTH(payload)), AVG(latency) FROM responses GROUP BY service ORDER BY service"
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class Replayer:
+    """
+    Routes calls to external services according to the mode:
+
+    - passthrough: calls go live and nothing is stored
+    - record: calls go live and their responses and latencies are stored
+    - replay: responses come from the store with no network; a missing response
+      raises ReplayMiss
+
+    On replay the recorded latency (times latency_scale) is slept before returning,
+    or a fixed latency in seconds when one is given, so offline runs keep realistic
+    timings. latency=None replays instantly.
+    """
+
+    def __init__(self, mode="passthrough", store=None, latency="recorded", latency_scale=1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}, expected one of {MODES}")
+        if mode != "passthrough" and store is None:
+            raise ValueError(f"Replay mode {mode!r} needs a store")
+        self.mode = mode
+        self.store = store
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.stats = Counter()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Configures the replayer from REPLAY_MODE, REPLAY_PATH, REPLAY_LATENCY
+        ("recorded", "none" or seconds) and REPLAY_LATENCY_SCALE
+        """
+        mode = os.getenv("REPLAY_MODE", "passthrough")
+        latency = os.getenv("REPLAY_LATENCY", "recorded")
+        latency = None if latency == "none" else latency if latency == "recorded" else float(latency)
+        store = ReplayStore(os.getenv("REPLAY_PATH", DEFAULT_PATH)) if mode != "passthrough" else None
+        return cls(mode, store, latency, float(os.getenv("REPLAY_LATENCY_SCALE", "1")))
+
+    def _delay(self, recorded):
+        if self.latency is None:
+            return 0.0
+        if self.latency == "recorded":
+            return recorded * self.latency_scale
+        return float(self.latency)
+
+    def _replay_stream(self, chunks, delay):
+        # Spread the recorded duration over the chunks, as the live stream arrived
+        step = delay / len(chunks) if chunks else 0
+        for chunk in chunks:
+            if step:
+                time.sleep(step)
+            yield chunk
+
+    def call(self, service, operation, fn, *args, **kwargs):
+        """
+        Calls fn(*args, **kwargs) for the service, or replays its recorded response
+        """
+        if self.mode == "passthrough":
+            self.stats["passthrough"] += 1
+            return fn(*args, **kwargs)
+
+        key = request_key(service, operation, args, kwargs)
+        if self.mode == "replay":
+            entry = self.store.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                raise ReplayMiss(f"No recorded response for {service} {operation}; record it with REPLAY_MODE=record")
+            self.stats["hits"] += 1
+            kind, value, recorded = entry
+            delay = self._delay(recorded)
+            if kind == "stream":
+                return self._replay_stream(value, delay)
+            if delay:
+                time.sleep(delay)
+            return value
+
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        kind = "value"
+        if _is_stream(value):
+            # Streams are consumed while recording and handed back as a fresh iterator
+            value = list(value)
+            kind = "stream"
+        self.store.put(key, service, operation, kind, value, time.perf_counter() - start)
+        self.stats["recorded"] += 1
+        return iter(value) if kind == "stream" else value
+
+    def wrap(self, target, service, calls=(), properties=(), navigate=()):
+        """
+        Returns target with the named calls and properties going through the replayer;
+        in passthrough mode the target itself is returned, so there is no overhead
+        """
+        if self.mode == "passthrough":
+            return target
+        return ReplayProxy(self, service, "", lambda: target, set(calls), set(properties), set(navigate))
+
+    def wrap_lazy(self, factory, service, calls=(), properties=(), navigate=()):
+        """
+        Like wrap, but the target is only built when a call actually goes live, so
+        replaying never touches clients whose construction needs the network
+        """
+        if self.mode == "passthrough":
+            return factory()
+        return ReplayProxy(self, service, "", factory, set(calls), set(properties), set(navigate))
+
+
+class ReplayProxy:
+    """
+    Stands in for a client object, recording or replaying its declared calls and
+    building the real object only when needed
+    """
+
+    def __init__(self, replayer, service, path, factory, calls, properties, navigate):
+        self._replayer = replayer
+        self._service = service
+        self._path = path
+        self._factory = factory
+        self._calls = calls
+        self._properties = properties
+        self._navigate = navigate
+        self._target_lock = threading.Lock()
+        self._built = False
+        self._value = None
+
+    def _target(self):
+        with self._target_lock:
+            if not self._built:
+                self._value = self._factory()
+                self._built = True
+        return self._value
+
+    def _child(self, path, factory):
+        return ReplayProxy(self._replayer, self._service, path, factory, self._calls, self._properties, self._navigate)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        path = f"{self._path}.{name}" if self._path else name
+        if name in self._calls:
+            def call(*args, **kwargs):
+                return self._replayer.call(
+                    self._service, path, lambda *a, **k: getattr(self._target(), name)(*a, **k), *args, **kwargs
+                )
+            return call
+        if name in self._properties:
+            return self._replayer.call(self._service, path, lambda: getattr(self._target(), name))
+        if name in self._navigate:
+            return self._child(path, lambda: getattr(self._target(), name))
+        return getattr(self._target(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._child(f"{self._path}({_describe_args(args, kwargs)})", lambda: self._target()(*args, **kwargs))
+
+
+REPLAY = Replayer.from_env()
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.replay [data/replay.sqlite]
+    store = ReplayStore(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
+    for service, count, size, latency in store.summary():
+        print(f"{service}: {count} responses, {size / 1024:.1f} KB, {latency * 1e3:.0f} ms mean recorded latency")
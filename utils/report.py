@@ -0,0 +1,140 @@
+import copy
+import hashlib
+import json
+from fpdf import FPDF
+from utils.simulation import summarize_projection
+from utils.utils import count_run
+
+
+def _latin1(text):
+    # The core FPDF fonts only cover latin-1, so replace anything else
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
+def report_keys(user_profile, chat_history):
+    """
+    Returns (profile key, [key per history entry]); each entry's key chains the
+    previous one, so equal keys mean an identical profile and history prefix
+    """
+    profile_key = _digest(user_profile)
+    history_keys = []
+    previous = profile_key
+    for question, answer in chat_history:
+        previous = _digest(previous, question, answer)
+        history_keys.append(previous)
+    return profile_key, history_keys
+
+
+class ReportBuilder:
+    """
+    Builds the investment advisory PDF incrementally.
+
+    The title, user profile and projection are rendered once per profile and each
+    new question / answer pair is appended to the open document, so a longer
+    history never re-renders earlier answers. The finished bytes are memoized on
+    a hash of the profile and history, and on the caller's history version when
+    one is given, so current_bytes() doesn't need the history itself.
+    """
+
+    def __init__(self):
+        self.profile_key = None
+        self.history_keys = []
+        self.pdf = None
+        self._bytes_key = None
+        self._bytes = None
+        self._version = None
+
+    def _start(self, user_profile, projection):
+        pdf = FPDF()
+        pdf.add_page()
+
+        # Add title
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(0, 10, 'FinovAI Investment Advisory Report', ln=True, align='C')
+        pdf.ln(10)
+
+        # Add user profile
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'User Profile', ln=True)
+        pdf.set_font('Arial', '', 12)
+        for key, value in user_profile.items():
+            pdf.cell(0, 10, _latin1(f'{key.capitalize()}: {value}'), ln=True)
+        pdf.ln(10)
+
+        # Add projected outcomes
+        if projection is not None:
+            pdf.set_font('Arial', 'B', 14)
+            pdf.cell(0, 10, f'Projected Portfolio Value After {user_profile["duration"]} Years', ln=True)
+            pdf.set_font('Arial', '', 12)
+            for label, value in summarize_projection(projection):
+                pdf.cell(0, 10, f'{label}: ${value:,.0f}', ln=True)
+            pdf.ln(10)
+
+        # Add chat history
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'Investment Advice History', ln=True)
+        pdf.set_font('Arial', '', 12)
+        self.pdf = pdf
+        self.history_keys = []
+
+    def _append(self, question, answer):
+        self.pdf.multi_cell(0, 10, _latin1(f'Question: {question}'))
+        self.pdf.multi_cell(0, 10, _latin1(f'Answer: {answer}'))
+        self.pdf.ln(5)
+
+    def update(self, user_profile, chat_history, projection=None):
+        """
+        Brings the document up to date with the profile and history, rendering only
+        what changed. Returns the memoization key for the resulting report.
+        """
+        profile_key, history_keys = report_keys(user_profile, chat_history)
+        # A matching history prefix means the already rendered pages are still valid
+        rendered = len(self.history_keys)
+        if (
+            profile_key != self.profile_key
+            or rendered > len(history_keys)
+            or history_keys[:rendered] != self.history_keys
+        ):
+            self._start(user_profile, projection)
+            self.profile_key = profile_key
+            rendered = 0
+
+        for question, answer in chat_history[rendered:]:
+            self._append(question, answer)
+        self.history_keys = history_keys
+        return history_keys[-1] if history_keys else profile_key
+
+    def current_bytes(self, user_profile, version):
+        """
+        Returns the memoized bytes if they were built for this profile and history
+        version (any value that changes with the history, such as the last turn's
+        number and time), else None
+        """
+        if version is not None and (_digest(user_profile), version) == self._version:
+            return self._bytes
+        return None
+
+    def is_current(self, user_profile, version):
+        return self.current_bytes(user_profile, version) is not None
+
+    def to_bytes(self, user_profile, chat_history, projection=None, version=None):
+        """
+        Returns the PDF bytes for the profile and history, reusing memoized bytes
+        when nothing changed
+        """
+        key = self.update(user_profile, chat_history, projection)
+        if key != self._bytes_key:
+            count_run("pdf")
+            # Finishing a document closes it, so finish a copy and keep appending to the original
+            self._bytes = copy.deepcopy(self.pdf).output(dest='S').encode('latin-1')
+            self._bytes_key = key
+        self._version = (self.profile_key, version)
+        return self._bytes
+
+
+def export_to_pdf(user_profile, chat_history, projection=None):
+    return ReportBuilder().to_bytes(user_profile, chat_history, projection)
@@ -0,0 +1,168 @@
+import argparse
+import csv
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+CSV_FIELDS = ["query", "tickers", "names", "analysis", "error", "seconds"]
+
+
+def read_jobs(path, default_filters=None):
+    """
+    Reads screening queries from a text file (one per line), a CSV with a "query"
+    column or JSONL with a "query" key. CSV and JSONL rows may carry their own
+    "market_cap", "volume" and "recommendation_keys" (comma separated in CSV);
+    returns [(query, user_filters)]
+    """
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [{"query": line.strip()} for line in f if line.strip() and not line.startswith("#")]
+
+    jobs = []
+    for row in rows:
+        filters = dict(default_filters) if default_filters else None
+        if row.get("market_cap") or row.get("volume") or row.get("recommendation_keys"):
+            filters = dict(filters or {"Market Cap": 0, "Volume": 0, "Recommendation Keys": ["strong buy", "buy", "hold"]})
+            if row.get("market_cap"):
+                filters["Market Cap"] = float(row["market_cap"])
+            if row.get("volume"):
+                filters["Volume"] = float(row["volume"])
+            if row.get("recommendation_keys"):
+                keys = row["recommendation_keys"]
+                filters["Recommendation Keys"] = keys.split(",") if isinstance(keys, str) else list(keys)
+        jobs.append((row["query"], filters))
+    return jobs
+
+
+class ResultWriter:
+    """
+    Appends one screening result per row to a JSONL or CSV file (by extension) as
+    they finish, so a long batch can be followed and a crash keeps what's done
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w", newline="")
+        self._csv = None
+        if path.endswith(".csv"):
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, result):
+        with self._lock:
+            if self._csv:
+                self._csv.writerow({**result, "tickers": " ".join(result["tickers"]), "names": "; ".join(result["names"])})
+            else:
+                self._file.write(json.dumps(result) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def screen(app, jobs, on_result=None, query_workers=8, analysis_workers=4):
+    """
+    Runs perform_rag's steps for many (query, user_filters) jobs: every query is
+    encoded in one batch, vector queries run query_workers at a time, and each
+    retrieval is handed to at most analysis_workers concurrent LLM analyses as it
+    finishes. on_result gets each result in completion order; returns the results
+    (in job order) and a Counter of ok, failed and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    stats = Counter(ok=0, failed=0)
+    results = [None] * len(jobs)
+    lock = threading.Lock()
+
+    def finish(i, result):
+        result["seconds"] = round(time.perf_counter() - started[i], 3)
+        with lock:
+            results[i] = result
+            stats["ok" if result["error"] is None else "failed"] += 1
+        if on_result:
+            on_result(result)
+
+    def analyze(i, query, matches):
+        try:
+            analysis, error = app.analyze_stocks(query, matches), None
+        except Exception as e:
+            print(f"Error analyzing {query!r}: {str(e)}")
+            analysis, error = None, str(e)
+        finish(i, {"query": query, "tickers": [m["ticker"] for m in matches], "names": [m["name"] for m in matches], "analysis": analysis, "error": error})
+
+    def retrieve(i, query, user_filters, embedding):
+        started[i] = time.perf_counter()
+        try:
+            matches = app.find_stocks(embedding, user_filters)
+        except Exception as e:
+            print(f"Error finding stocks for {query!r}: {str(e)}")
+            finish(i, {"query": query, "tickers": [], "names": [], "analysis": None, "error": str(e)})
+            return None
+        return analyses.submit(analyze, i, query, matches)
+
+    embeddings = app.embed_queries([query for query, _ in jobs]) if jobs else []
+    started = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=analysis_workers) as analyses:
+        with ThreadPoolExecutor(max_workers=query_workers) as retrievals:
+            pending = [
+                retrievals.submit(retrieve, i, query, user_filters, embedding)
+                for i, ((query, user_filters), embedding) in enumerate(zip(jobs, embeddings))
+            ]
+        for future in pending:
+            if future.result() is not None:
+                future.result().result()
+    stats["seconds"] = time.perf_counter() - start
+    return results, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen stocks for many descriptions at once")
+    parser.add_argument("queries", help="queries file: .txt (one per line), .csv or .jsonl")
+    parser.add_argument("-o", "--output", default="screening.jsonl", help="results file: .jsonl or .csv")
+    parser.add_argument("--market-cap", type=float, help="minimum market cap for every query")
+    parser.add_argument("--volume", type=float, help="minimum volume for every query")
+    parser.add_argument("--recommendation", help="allowed recommendation keys, comma separated")
+    parser.add_argument("--query-workers", type=int, default=8)
+    parser.add_argument("--analysis-workers", type=int, default=4)
+    parser.add_argument("--offline", action="store_true", help="run against the local stubs in benchmarks/stubs.py")
+    args = parser.parse_args(argv)
+
+    default_filters = None
+    if args.market_cap is not None or args.volume is not None or args.recommendation:
+        default_filters = {
+            "Market Cap": args.market_cap or 0,
+            "Volume": args.volume or 0,
+            "Recommendation Keys": (args.recommendation or "strong buy,buy,hold").split(","),
+        }
+    jobs = read_jobs(args.queries, default_filters)
+    writer = ResultWriter(args.output)
+    try:
+        if args.offline:
+            from benchmarks.stubs import stubbed_app
+
+            with stubbed_app() as app:
+                results, stats = screen(app, jobs, writer.write, args.query_workers, args.analysis_workers)
+        else:
+            import app
+
+            results, stats = screen(app, jobs, writer.write, args.query_workers, args.analysis_workers)
+    finally:
+        writer.close()
+    print(
+        f"Screened {len(jobs)} queries in {stats['seconds']:.1f}s "
+        f"({len(jobs) / max(stats['seconds'], 1e-9):.1f} queries/s), "
+        f"{stats['ok']} ok, {stats['failed']} failed, results in {args.output}"
+    )
+    return results, stats
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.screening queries.txt -o results.jsonl [--offline]
+    main()
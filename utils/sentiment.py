@@ -0,0 +1,174 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+# Finance headline lexicon: word -> polarity, with 2 for the strongest words
+FINANCE_LEXICON = {
+    # Positive
+    "beat": 1, "beats": 1, "tops": 1, "surge": 2, "surges": 2, "surged": 2, "soar": 2, "soars": 2,
+    "soared": 2, "rally": 1, "rallies": 1, "rallied": 1, "gain": 1, "gains": 1, "gained": 1,
+    "growth": 1, "grow": 1, "grows": 1, "record": 1, "profit": 1, "profits": 1, "profitable": 1,
+    "upgrade": 1, "upgrades": 1, "upgraded": 1, "outperform": 1, "outperforms": 1, "strong": 1,
+    "stronger": 1, "bullish": 1, "rise": 1, "rises": 1, "rising": 1, "rose": 1, "jump": 1,
+    "jumps": 1, "jumped": 1, "boost": 1, "boosts": 1, "boosted": 1, "expand": 1, "expands": 1,
+    "exceed": 1, "exceeds": 1, "exceeded": 1, "optimistic": 1, "positive": 1, "win": 1, "wins": 1,
+    "approval": 1, "approved": 1, "approves": 1, "buyback": 1, "breakthrough": 2, "recover": 1,
+    "recovers": 1, "recovery": 1, "rebound": 1, "rebounds": 1, "higher": 1, "raise": 1,
+    "raises": 1, "raised": 1, "success": 1, "successful": 1, "momentum": 1, "upbeat": 1,
+    # Negative
+    "miss": -1, "misses": -1, "missed": -1, "fall": -1, "falls": -1, "fell": -1, "drop": -1,
+    "drops": -1, "dropped": -1, "plunge": -2, "plunges": -2, "plunged": -2, "slump": -1,
+    "slumps": -1, "decline": -1, "declines": -1, "declined": -1, "loss": -1, "losses": -1,
+    "lawsuit": -1, "sues": -1, "sued": -1, "probe": -1, "investigation": -1, "downgrade": -1,
+    "downgrades": -1, "downgraded": -1, "underperform": -1, "weak": -1, "weaker": -1,
+    "bearish": -1, "cut": -1, "cuts": -1, "layoff": -1, "layoffs": -1, "recall": -1,
+    "recalls": -1, "fraud": -2, "risk": -1, "risks": -1, "warning": -1, "warns": -1,
+    "crash": -2, "crashes": -2, "tumble": -1, "tumbles": -1, "tumbled": -1, "sink": -1,
+    "sinks": -1, "slowdown": -1, "recession": -1, "bankrupt": -2, "bankruptcy": -2,
+    "default": -1, "fined": -1, "penalty": -1, "concern": -1, "concerns": -1, "fears": -1,
+    "lower": -1, "halt": -1, "halts": -1, "delay": -1, "delays": -1, "delayed": -1,
+    "volatile": -1, "uncertainty": -1, "selloff": -1, "downturn": -1,
+}
+NEGATORS = {"not", "no", "never", "without", "nor", "neither", "hardly", "fails", "failed"}
+# A negator flips the polarity of sentiment words up to this many tokens after it,
+# within the same sentence
+NEGATION_WINDOW = 3
+# Squashes summed polarity into (-1, 1); larger values need more words to approach the bounds
+NORMALIZATION_ALPHA = 4.0
+NEUTRAL_BAND = 0.15
+
+TOKEN_RE = re.compile(r"[a-z]+(?:n't|'[a-z]+)?|[.!?;:]")
+SENTENCE_BREAKS = {".", "!", "?", ";", ":"}
+
+
+def sentiment_label(score):
+    if score >= NEUTRAL_BAND:
+        return "positive"
+    if score <= -NEUTRAL_BAND:
+        return "negative"
+    return "neutral"
+
+
+def article_text(article):
+    return f"{article.get('title') or ''}. {article.get('description') or ''}"
+
+
+class SentimentScorer:
+    """
+    Lexicon sentiment scorer for news headlines.
+
+    All texts of a batch are tokenized into one flat array of lexicon indices, so
+    polarity lookup, negation and per-text sums are a handful of numpy operations
+    regardless of how many articles and tickers are scored. Article scores are
+    cached by URL, so only articles not seen before are scored.
+    """
+
+    def __init__(self, lexicon=FINANCE_LEXICON, negators=NEGATORS, cache_size=5000):
+        # Index 0 is reserved for words outside the lexicon
+        words = list(lexicon) + [word for word in negators if word not in lexicon] + sorted(SENTENCE_BREAKS)
+        self.vocab = {word: i + 1 for i, word in enumerate(words)}
+        self.weights = np.zeros(len(words) + 1)
+        self.weights[1 : len(lexicon) + 1] = list(lexicon.values())
+        self.is_negator = np.zeros(len(words) + 1, dtype=bool)
+        self.is_negator[[self.vocab[word] for word in negators]] = True
+        self.is_break = np.zeros(len(words) + 1, dtype=bool)
+        self.is_break[[self.vocab[mark] for mark in SENTENCE_BREAKS]] = True
+        # Contractions such as "isn't" negate like "not"
+        self._contraction_id = self.vocab.get("not", 0)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _token_ids(self, text):
+        return [
+            self._contraction_id if token.endswith("n't") else self.vocab.get(token, 0)
+            for token in TOKEN_RE.findall(text.lower())
+        ]
+
+    def score_texts(self, texts):
+        """
+        Scores each text in (-1, 1) in one vectorized pass
+        """
+        if not texts:
+            return np.zeros(0)
+        token_ids = [self._token_ids(text) for text in texts]
+        lengths = np.fromiter((len(ids) for ids in token_ids), dtype=np.int64, count=len(texts))
+        ids = np.fromiter((i for doc in token_ids for i in doc), dtype=np.int64, count=lengths.sum())
+        docs = np.repeat(np.arange(len(texts)), lengths)
+        # Number the sentences across the whole batch so negation never crosses one
+        starts = np.zeros(len(ids), dtype=bool)
+        starts[np.cumsum(lengths)[:-1][lengths[1:] > 0]] = True
+        sentences = np.cumsum(starts | self.is_break[ids])
+
+        polarity = self.weights[ids]
+        negator = self.is_negator[ids]
+        negated = np.zeros(len(ids), dtype=bool)
+        for offset in range(1, NEGATION_WINDOW + 1):
+            negated[offset:] |= negator[:-offset] & (sentences[offset:] == sentences[:-offset])
+        polarity = np.where(negated, -polarity, polarity)
+
+        sums = np.bincount(docs, weights=polarity, minlength=len(texts))
+        return sums / np.sqrt(sums**2 + NORMALIZATION_ALPHA)
+
+    def score_articles(self, articles_by_ticker):
+        """
+        Returns {ticker: [score per article]}, scoring every uncached article of every
+        ticker in a single batch
+        """
+        keys = {}
+        pending = {}
+        # Scores found now; another thread may evict them before the second lock
+        cached = {}
+        with self._lock:
+            for ticker, articles in articles_by_ticker.items():
+                keys[ticker] = []
+                for article in articles:
+                    key = article.get("url") or article_text(article)
+                    keys[ticker].append(key)
+                    if key in self._cache:
+                        cached[key] = self._cache[key]
+                    elif key not in pending:
+                        pending[key] = article_text(article)
+
+        scores = self.score_texts(list(pending.values())).tolist() if pending else []
+        cached.update(zip(pending, scores))
+        with self._lock:
+            self._cache.update(zip(pending, scores))
+            for key in cached:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return {ticker: [cached[key] for key in ticker_keys] for ticker, ticker_keys in keys.items()}
+
+    def ticker_signals(self, articles_by_ticker):
+        """
+        Aggregates article scores into a per-ticker sentiment signal
+        """
+        signals = {}
+        for ticker, scores in self.score_articles(articles_by_ticker).items():
+            if not scores:
+                continue
+            scores = np.asarray(scores)
+            mean = float(scores.mean())
+            signals[ticker] = {
+                "score": mean,
+                "label": sentiment_label(mean),
+                "articles": len(scores),
+                "positive": int((scores >= NEUTRAL_BAND).sum()),
+                "negative": int((scores <= -NEUTRAL_BAND).sum()),
+            }
+        return signals
+
+
+def describe_sentiment(signals):
+    """
+    Describes per-ticker news sentiment for the LLM
+    """
+    return [
+        f"Recent news sentiment for {ticker} is {signal['label']} ({signal['score']:+.2f}) across "
+        f"{signal['articles']} articles: {signal['positive']} positive, {signal['negative']} negative."
+        for ticker, signal in signals.items()
+    ]
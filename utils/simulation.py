@@ -0,0 +1,121 @@
+import numpy as np
+from utils.allocation import ASSET_CLASSES
+
+
+# Long-run annual return / volatility assumptions per asset class, in ASSET_CLASSES order
+ANNUAL_RETURNS = np.array([0.10, 0.08, 0.04, 0.035, 0.06, 0.05])
+ANNUAL_VOLATILITY = np.array([0.18, 0.13, 0.05, 0.005, 0.15, 0.10])
+CORRELATIONS = np.array(
+    [
+        [1.00, 0.85, -0.10, 0.00, 0.05, 0.50],
+        [0.85, 1.00, 0.10, 0.00, 0.05, 0.45],
+        [-0.10, 0.10, 1.00, 0.30, 0.20, 0.10],
+        [0.00, 0.00, 0.30, 1.00, 0.00, 0.00],
+        [0.05, 0.05, 0.20, 0.00, 1.00, 0.10],
+        [0.50, 0.45, 0.10, 0.00, 0.10, 1.00],
+    ]
+)
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def allocation_to_weights(allocation):
+    """
+    Converts an allocation ({asset class: percent} or a percent array) to weights summing to 1
+    """
+    if isinstance(allocation, dict):
+        allocation = [allocation.get(asset, 0) for asset in ASSET_CLASSES]
+    weights = np.asarray(allocation, dtype=float)
+    if weights.shape != (len(ASSET_CLASSES),) or weights.sum() <= 0:
+        raise ValueError("Allocation must cover the portfolio asset classes")
+    return weights / weights.sum()
+
+
+def monthly_log_return_params(weights):
+    """
+    Returns (mu, sigma) of the monthly log return of a monthly rebalanced portfolio
+    """
+    covariance = CORRELATIONS * np.outer(ANNUAL_VOLATILITY, ANNUAL_VOLATILITY)
+    monthly_mean = weights @ ANNUAL_RETURNS / 12
+    monthly_var = weights @ covariance @ weights / 12
+    sigma_sq = np.log1p(monthly_var / (1 + monthly_mean) ** 2)
+    return np.log1p(monthly_mean) - sigma_sq / 2, np.sqrt(sigma_sq)
+
+
+def simulate_portfolio(
+    allocation,
+    savings,
+    monthly_contribution,
+    years,
+    n_paths=20000,
+    percentiles=DEFAULT_PERCENTILES,
+    chunk_months=None,
+    seed=None,
+):
+    """
+    Runs a Monte Carlo projection of portfolio value over the investment duration.
+
+    Savings are invested up front and the monthly contribution is added at the end of
+    every month. All paths are simulated together; chunk_months bounds memory by
+    processing that many months at a time, carrying each path's value between chunks.
+
+    Returns a dict with the month numbers, cumulative amount contributed, and the
+    portfolio value at each requested percentile for every month.
+    """
+    months = int(round(years * 12))
+    if months < 1 or n_paths < 1:
+        raise ValueError("Projection needs at least one month and one path")
+
+    mu, sigma = monthly_log_return_params(allocation_to_weights(allocation))
+    contribution = max(float(monthly_contribution), 0.0)
+    chunk_months = months if not chunk_months else min(int(chunk_months), months)
+    rng = np.random.default_rng(seed)
+
+    bands = np.empty((len(percentiles), months))
+    wealth = np.full(n_paths, float(savings))
+    for start in range(0, months, chunk_months):
+        stop = min(start + chunk_months, months)
+        # Growth of each path relative to the start of this chunk
+        growth = rng.standard_normal((n_paths, stop - start))
+        growth *= sigma
+        growth += mu
+        np.cumsum(growth, axis=1, out=growth)
+        np.exp(growth, out=growth)
+        # W_t = G_t * (W_0 + c * sum_{s<=t} 1 / G_s)
+        values = np.reciprocal(growth)
+        np.cumsum(values, axis=1, out=values)
+        values *= contribution
+        values += wealth[:, None]
+        values *= growth
+        bands[:, start:stop] = np.percentile(values, percentiles, axis=0)
+        wealth = values[:, -1].copy()
+        del growth, values
+
+    return {
+        "months": np.arange(1, months + 1),
+        "contributed": float(savings) + contribution * np.arange(1, months + 1),
+        "percentiles": dict(zip(percentiles, bands)),
+    }
+
+
+def project_profile(user_profile, allocation, **kwargs):
+    """
+    Projects a user profile's savings and monthly surplus (income - expenditure)
+    """
+    return simulate_portfolio(
+        allocation,
+        user_profile["savings"],
+        user_profile["income"] - user_profile["expenditure"],
+        user_profile["duration"],
+        **kwargs,
+    )
+
+
+def summarize_projection(projection):
+    """
+    Returns [(label, value)] rows describing the final portfolio value distribution
+    """
+    rows = [("Total Contributed", projection["contributed"][-1])]
+    for percentile, values in projection["percentiles"].items():
+        rows.append((f"{percentile}th Percentile", values[-1]))
+    return rows
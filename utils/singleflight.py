@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+
+def _jsonable(value):
+    # numpy arrays and scalars; their repr elides long arrays, which would collide
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return repr(value)
+
+
+def make_key(*args, **kwargs):
+    """
+    Returns a hashable key for call arguments; keyword order doesn't matter and
+    values without a JSON form fall back to their repr
+    """
+    return json.dumps([args, kwargs], sort_keys=True, default=_jsonable, separators=(",", ":"))
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers with the same key share one execution. The first caller
+    (the leader) runs the function; everyone who arrives before it finishes gets its
+    result or exception. Nothing is kept after the call completes: this coalesces
+    in-flight work, it does not cache.
+
+    Threads and asyncio tasks share the same groups, so a coroutine can wait on a
+    call led by a thread and the other way round.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = Counter()
+
+    def _join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            # A running future can't be cancelled by a waiter that gives up
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            self.stats["calls"] += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        # Leave the group before resolving, so later arrivals start a fresh call
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) unless a call with the key is already in flight;
+        returns (result, shared)
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, False
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Like do, for coroutine functions (or plain ones) called from an event loop
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future), True
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def singleflight(key=None, flight=None):
+    """
+    Decorator coalescing concurrent calls with the same arguments. Arguments are
+    bound to the signature with defaults applied, so f("AAPL") and f("AAPL", "1y")
+    share a call; key, when given, receives the bound arguments and returns the key
+    instead. Works on plain and async functions; the group is at .flight
+    """
+    def decorator(fn):
+        group = flight or SingleFlight()
+        signature = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        def call_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if key is not None:
+                return (name, key(**bound.arguments))
+            return (name, make_key(**bound.arguments))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                result, _ = await group.do_async(call_key(args, kwargs), fn, *args, **kwargs)
+                return result
+            async_wrapper.flight = group
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            result, _ = group.do(call_key(args, kwargs), fn, *args, **kwargs)
+            return result
+        wrapper.flight = group
+        return wrapper
+    return decorator
@@ -1,3 +1,13 @@
+from collections import Counter
+
+# Per-process count of panel reruns and expensive work, used to check rerun isolation
+RUN_COUNTS = Counter()
+
+
+def count_run(name):
+    RUN_COUNTS[name] += 1
+
+
 # function to format large numbers
 def format_large_number(num):
     if num >= 1_000_000_000_000:  # Trillions
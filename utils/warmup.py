@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import REGISTRY, span
+
+
+# Tickers whose market data, summary and news are fetched at startup
+DEFAULT_TICKERS = "AAPL,MSFT,NVDA,AMZN,GOOGL"
+DEFAULT_WORKERS = 4
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(factory, model_name):
+    """
+    Returns factory(model_name), built once per process: loading the weights takes
+    seconds, and every embedding call used to pay it
+    """
+    key = (factory, model_name)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = factory(model_name)
+    return model
+
+
+def warmup_enabled():
+    """
+    False when WARMUP=off
+    """
+    return os.getenv("WARMUP", "on") != "off"
+
+
+def warmup_tickers():
+    """
+    The WARMUP_TICKERS list (comma separated), upper-cased
+    """
+    return [t.strip().upper() for t in os.getenv("WARMUP_TICKERS", DEFAULT_TICKERS).split(",") if t.strip()]
+
+
+class Warmup:
+    """
+    Runs named warm-up tasks in background threads and tracks their progress. Each
+    task is timed as a "warmup.<name>" stage in the metrics registry; a task that
+    fails is printed and counted, and only leaves its path cold. ready is set once
+    every task has finished, whether or not it succeeded.
+    """
+
+    def __init__(self, tasks, workers=None, registry=REGISTRY):
+        self.tasks = list(tasks)
+        self.workers = workers or int(os.getenv("WARMUP_WORKERS", DEFAULT_WORKERS))
+        self.registry = registry
+        self.ready = threading.Event()
+        self.stats = Counter(pending=len(self.tasks))
+        self.states = {name: {"state": "pending", "seconds": None} for name, _ in self.tasks}
+        self.started_at = None
+        self.duration = None
+        self._start = None
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        if not self.tasks:
+            self.duration = 0.0
+            self.ready.set()
+            return self
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="warmup")
+        for name, fn in self.tasks:
+            self._executor.submit(self._run, name, fn)
+        self._executor.shutdown(wait=False)
+        return self
+
+    def _run(self, name, fn):
+        self._update(name, "running")
+        start = time.perf_counter()
+        try:
+            with span(f"warmup.{name}", self.registry):
+                fn()
+            outcome = "done"
+        except Exception as e:
+            print(f"Error warming up {name}: {str(e)}")
+            outcome = "failed"
+        self._update(name, outcome, time.perf_counter() - start)
+
+    def _update(self, name, state, seconds=None):
+        with self._lock:
+            self.stats[self.states[name]["state"]] -= 1
+            self.stats[state] += 1
+            self.states[name] = {"state": state, "seconds": seconds}
+            finished = self.stats["done"] + self.stats["failed"] == len(self.tasks)
+            if finished:
+                self.duration = time.perf_counter() - self._start
+        if finished:
+            self.ready.set()
+
+    def wait(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    def progress(self):
+        """
+        Readiness and per-task state as a JSON-able dict
+        """
+        with self._lock:
+            return {
+                "ready": self.ready.is_set(),
+                "total": len(self.tasks),
+                "done": self.stats["done"],
+                "failed": self.stats["failed"],
+                "running": self.stats["running"],
+                "seconds": self.duration,
+                "tasks": {name: dict(state) for name, state in self.states.items()},
+            }